@@ -1,8 +1,12 @@
-from fastapi import FastAPI,HTTPException
+from fastapi import FastAPI,HTTPException,Request
+from fastapi.responses import PlainTextResponse,StreamingResponse
 from app.schemas import QueryRequest,QueryResponse
 from typing import Optional
+from src.index_jobs import IndexJobManager
 from src.rag_pipeline import RAGPipeline
+from src import metrics
 import time
+import json
 from app.logger import get_logger
 from dotenv import load_dotenv
 import os
@@ -17,6 +21,36 @@ TOP_K=int(os.getenv("TOP_K",5))
 ENABLE_RERANK=os.getenv("ENABLE_RERANK","true").lower()=="true"
 ENABLE_COMPRESSION=os.getenv("ENABLE_COMPRESSION","true").lower()=="true"
 
+INGEST_WORKERS=int(os.getenv("INGEST_WORKERS",1))
+INGEST_TIMEOUT=(
+    float(os.getenv("INGEST_TIMEOUT")) if os.getenv("INGEST_TIMEOUT") else None
+)
+
+CPU_WORKERS=int(os.getenv("CPU_WORKERS",4))
+EMBED_BATCHING=os.getenv("EMBED_BATCHING","false").lower()=="true"
+RERANK_BATCHING=os.getenv("RERANK_BATCHING","false").lower()=="true"
+RERANK_MAX_BATCH_SIZE=int(os.getenv("RERANK_MAX_BATCH_SIZE",64))
+RERANK_MAX_WAIT_MS=float(os.getenv("RERANK_MAX_WAIT_MS",5))
+RERANK_CACHE_SIZE=int(os.getenv("RERANK_CACHE_SIZE",4096))
+RERANK_CACHE_PATH=os.getenv("RERANK_CACHE_PATH") or None
+INFERENCE_BACKEND=os.getenv("INFERENCE_BACKEND","fp32").lower()
+MODEL_ARTIFACT_DIR=os.getenv("MODEL_ARTIFACT_DIR","./model_artifacts")
+DENSE_BACKEND=os.getenv("DENSE_BACKEND","chroma").lower()
+DENSE_DTYPE=os.getenv("DENSE_DTYPE","float32").lower()
+DENSE_RESCORE_FACTOR=int(os.getenv("DENSE_RESCORE_FACTOR",4))
+FUSION_MODE=os.getenv("FUSION_MODE","alpha").lower()
+RRF_K=int(os.getenv("RRF_K",60))
+
+COMPRESSION_DEADLINE=(
+    float(os.getenv("COMPRESSION_DEADLINE"))
+    if os.getenv("COMPRESSION_DEADLINE") else None
+)
+
+ENABLE_ANSWER_CACHE=os.getenv("ENABLE_ANSWER_CACHE","false").lower()=="true"
+ANSWER_CACHE_THRESHOLD=float(os.getenv("ANSWER_CACHE_THRESHOLD",0.95))
+
+STREAMING_BUILD=os.getenv("STREAMING_BUILD","false").lower()=="true"
+
 REBUILD_INDEX_ON_STARTUP=(
     os.getenv("REBUILD_INDEX_ON_STARTUP","false").lower()=="true"
 )
@@ -29,6 +63,7 @@ app=FastAPI(
 logger=get_logger("rap-api")
 # Global pipeline instance
 pipeline:Optional[RAGPipeline]=None
+index_jobs=IndexJobManager()
 
 @app.on_event("startup")
 def startup_event():
@@ -44,7 +79,27 @@ def startup_event():
             enable_rerank=True,
             enable_compression=True,
             top_k=5,
-            verbose=False     
+            verbose=False,
+            ingest_workers=INGEST_WORKERS,
+            ingest_timeout=INGEST_TIMEOUT,
+            streaming_build=STREAMING_BUILD,
+            cpu_workers=CPU_WORKERS,
+            embed_batching=EMBED_BATCHING,
+            rerank_batching=RERANK_BATCHING,
+            rerank_max_batch_size=RERANK_MAX_BATCH_SIZE,
+            rerank_max_wait_ms=RERANK_MAX_WAIT_MS,
+            rerank_cache_size=RERANK_CACHE_SIZE,
+            rerank_cache_path=RERANK_CACHE_PATH,
+            inference_backend=INFERENCE_BACKEND,
+            model_artifact_dir=MODEL_ARTIFACT_DIR,
+            dense_backend=DENSE_BACKEND,
+            dense_dtype=DENSE_DTYPE,
+            dense_rescore_factor=DENSE_RESCORE_FACTOR,
+            fusion=FUSION_MODE,
+            rrf_k=RRF_K,
+            compression_deadline=COMPRESSION_DEADLINE,
+            enable_answer_cache=ENABLE_ANSWER_CACHE,
+            answer_cache_threshold=ANSWER_CACHE_THRESHOLD,
         )
         
         start=time.time()
@@ -73,8 +128,16 @@ def health_check():
     return {"status":"ok"}
 
 
+@app.get("/metrics",response_class=PlainTextResponse)
+def metrics_endpoint():
+    return PlainTextResponse(
+        metrics.render(),
+        media_type="text/plain; version=0.0.4",
+    )
+
+
 @app.post("/query",response_model=QueryResponse)
-def query_rag(request:QueryRequest):
+async def query_rag(request:QueryRequest):
     if pipeline is None:
         raise HTTPException(
             status_code=503,
@@ -83,45 +146,98 @@ def query_rag(request:QueryRequest):
     logger.info(f"Query received: {request.query}")
         
     start=time.time()
+    timings=metrics.start_request()
     
     try :
-        answer=pipeline.run(request.query)
+        answer=await pipeline.arun(request.query)
         duration = time.time() -start
+        metrics.observe("total",duration)
+        metrics.QUERIES.inc(label_value="ok")
         
         logger.info(f"Query complete in {duration:.2f}s")
         
-        return QueryResponse(answer=answer)
+        return QueryResponse(
+            answer=answer,
+            timings=timings if request.include_timings else None,
+        )
 
     
     except Exception as e:
+        metrics.QUERIES.inc(label_value="error")
         logger.info("Query failed")
         raise HTTPException(
             status_code=500,
             detail=str(e)
         )
         
-@app.post("/rebuild-index")
-def rebuild_index():
+def _sse(event:str,payload:dict)->str:
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+@app.post("/query/stream")
+async def query_rag_stream(request:QueryRequest,http_request:Request):
     if pipeline is None:
         raise HTTPException(
             status_code=503,
             detail="Pipeline not initialized"
         )
-    logger.warning("Index rebuild triggered")
+    logger.info(f"Streaming query received: {request.query}")
     
-    start =time.time()
+    async def event_stream():
+        start=time.time()
+        events=pipeline.astream(request.query)
+        
+        try:
+            async for event in events:
+                # Stop pulling tokens once the client is gone; closing the
+                # iterator below aborts the upstream Ollama request.
+                if await http_request.is_disconnected():
+                    logger.info("Client disconnected, cancelling generation")
+                    return
+                
+                yield _sse(event.pop("event"),event)
+                
+            metrics.observe("total",time.time()-start)
+            metrics.QUERIES.inc(label_value="ok")
+            logger.info(f"Streaming query complete in {time.time()-start:.2f}s")
+            
+        except Exception as e:
+            metrics.QUERIES.inc(label_value="error")
+            logger.exception("Streaming query failed")
+            yield _sse("error",{"detail":str(e)})
+            
+        finally:
+            await events.aclose()
+            
+    return StreamingResponse(event_stream(),media_type="text/event-stream")
 
 
-    try:
-        pipeline.rebuild_index()
-        logger.warning(f"Index rebuild in {time.time()-start:.2f}s")
-        return {"status":"index rebuild"}
+@app.post("/rebuild-index",status_code=202)
+def rebuild_index(incremental:bool=False):
+    if pipeline is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Pipeline not initialized"
+        )
+    logger.warning("Index rebuild triggered")
     
+    def run():
+        start=time.time()
+        pipeline.rebuild_index(incremental=incremental)
+        logger.warning(f"Index rebuild in {time.time()-start:.2f}s")
     
-    except Exception as e:
-        logger.exception("Index rebuild failed")
+    # Runs in the background against a new index version; queries keep
+    # being served from the current one until it is swapped in.
+    job=index_jobs.submit("update" if incremental else "rebuild",run)
+    return job
+
+
+@app.get("/rebuild-index/{job_id}")
+def rebuild_index_status(job_id:str):
+    job=index_jobs.get(job_id)
+    if job is None:
         raise HTTPException(
-            status_code=500,
-            detail=str(e)
+            status_code=404,
+            detail="Unknown job"
         )
-        
\ No newline at end of file
+    return job
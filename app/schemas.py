@@ -1,10 +1,14 @@
 from pydantic import BaseModel
+from typing import Dict,Optional
 
 
 class QueryRequest(BaseModel):
     query :str
+    include_timings:bool=False
     
 class QueryResponse(BaseModel):
     answer:str
+    # Seconds spent per pipeline stage, when include_timings is set.
+    timings:Optional[Dict[str,float]]=None
     
     
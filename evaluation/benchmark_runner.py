@@ -0,0 +1,387 @@
+"""
+Offline performance benchmarks for the retrieval and generation stages.
+
+Runs per-stage microbenchmarks on a synthetic corpus and reports
+p50/p95/p99 latency, QPS and peak RSS. Generation runs against the local
+Ollama stand-in in evaluation/fake_ollama.py, so no live LLM is needed.
+With --fake-models, the embedder is replaced by a hashing embedder and the
+rerank benchmark is skipped, so no model downloads are needed either.
+
+    python evaluation/benchmark_runner.py --size small --save baseline.json
+    python evaluation/benchmark_runner.py --size small --compare baseline.json
+"""
+
+from typing import Callable, Dict, List, Optional, Sequence
+from statistics import mean
+import argparse
+import hashlib
+import json
+import platform
+import resource
+import subprocess
+import tempfile
+import time
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+from langchain_community.vectorstores import Chroma
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from src import metrics
+from src.chunking import Chunking
+from src.documents_ingestion import DataIngestion
+from src.retrieval import HybridRetriever
+from evaluation.fake_ollama import FakeOllamaServer
+from evaluation.synthetic_corpus import (
+    PAGES_PER_FILE,
+    SIZES,
+    generate_documents,
+    generate_queries,
+    write_corpus,
+)
+
+
+BENCHMARKS = ("chunking", "ingestion", "retrieve", "rerank", "generate")
+LATENCY_KEYS = ("p50_ms", "p95_ms", "p99_ms")
+
+
+class HashEmbeddings(Embeddings):
+    """Deterministic bag-of-words hashing embedder; no model download."""
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in text.lower().split():
+            digest = hashlib.md5(token.encode("utf-8")).digest()
+            index = int.from_bytes(digest[:4], "little") % self.dim
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm > 0 else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere.
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def measure(
+    fn: Callable,
+    inputs: Sequence,
+    iterations: int,
+    warmup: int = 3,
+) -> Dict:
+    """Calls fn on inputs (cycled) and summarizes the per-call latencies."""
+    for i in range(min(warmup, iterations)):
+        fn(inputs[i % len(inputs)])
+
+    latencies = []
+    stages: Dict[str, List[float]] = {}
+
+    wall_start = time.perf_counter()
+    for i in range(iterations):
+        timings = metrics.start_request()
+
+        start = time.perf_counter()
+        fn(inputs[i % len(inputs)])
+        latencies.append(time.perf_counter() - start)
+
+        for stage, seconds in timings.items():
+            stages.setdefault(stage, []).append(seconds)
+    wall = time.perf_counter() - wall_start
+
+    latencies_ms = 1000.0 * np.asarray(latencies)
+    result = {
+        "iterations": iterations,
+        "mean_ms": float(latencies_ms.mean()),
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p95_ms": float(np.percentile(latencies_ms, 95)),
+        "p99_ms": float(np.percentile(latencies_ms, 99)),
+        "qps": iterations / wall if wall > 0 else 0.0,
+        # Process-wide high-water mark, so it includes earlier benchmarks.
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    if stages:
+        result["stages_mean_ms"] = {
+            stage: 1000.0 * mean(values) for stage, values in stages.items()
+        }
+
+    return result
+
+
+# ------------------------------------------------
+# Benchmarks
+# ------------------------------------------------
+def bench_chunking(pages: List[Document], iterations: int) -> Dict:
+    files = [
+        pages[i:i + PAGES_PER_FILE] for i in range(0, len(pages), PAGES_PER_FILE)
+    ]
+    return measure(Chunking.recursive_chunking, files, iterations)
+
+
+def bench_ingestion(pages: List[Document], workdir: str, iterations: int) -> Dict:
+    paths = write_corpus(os.path.join(workdir, "corpus"), len(pages), documents=pages)
+    return measure(DataIngestion.load_file, paths, iterations)
+
+
+def build_retriever(
+    chunks: List[Document],
+    workdir: str,
+    fake_models: bool,
+    dense_backend: str = "chroma",
+    fusion: str = "alpha",
+) -> HybridRetriever:
+    if fake_models:
+        embeddings = HashEmbeddings()
+    else:
+        from src.vector_embedding import EmbeddingStore
+
+        # No query cache: benchmark queries repeat across iterations.
+        embeddings = EmbeddingStore(query_cache_size=0).embeddings
+
+    vectordb = Chroma(
+        persist_directory=os.path.join(workdir, "chroma"),
+        embedding_function=embeddings,
+        collection_name="benchmark",
+    )
+    for i in range(0, len(chunks), 1000):
+        batch = chunks[i:i + 1000]
+        vectordb.add_documents(batch, ids=[doc.metadata["chunk_id"] for doc in batch])
+
+    return HybridRetriever(
+        vectordb, chunks, dense_backend=dense_backend, fusion=fusion
+    )
+
+
+def bench_retrieve(
+    retriever: HybridRetriever,
+    queries: List[str],
+    iterations: int,
+) -> Dict:
+    return measure(lambda q: retriever.retrieve(q, k=10), queries, iterations)
+
+
+def bench_rerank(
+    chunks: List[Document],
+    queries: List[str],
+    iterations: int,
+    candidates: int = 20,
+) -> Dict:
+    from src.reranker import ReRanker
+
+    reranker = ReRanker()
+    rng = np.random.default_rng(0)
+    inputs = [
+        (query, [chunks[i] for i in rng.choice(len(chunks), candidates, replace=False)])
+        for query in queries
+    ]
+    return measure(
+        lambda item: reranker.rerank(item[0], item[1], top_n=5),
+        inputs,
+        iterations,
+    )
+
+
+def bench_generate(
+    chunks: List[Document],
+    queries: List[str],
+    iterations: int,
+    latency_ms: float,
+    tokens_per_second: float,
+) -> Dict:
+    from src.generator_with_citations import RAGGenerator
+    from src.llm_client import LocalLLM
+
+    with FakeOllamaServer(
+        latency_ms=latency_ms,
+        tokens_per_second=tokens_per_second,
+    ) as server:
+        generator = RAGGenerator(llm=LocalLLM(host=server.url))
+        inputs = [
+            (query, chunks[(5 * i) % len(chunks):][:5])
+            for i, query in enumerate(queries)
+        ]
+        return measure(
+            lambda item: generator.generate_with_citations(item[0], item[1]),
+            inputs,
+            iterations,
+        )
+
+
+def run_benchmarks(
+    size: str,
+    benchmarks: Sequence[str],
+    iterations: int,
+    seed: int = 0,
+    fake_models: bool = False,
+    llm_latency_ms: float = 50.0,
+    llm_tokens_per_second: float = 200.0,
+    dense_backend: str = "chroma",
+    fusion: str = "alpha",
+) -> Dict:
+    pages = generate_documents(SIZES[size], seed=seed)
+    queries = generate_queries(max(iterations, 50), seed=seed)
+    chunks = Chunking.assign_chunk_ids(Chunking.recursive_chunking(pages))
+
+    results: Dict[str, Dict] = {}
+
+    with tempfile.TemporaryDirectory(prefix="rag-bench-") as workdir:
+        for name in benchmarks:
+            print(f"[BENCH] {name} ({size}, {len(chunks)} chunks)...")
+
+            if name == "chunking":
+                results[name] = bench_chunking(pages, iterations)
+            elif name == "ingestion":
+                results[name] = bench_ingestion(pages, workdir, iterations)
+            elif name == "retrieve":
+                retriever = build_retriever(
+                    chunks, workdir, fake_models, dense_backend, fusion
+                )
+                results[name] = bench_retrieve(retriever, queries, iterations)
+            elif name == "rerank":
+                if fake_models:
+                    print("[BENCH] rerank skipped (--fake-models)")
+                    continue
+                results[name] = bench_rerank(chunks, queries, iterations)
+            elif name == "generate":
+                results[name] = bench_generate(
+                    chunks, queries, iterations,
+                    llm_latency_ms, llm_tokens_per_second,
+                )
+            else:
+                raise ValueError(f"Unknown benchmark: {name}")
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "size": size,
+            "chunks": len(chunks),
+            "seed": seed,
+            "iterations": iterations,
+            "fake_models": fake_models,
+            "dense_backend": dense_backend,
+            "fusion": fusion,
+            "llm_latency_ms": llm_latency_ms,
+            "llm_tokens_per_second": llm_tokens_per_second,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+# ------------------------------------------------
+# Reporting + baselines
+# ------------------------------------------------
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report: Dict) -> None:
+    print("\n===== BENCHMARK RESULTS =====")
+    print(f"{'benchmark':10s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s} {'QPS':>9s} {'RSS MB':>9s}")
+
+    for name, result in report["results"].items():
+        print(
+            f"{name:10s} {result['p50_ms']:9.2f} {result['p95_ms']:9.2f} "
+            f"{result['p99_ms']:9.2f} {result['qps']:9.1f} {result['peak_rss_mb']:9.1f}"
+        )
+        for stage, ms in result.get("stages_mean_ms", {}).items():
+            print(f"    {stage:18s} {ms:9.2f} ms")
+
+
+def compare(report: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Prints latency changes against baseline; returns the regressions."""
+    regressions = []
+
+    print(f"\n===== vs baseline {baseline['meta'].get('commit')} =====")
+    for name, result in report["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+
+        changes = []
+        for key in LATENCY_KEYS:
+            if base[key] <= 0:
+                continue
+            change = (result[key] - base[key]) / base[key]
+            changes.append(f"{key[:3]} {change:+.1%}")
+            if change > threshold:
+                regressions.append(f"{name} {key}: {base[key]:.2f} -> {result[key]:.2f} ms")
+
+        print(f"{name:10s} " + "  ".join(changes))
+
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="RAG pipeline benchmarks")
+    parser.add_argument("--size", choices=list(SIZES), default="small")
+    parser.add_argument("--benchmarks", default=",".join(BENCHMARKS))
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--fake-models", action="store_true")
+    parser.add_argument("--dense-backend", choices=list(HybridRetriever.DENSE_BACKENDS),
+                        default="chroma")
+    parser.add_argument("--fusion", choices=list(HybridRetriever.FUSION_MODES),
+                        default="alpha")
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0)
+    parser.add_argument("--llm-tokens-per-second", type=float, default=200.0)
+    parser.add_argument("--save", help="write results as a JSON baseline")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="relative latency increase counted as a regression")
+    args = parser.parse_args()
+
+    report = run_benchmarks(
+        size=args.size,
+        benchmarks=[b.strip() for b in args.benchmarks.split(",") if b.strip()],
+        iterations=args.iterations,
+        seed=args.seed,
+        fake_models=args.fake_models,
+        llm_latency_ms=args.llm_latency_ms,
+        llm_tokens_per_second=args.llm_tokens_per_second,
+        dense_backend=args.dense_backend,
+        fusion=args.fusion,
+    )
+    print_report(report)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline written to {args.save}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Deterministic local stand-in for Ollama's /api/generate endpoint.
+
+Responds after a fixed time-to-first-token, then emits tokens at a fixed
+rate, both configurable, so benchmarks and load tests can run without a
+real model. The response text is derived from a hash of the prompt:
+the same prompt always gets the same answer.
+
+    python evaluation/fake_ollama.py --port 11434 --latency-ms 200 --tokens-per-second 40
+
+then point the API at it with OLLAMA_BASE_URL=http://127.0.0.1:11434.
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+import argparse
+import hashlib
+import json
+import threading
+import time
+
+
+WORDS = [
+    "employees", "policy", "leave", "approval", "manager", "days", "request",
+    "submitted", "within", "company", "security", "access", "expense",
+    "reimbursement", "travel", "notice", "period", "must", "be", "the",
+]
+
+
+class FakeOllamaServer:
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: float = 50.0,
+        tokens_per_second: float = 50.0,
+        response_tokens: int = 40,
+        model: str = "llama3.2",
+    ):
+        self.latency = latency_ms / 1000.0
+        self.tokens_per_second = tokens_per_second
+        self.response_tokens = response_tokens
+        self.model = model
+
+        self.requests = 0
+        self._lock = threading.Lock()
+
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def tokens_for(self, prompt: str) -> List[str]:
+        digest = hashlib.sha256(prompt.encode("utf-8")).digest()
+        words = [
+            WORDS[digest[i % len(digest)] % len(WORDS)]
+            for i in range(self.response_tokens)
+        ]
+        tokens = [word if i == 0 else f" {word}" for i, word in enumerate(words)]
+        return tokens + [" [Source 1]."]
+
+    def _token_delay(self) -> float:
+        if self.tokens_per_second <= 0:
+            return 0.0
+        return 1.0 / self.tokens_per_second
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status: int, payload: dict) -> None:
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _write_chunk(self, payload: dict) -> None:
+                data = (json.dumps(payload) + "\n").encode("utf-8")
+                self.wfile.write(f"{len(data):x}\r\n".encode("ascii"))
+                self.wfile.write(data + b"\r\n")
+                self.wfile.flush()
+
+            def do_GET(self):
+                if self.path == "/api/tags":
+                    self._send_json(200, {"models": [{"name": server.model}]})
+                else:
+                    self._send_json(404, {"error": "not found"})
+
+            def do_POST(self):
+                if self.path != "/api/generate":
+                    self._send_json(404, {"error": "not found"})
+                    return
+
+                length = int(self.headers.get("Content-Length", 0))
+                try:
+                    request = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    self._send_json(400, {"error": "invalid JSON"})
+                    return
+
+                with server._lock:
+                    server.requests += 1
+
+                tokens = server.tokens_for(request.get("prompt", ""))
+                delay = server._token_delay()
+                time.sleep(server.latency)
+
+                if not request.get("stream", True):
+                    time.sleep(delay * len(tokens))
+                    self._send_json(200, {
+                        "model": server.model,
+                        "response": "".join(tokens),
+                        "done": True,
+                    })
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+
+                try:
+                    for token in tokens:
+                        time.sleep(delay)
+                        self._write_chunk({
+                            "model": server.model,
+                            "response": token,
+                            "done": False,
+                        })
+                    self._write_chunk({
+                        "model": server.model,
+                        "response": "",
+                        "done": True,
+                    })
+                    self.wfile.write(b"0\r\n\r\n")
+                    self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    # Client cancelled the stream.
+                    self.close_connection = True
+
+        return Handler
+
+    def start(self) -> "FakeOllamaServer":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            name="fake-ollama",
+            daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeOllamaServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local Ollama stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--response-tokens", type=int, default=40)
+    args = parser.parse_args()
+
+    server = FakeOllamaServer(
+        host=args.host,
+        port=args.port,
+        latency_ms=args.latency_ms,
+        tokens_per_second=args.tokens_per_second,
+        response_tokens=args.response_tokens,
+    )
+    print(f"Fake Ollama listening on {server.url}")
+
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
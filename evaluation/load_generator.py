@@ -0,0 +1,259 @@
+"""
+Load generator for the FastAPI service.
+
+Replays queries against POST /query either open-loop at a target rate
+(--qps: arrivals follow a seeded Poisson process and do not wait for
+earlier requests to finish) or closed-loop at a fixed concurrency
+(--concurrency). Records latency, status code and errors per request and
+prints throughput and latency percentiles. Latency counts from each
+request's scheduled arrival, so generator lag is included.
+
+Against a local app with the Ollama stand-in:
+
+    python evaluation/fake_ollama.py --port 11434 &
+    OLLAMA_BASE_URL=http://127.0.0.1:11434 uvicorn app.main:app --port 8000 &
+    python evaluation/load_generator.py --qps 5 --duration 60 --queries-file requests.jsonl
+"""
+
+from typing import Dict, List, Optional
+from collections import Counter
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import httpx
+import numpy as np
+
+from evaluation.synthetic_corpus import generate_queries
+
+
+def load_queries(path: Optional[str], count: int, seed: int = 0) -> List[str]:
+    """Queries from a JSONL file ("query", else "title" per line) or synthetic."""
+    if not path:
+        return generate_queries(count, seed=seed)
+
+    queries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            query = record.get("query") or record.get("title")
+            if query:
+                queries.append(query)
+
+    if not queries:
+        raise ValueError(f"No queries found in {path}")
+
+    return queries
+
+
+class LoadTest:
+
+    def __init__(
+        self,
+        base_url: str,
+        queries: List[str],
+        timeout: float = 120.0,
+        include_timings: bool = False,
+    ):
+        self.url = base_url.rstrip("/") + "/query"
+        self.queries = queries
+        self.timeout = timeout
+        self.include_timings = include_timings
+        self.results: List[Dict] = []
+
+    async def _send(self, client: httpx.AsyncClient, index: int, scheduled: float) -> None:
+        query = self.queries[index % len(self.queries)]
+        start = time.perf_counter()
+
+        result = {
+            "query": query,
+            # How late the request went out relative to its arrival time.
+            "lag_ms": 1000.0 * (start - scheduled),
+            "status": None,
+            "error": None,
+        }
+        try:
+            r = await client.post(
+                self.url,
+                json={"query": query, "include_timings": self.include_timings},
+            )
+            result["status"] = r.status_code
+            if r.status_code != 200:
+                result["error"] = f"HTTP {r.status_code}"
+            elif self.include_timings:
+                result["timings"] = r.json().get("timings")
+        except httpx.HTTPError as e:
+            result["error"] = type(e).__name__
+
+        end = time.perf_counter()
+        # Measured from the scheduled arrival, so time spent queued behind a
+        # lagging generator counts (no coordinated omission). service_ms is
+        # the request alone.
+        result["latency_ms"] = 1000.0 * (end - scheduled)
+        result["service_ms"] = 1000.0 * (end - start)
+        self.results.append(result)
+
+    def _client(self, max_connections: int) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+        )
+
+    async def run_open_loop(
+        self,
+        qps: float,
+        duration: float,
+        max_in_flight: int = 1000,
+        seed: int = 0,
+    ) -> float:
+        """Fires requests at Poisson arrival times; returns the wall time."""
+        rng = random.Random(seed)
+        tasks = []
+
+        async with self._client(max_in_flight) as client:
+            start = time.perf_counter()
+            next_arrival = start
+            index = 0
+
+            while next_arrival - start < duration:
+                delay = next_arrival - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+                tasks.append(asyncio.create_task(
+                    self._send(client, index, next_arrival)
+                ))
+                index += 1
+                next_arrival += rng.expovariate(qps)
+
+            await asyncio.gather(*tasks)
+            return time.perf_counter() - start
+
+    async def run_closed_loop(
+        self,
+        concurrency: int,
+        duration: float,
+    ) -> float:
+        """Keeps `concurrency` requests in flight; returns the wall time."""
+        counter = iter(range(sys.maxsize))
+
+        async with self._client(concurrency) as client:
+            start = time.perf_counter()
+
+            async def worker():
+                while time.perf_counter() - start < duration:
+                    await self._send(client, next(counter), time.perf_counter())
+
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            return time.perf_counter() - start
+
+
+def percentile(values: np.ndarray, q: float) -> Optional[float]:
+    # None, not 0 ms, when no request succeeded.
+    return float(np.percentile(values, q)) if len(values) else None
+
+
+def summarize(results: List[Dict], wall: float) -> Dict:
+    ok = [r for r in results if r["error"] is None]
+    latencies = np.asarray([r["latency_ms"] for r in ok])
+    service = np.asarray([r["service_ms"] for r in ok])
+
+    return {
+        "requests": len(results),
+        "ok": len(ok),
+        "errors": dict(Counter(r["error"] for r in results if r["error"])),
+        "status_codes": dict(Counter(str(r["status"]) for r in results)),
+        "wall_seconds": wall,
+        "throughput_qps": len(ok) / wall if wall > 0 else 0.0,
+        "p50_ms": percentile(latencies, 50),
+        "p90_ms": percentile(latencies, 90),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": float(latencies.max()) if len(latencies) else None,
+        "service_p50_ms": percentile(service, 50),
+        "service_p99_ms": percentile(service, 99),
+        "max_lag_ms": max((r["lag_ms"] for r in results), default=0.0),
+    }
+
+
+def print_summary(summary: Dict) -> None:
+    print("\n===== LOAD TEST RESULTS =====")
+    print(f"Requests:    {summary['requests']} ({summary['ok']} ok)")
+    print(f"Throughput:  {summary['throughput_qps']:.2f} req/s over {summary['wall_seconds']:.1f}s")
+    if summary["ok"]:
+        print(
+            f"Latency ms:  p50 {summary['p50_ms']:.0f}  p90 {summary['p90_ms']:.0f}  "
+            f"p95 {summary['p95_ms']:.0f}  p99 {summary['p99_ms']:.0f}  max {summary['max_ms']:.0f}"
+        )
+        print(
+            f"Service ms:  p50 {summary['service_p50_ms']:.0f}  "
+            f"p99 {summary['service_p99_ms']:.0f}  (excluding send lag)"
+        )
+    else:
+        print("Latency ms:  - (no successful requests)")
+    print(f"Status:      {summary['status_codes']}")
+    if summary["errors"]:
+        print(f"Errors:      {summary['errors']}")
+    # A large lag means the generator itself fell behind the target rate.
+    print(f"Max send lag: {summary['max_lag_ms']:.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test the /query endpoint")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--qps", type=float, help="open-loop arrival rate")
+    mode.add_argument("--concurrency", type=int, help="closed-loop in-flight requests")
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--max-in-flight", type=int, default=1000)
+    parser.add_argument("--queries-file", help="JSONL with a 'query' or 'title' per line")
+    parser.add_argument("--synthetic-queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--include-timings", action="store_true")
+    parser.add_argument("--output", help="write per-request records and summary as JSON")
+    args = parser.parse_args()
+
+    if args.qps is not None and args.qps <= 0:
+        parser.error("--qps must be greater than 0")
+    if args.concurrency is not None and args.concurrency <= 0:
+        parser.error("--concurrency must be greater than 0")
+
+    queries = load_queries(args.queries_file, args.synthetic_queries, seed=args.seed)
+    test = LoadTest(
+        args.url,
+        queries,
+        timeout=args.timeout,
+        include_timings=args.include_timings,
+    )
+
+    if args.qps is not None:
+        print(f"Open loop at {args.qps} req/s for {args.duration}s against {test.url}")
+        wall = asyncio.run(test.run_open_loop(
+            args.qps, args.duration, args.max_in_flight, seed=args.seed
+        ))
+    else:
+        print(f"Closed loop with {args.concurrency} in flight for {args.duration}s against {test.url}")
+        wall = asyncio.run(test.run_closed_loop(args.concurrency, args.duration))
+
+    summary = summarize(test.results, wall)
+    print_summary(summary)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"summary": summary, "requests": test.results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+Recall vs memory of the quantized flat dense index.
+
+Builds a FlatDenseIndex in each dtype from the embeddings stored in the
+live index and compares it with the full-precision (float32) one on the
+EVALUATION_DATASET queries:
+
+* neighbour recall: share of the float32 top-k dense neighbours returned
+* Recall@k, Precision@k and MRR (RAGEvaluator) of hybrid retrieval
+* bytes every search reads, the index's on-disk size (including the
+  float32 copy the compact dtypes keep for rescoring) and the total with
+  the Chroma store, which stays next to it
+* mean dense search latency
+
+The compact dtypes are reported at each --rescore-factors value; a factor
+of 1 only reorders the compact top-k, larger ones rescore more candidates.
+The service uses the factor set in DENSE_RESCORE_FACTOR.
+The Chroma backend is included as a reference row.
+
+    python evaluation/quantization_report.py --k 5 --output quantization.json
+"""
+
+from typing import Dict, List, Sequence
+from statistics import mean
+import argparse
+import json
+import time
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+
+from src.dense_index import FlatDenseIndex, stored_embeddings
+from src.evaluation_metrics import RAGEvaluator
+from src.rag_pipeline import RAGPipeline
+from src.retrieval import HybridRetriever
+from evaluation.eval_dataset import EVALUATION_DATASET
+
+
+def neighbour_recall(reference: np.ndarray, found: np.ndarray) -> float:
+    if len(reference) == 0:
+        return 1.0
+    return len(set(reference.tolist()) & set(found.tolist())) / len(reference)
+
+
+def directory_bytes(directory: str, exclude: Sequence[str] = ()) -> int:
+    total = 0
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = [d for d in dirs if d not in exclude]
+        total += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+    return total
+
+
+def evaluate_retrieval(retriever: HybridRetriever, k: int) -> Dict[str, float]:
+    recall_scores = []
+    precision_scores = []
+    mrr_scores = []
+
+    for item in EVALUATION_DATASET:
+        retrieved = retriever.retrieve(item["query"], k=k)
+        relevant_uids = item["relevant_uids"]
+
+        recall_scores.append(RAGEvaluator.calculate_recall_at_k(
+            retrieved_docs=retrieved, relevant_doc_uids=relevant_uids, k=k
+        ))
+        precision_scores.append(RAGEvaluator.calculate_precision_at_k(
+            retrieved_docs=retrieved, relevant_doc_uids=relevant_uids, k=k
+        ))
+        mrr_scores.append(RAGEvaluator.calculate_mrr(
+            retrieved_docs=retrieved, relevant_doc_uids=relevant_uids
+        ))
+
+    return {
+        "recall": mean(recall_scores),
+        "precision": mean(precision_scores),
+        "mrr": mean(mrr_scores),
+    }
+
+
+def run_report(
+    data_path: str,
+    persist_dir: str,
+    k: int,
+    dtypes: Sequence[str],
+    rescore_factors: Sequence[int],
+) -> Dict:
+    pipeline = RAGPipeline(
+        data_paths=[data_path],
+        persist_dir=persist_dir,
+        enable_rerank=False,
+        enable_compression=False,
+        top_k=k,
+        verbose=False,
+    )
+    pipeline.build_index(rebuild=False)
+
+    vector_db, chunks = pipeline.vector_db, pipeline.chunks
+    # The Chroma store (plus the small snapshot and manifest); the BM25 and
+    # flat indexes live in subdirectories.
+    chroma_bytes = directory_bytes(
+        pipeline.versions.current_dir(),
+        exclude=("bm25_index", "dense_index", pipeline.versions.VERSIONS_DIR),
+    )
+    embeddings = stored_embeddings(vector_db, chunks)
+
+    queries = [item["query"] for item in EVALUATION_DATASET]
+    query_vectors = np.asarray(
+        vector_db.embeddings.embed_documents(queries), dtype=np.float32
+    )
+
+    reference = FlatDenseIndex.build(embeddings, "float32")
+    reference_hits = reference.search_many(query_vectors, k)
+
+    # One retriever (and BM25 index) for every row; only its dense index is
+    # swapped. dense=None is the Chroma backend.
+    retriever = HybridRetriever(vector_db, chunks)
+
+    mb = 1024 * 1024
+    rows: List[Dict] = [{
+        "dtype": "chroma",
+        "rescore_factor": None,
+        "disk_mb": chroma_bytes / mb,
+        "total_mb": chroma_bytes / mb,
+        **evaluate_retrieval(retriever, k),
+    }]
+
+    for dtype in dtypes:
+        factors = rescore_factors if dtype != "float32" else [1]
+        for factor in factors:
+            print(f"[QUANT] {dtype} (rescore x{factor})...")
+            index = FlatDenseIndex.build(embeddings, dtype, rescore_factor=factor)
+
+            latencies = []
+            recalls = []
+            for query_vector, (reference_ids, _) in zip(query_vectors, reference_hits):
+                start = time.perf_counter()
+                found, _ = index.search_many(query_vector[None, :], k)[0]
+                latencies.append(time.perf_counter() - start)
+                recalls.append(neighbour_recall(reference_ids, found))
+
+            retriever.dense = index
+            rows.append({
+                "dtype": dtype,
+                "rescore_factor": factor if dtype != "float32" else None,
+                "search_mb": index.nbytes / mb,
+                "memory_ratio": index.nbytes / reference.nbytes if reference.nbytes else 1.0,
+                "disk_mb": index.disk_nbytes / mb,
+                "total_mb": (index.disk_nbytes + chroma_bytes) / mb,
+                "neighbour_recall": mean(recalls) if recalls else 1.0,
+                "search_ms": 1000.0 * mean(latencies) if latencies else 0.0,
+                **evaluate_retrieval(retriever, k),
+            })
+
+    return {
+        "meta": {
+            "chunks": len(chunks),
+            "dim": reference.dim,
+            "queries": len(queries),
+            "k": k,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "rows": rows,
+    }
+
+
+def print_report(report: Dict) -> None:
+    meta = report["meta"]
+    k = meta["k"]
+
+    print(f"\n===== QUANTIZATION REPORT ({meta['chunks']} chunks, dim {meta['dim']}) =====")
+    print(
+        f"{'dtype':8s} {'rescore':>7s} {'read MB':>8s} {'ratio':>6s} "
+        f"{'disk MB':>8s} {'total MB':>8s} {'nbr@' + str(k):>7s} "
+        f"{'R@' + str(k):>6s} {'P@' + str(k):>6s} {'MRR':>6s} {'ms':>7s}"
+    )
+
+    for row in report["rows"]:
+        rescore = f"x{row['rescore_factor']}" if row["rescore_factor"] else "-"
+        footprint = f"{row['disk_mb']:8.2f} {row['total_mb']:8.2f}"
+        if row["dtype"] == "chroma":
+            size = f"{'-':>8s} {'-':>6s} {footprint} {'-':>7s}"
+            latency = f"{'-':>7s}"
+        else:
+            size = (
+                f"{row['search_mb']:8.2f} {row['memory_ratio']:6.2f} {footprint} "
+                f"{row['neighbour_recall']:7.3f}"
+            )
+            latency = f"{row['search_ms']:7.3f}"
+
+        print(
+            f"{row['dtype']:8s} {rescore:>7s} {size} {row['recall']:6.3f} "
+            f"{row['precision']:6.3f} {row['mrr']:6.3f} {latency}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Quantized dense index recall vs memory")
+    parser.add_argument("--data-path", default="./data")
+    parser.add_argument("--persist-dir", default="./chroma_db")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--dtypes", default=",".join(FlatDenseIndex.DTYPES))
+    parser.add_argument("--rescore-factors", default="1,4")
+    parser.add_argument("--output", help="write the report as JSON")
+    args = parser.parse_args()
+
+    report = run_report(
+        data_path=args.data_path,
+        persist_dir=args.persist_dir,
+        k=args.k,
+        dtypes=[d.strip() for d in args.dtypes.split(",") if d.strip()],
+        rescore_factors=[int(f) for f in args.rescore_factors.split(",") if f.strip()],
+    )
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
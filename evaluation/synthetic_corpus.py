@@ -0,0 +1,141 @@
+"""
+Deterministic synthetic policy-style corpora for benchmarks.
+
+Word frequencies follow a Zipf-like distribution over a fixed vocabulary
+so BM25 posting lists have a realistic shape. Everything is seeded: the
+same size and seed always produce the same documents and queries.
+"""
+
+from typing import List, Optional
+from itertools import accumulate
+from pathlib import Path
+import random
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from langchain_core.documents import Document
+
+
+# Number of pages per corpus size.
+SIZES = {
+    "small": 200,
+    "medium": 2_000,
+    "large": 20_000,
+}
+
+PAGES_PER_FILE = 20
+
+DOMAINS = ["hr policy", "finance policy", "it policy", "travel policy"]
+
+TOPIC_WORDS = [
+    "leave", "probation", "employee", "manager", "approval", "expense",
+    "reimbursement", "travel", "advance", "security", "password", "device",
+    "network", "access", "notice", "resignation", "overtime", "salary",
+    "allowance", "claim", "receipt", "policy", "violation", "disciplinary",
+    "confidential", "data", "backup", "incident", "training", "attendance",
+    "holiday", "medical", "insurance", "gratuity", "bonus", "appraisal",
+    "promotion", "transfer", "grievance", "harassment", "vendor", "invoice",
+    "budget", "audit", "compliance", "laptop", "email", "vpn", "firewall",
+]
+
+FILLER_WORDS = [
+    "the", "of", "and", "to", "a", "in", "is", "for", "be", "shall", "by",
+    "on", "with", "as", "any", "all", "or", "an", "this", "must", "will",
+    "within", "days", "per", "under", "such", "each", "from", "at", "may",
+]
+
+QUERY_TEMPLATES = [
+    "What is the {a} policy for {b}?",
+    "How does the {a} {b} process work?",
+    "Who approves {a} for {b}?",
+    "What happens if an employee violates the {a} {b} rules?",
+    "Is {a} allowed during {b}?",
+]
+
+
+def _vocabulary(extra_terms: int, rng: random.Random) -> List[str]:
+    # Rare synthetic terms give the tail of the distribution.
+    rare = [
+        "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(5, 10)))
+        for _ in range(extra_terms)
+    ]
+    return TOPIC_WORDS + rare
+
+
+def _zipf_weights(n: int, s: float = 1.1) -> List[float]:
+    return [1.0 / (rank ** s) for rank in range(1, n + 1)]
+
+
+def generate_documents(
+    num_pages: int,
+    words_per_page: int = 180,
+    seed: int = 0,
+) -> List[Document]:
+    """Returns num_pages page-level Documents grouped into synthetic files."""
+    rng = random.Random(seed)
+    vocabulary = _vocabulary(5_000, rng)
+    cum_weights = list(accumulate(_zipf_weights(len(vocabulary))))
+
+    documents = []
+    for i in range(num_pages):
+        file_index, page = divmod(i, PAGES_PER_FILE)
+        domain = DOMAINS[file_index % len(DOMAINS)]
+
+        content = rng.choices(vocabulary, cum_weights=cum_weights, k=words_per_page)
+        words = [
+            rng.choice(FILLER_WORDS) if rng.random() < 0.45 else word
+            for word in content
+        ]
+
+        # Sentence breaks so the recursive splitter has separators to use.
+        sentences = [
+            " ".join(words[j:j + 15]).capitalize() + "."
+            for j in range(0, len(words), 15)
+        ]
+
+        documents.append(Document(
+            page_content=" ".join(sentences),
+            metadata={
+                "source": f"synthetic/{domain}/doc_{file_index:05d}.txt",
+                "filename": f"doc_{file_index:05d}.txt",
+                "page": page,
+                "domain": domain,
+            },
+        ))
+
+    return documents
+
+
+def generate_queries(num_queries: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed + 1)
+    return [
+        rng.choice(QUERY_TEMPLATES).format(
+            a=rng.choice(TOPIC_WORDS),
+            b=rng.choice(TOPIC_WORDS),
+        )
+        for _ in range(num_queries)
+    ]
+
+
+def write_corpus(
+    directory: str,
+    num_pages: int,
+    seed: int = 0,
+    documents: Optional[List[Document]] = None,
+) -> List[str]:
+    """Writes the corpus as .txt files (one per synthetic file) for ingestion."""
+    documents = documents or generate_documents(num_pages, seed=seed)
+    pages_by_file = {}
+    for doc in documents:
+        pages_by_file.setdefault(doc.metadata["source"], []).append(doc.page_content)
+
+    paths = []
+    for source, pages in pages_by_file.items():
+        path = Path(directory) / source
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("\n\n".join(pages), encoding="utf-8")
+        paths.append(str(path))
+
+    return paths
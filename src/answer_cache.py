@@ -0,0 +1,118 @@
+from typing import Dict, List, Optional
+import threading
+import numpy as np
+
+from src.metrics import CACHES
+
+
+class SemanticAnswerCache:
+    """
+    Caches final answers keyed by query embedding.
+
+    A lookup returns a stored answer when a previous query's embedding has
+    cosine similarity >= threshold with the new one. Entries are tagged with
+    the index version they were answered against; a different version clears
+    the cache. Least recently used entries are evicted past max_size.
+    """
+
+    def __init__(self, threshold: float = 0.95, max_size: int = 256):
+        self.threshold = threshold
+        self.max_size = max_size
+
+        self.index_version: Optional[str] = None
+        self._vectors: Optional[np.ndarray] = None
+        self._entries: List[Dict] = []
+        self._last_used = np.zeros(max_size, dtype=np.int64)
+        self._clock = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        CACHES.track("answers", self.stats)
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _check_version(self, index_version: str) -> None:
+        if index_version != self.index_version:
+            self._vectors = None
+            self._entries = []
+            self.index_version = index_version
+
+    def lookup(self, query_vector, index_version: str) -> Optional[Dict]:
+        with self._lock:
+            self._check_version(index_version)
+
+            if not self._entries:
+                self.misses += 1
+                return None
+
+            query = self._normalize(query_vector)
+            similarities = self._vectors[:len(self._entries)] @ query
+            best = int(np.argmax(similarities))
+
+            if similarities[best] < self.threshold:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._clock += 1
+            self._last_used[best] = self._clock
+
+            entry = dict(self._entries[best])
+            entry["similarity"] = float(similarities[best])
+            return entry
+
+    def store(
+        self,
+        query: str,
+        query_vector,
+        answer: str,
+        chunk_ids: List[str],
+        index_version: str,
+    ) -> None:
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            self._check_version(index_version)
+
+            vector = self._normalize(query_vector)
+            if self._vectors is None:
+                self._vectors = np.zeros(
+                    (self.max_size, len(vector)), dtype=np.float32
+                )
+
+            if len(self._entries) < self.max_size:
+                slot = len(self._entries)
+                self._entries.append({})
+            else:
+                slot = int(np.argmin(self._last_used))
+
+            self._vectors[slot] = vector
+            self._entries[slot] = {
+                "query": query,
+                "answer": answer,
+                "chunk_ids": list(chunk_ids),
+            }
+            self._clock += 1
+            self._last_used[slot] = self._clock
+
+    def clear(self) -> None:
+        with self._lock:
+            self._vectors = None
+            self._entries = []
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
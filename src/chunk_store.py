@@ -0,0 +1,91 @@
+from langchain_core.documents import Document
+from typing import Dict, List, Optional
+import hashlib
+import numpy as np
+
+
+class ChunkStore:
+    """
+    Parallel arrays over the chunks of one index version, built once so
+    the query path works on integer positions instead of re-hashing text.
+
+    For chunk i: chunk_ids[i] is its deterministic chunk ID,
+    content_hashes[i] the MD5 of its text, sources[i] / pages[i] its
+    origin and offsets[i] its character offset in the source page (-1 when
+    the splitter did not record one). canonical[i] is the first position
+    with the same (source, page, content), so identical chunks fuse and
+    dedupe as one.
+    """
+
+    __slots__ = (
+        "documents",
+        "chunk_ids",
+        "content_hashes",
+        "sources",
+        "pages",
+        "offsets",
+        "canonical",
+        "_by_chunk_id",
+        "_by_uid",
+    )
+
+    def __init__(self, documents: List[Document]):
+        self.documents = documents
+
+        self.chunk_ids: List[str] = []
+        self.content_hashes: List[str] = []
+        self.sources: List[str] = []
+        self.pages: List = []
+        self.offsets = np.full(len(documents), -1, dtype=np.int64)
+        self.canonical = np.arange(len(documents), dtype=np.int64)
+
+        self._by_chunk_id: Dict[str, int] = {}
+        self._by_uid: Dict[str, int] = {}
+
+        for i, doc in enumerate(documents):
+            content_hash = self.content_hash_of(doc)
+
+            self.content_hashes.append(content_hash)
+            self.chunk_ids.append(doc.metadata.get("chunk_id") or content_hash)
+            self.sources.append(doc.metadata.get("source", "unknown"))
+            self.pages.append(doc.metadata.get("page", "na"))
+
+            offset = doc.metadata.get("start_index")
+            if offset is not None:
+                self.offsets[i] = offset
+
+            self._by_chunk_id.setdefault(self.chunk_ids[i], i)
+            self.canonical[i] = self._by_uid.setdefault(self.uid(i), i)
+
+    @staticmethod
+    def content_hash(text: str) -> str:
+        return hashlib.md5(text.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def content_hash_of(cls, doc: Document) -> str:
+        """The precomputed hash from metadata, else hashes the text."""
+        return doc.metadata.get("content_hash") or cls.content_hash(doc.page_content)
+
+    @classmethod
+    def doc_uid(cls, doc: Document) -> str:
+        src = doc.metadata.get("source", "unknown")
+        page = doc.metadata.get("page", "na")
+        return f"{src}::page={page}::hash={cls.content_hash_of(doc)}"
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def uid(self, i: int) -> str:
+        return f"{self.sources[i]}::page={self.pages[i]}::hash={self.content_hashes[i]}"
+
+    def position(self, doc: Document) -> Optional[int]:
+        """Canonical position of a document returned by the vector store."""
+        chunk_id = doc.metadata.get("chunk_id")
+        i = self._by_chunk_id.get(chunk_id) if chunk_id else None
+
+        if i is None:
+            i = self._by_uid.get(self.doc_uid(doc))
+        if i is None:
+            return None
+
+        return int(self.canonical[i])
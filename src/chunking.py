@@ -1,10 +1,11 @@
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 from sentence_transformers import SentenceTransformer
-from typing import List
+from typing import List,Dict
 import numpy as np
 import re 
 import copy
+import hashlib
 
 
 class Chunking:
@@ -21,12 +22,43 @@ class Chunking:
             chunk_size=chunk_size,
             chunk_overlap=chunk_overlap,
             length_function=len,
+            add_start_index=True,
             separators=["\n\n","\n",".","!",",","?"," ",""]
         )
         
         return splitter.split_documents(documents)
     
     
+    @staticmethod
+    def chunk_id(doc:Document)->str:
+        
+        src=doc.metadata.get("source","unknown")
+        page=doc.metadata.get("page","na")
+        key=f"{src}::page={page}::{doc.page_content}"
+        return hashlib.md5(key.encode("utf-8")).hexdigest()
+    
+    
+    @classmethod
+    def assign_chunk_ids(cls,chunks:List[Document])->List[Document]:
+        """
+        Stamps a deterministic chunk_id and the MD5 content_hash on every
+        chunk. Identical chunks on the same page get an ordinal suffix so
+        IDs stay unique.
+        """
+        seen:Dict[str,int]={}
+        
+        for doc in chunks:
+            base=cls.chunk_id(doc)
+            count=seen.get(base,0)
+            seen[base]=count+1
+            doc.metadata["chunk_id"]=base if count==0 else f"{base}-{count}"
+            doc.metadata["content_hash"]=hashlib.md5(
+                doc.page_content.encode("utf-8")
+            ).hexdigest()
+            
+        return chunks
+    
+    
 
 @staticmethod
 def semantic_chunking(
@@ -1,8 +1,12 @@
 from langchain_core.documents import Document
-from typing import List
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import List, Optional
+import asyncio
+import contextvars
 import copy
 
 from src.llm_client import LocalLLM
+from src.metrics import timed
 
 
 class ContextCompressor:
@@ -11,9 +15,32 @@ class ContextCompressor:
     Extracts only the most relevant sentences for a query.
     """
 
-    def __init__(self, llm: LocalLLM, max_chars: int = 1500):
+    def __init__(
+        self,
+        llm: LocalLLM,
+        max_chars: int = 1500,
+        max_workers: int = 5,
+        deadline: Optional[float] = None,
+    ):
         self.llm = llm
         self.max_chars = max_chars
+        self.deadline = deadline
+        # Shared across requests, so max_workers also caps the number of
+        # compression calls in flight process-wide.
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="compress",
+        )
+        self._async_semaphore: Optional[asyncio.Semaphore] = None
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _async_limit(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._async_semaphore is None or self._async_loop is not loop:
+            self._async_semaphore = asyncio.Semaphore(self.max_workers)
+            self._async_loop = loop
+        return self._async_semaphore
 
     @staticmethod
     def _extract_text(text: str) -> str:
@@ -21,6 +48,73 @@ class ContextCompressor:
             return ""
         return str(text).strip()
 
+    def _build_prompt(self, query: str, text: str) -> str:
+        return f"""
+Extract only the sentences that directly answer or are relevant to the question below.
+If no sentence is relevant, output exactly: None.
+Do not add explanations or extra text.
+
+Question:
+{query}
+
+Document:
+{text[:self.max_chars]}
+
+Relevant sentences:
+""".strip()
+
+    def _to_document(self, response: str, doc: Document) -> Optional[Document]:
+        relevant_text = self._extract_text(response)
+
+        if not relevant_text:
+            return None
+
+        clean = relevant_text.strip().lower()
+
+        if clean.startswith("none"):
+            return None
+
+        return Document(
+            page_content=relevant_text,
+            metadata=copy.deepcopy(doc.metadata),
+        )
+
+    @staticmethod
+    def _raw_document(doc: Document) -> Document:
+        return Document(
+            page_content=doc.page_content.strip(),
+            metadata=copy.deepcopy(doc.metadata),
+        )
+
+    def _compress_one(self, query: str, doc: Document) -> Optional[Document]:
+        """
+        Returns the compressed document, None when the LLM finds nothing
+        relevant, or the raw text if the LLM call fails.
+        """
+        prompt = self._build_prompt(query, doc.page_content.strip())
+
+        try:
+            with timed("compress_call"):
+                response = self.llm.generate(prompt)
+            return self._to_document(response, doc)
+        except Exception:
+            return self._raw_document(doc)
+
+    async def _acompress_one(
+        self,
+        query: str,
+        doc: Document,
+    ) -> Optional[Document]:
+        prompt = self._build_prompt(query, doc.page_content.strip())
+
+        async with self._async_limit():
+            try:
+                with timed("compress_call"):
+                    response = await self.llm.agenerate(prompt)
+                return self._to_document(response, doc)
+            except Exception:
+                return self._raw_document(doc)
+
     def compress_documents(
         self,
         query: str,
@@ -34,53 +128,78 @@ class ContextCompressor:
         if not documents:
             return []
 
+        candidates = [
+            doc for doc in documents[:max_docs] if doc.page_content.strip()
+        ]
+
+        # Run each call in a copy of the caller's context so its timing is
+        # attributed to the request.
+        futures = [
+            self._executor.submit(
+                contextvars.copy_context().run, self._compress_one, query, doc
+            )
+            for doc in candidates
+        ]
+        done, _ = wait(futures, timeout=self.deadline)
+
         compressed: List[Document] = []
 
-        for doc in documents[:max_docs]:
-            text = doc.page_content.strip()
-            if not text:
+        # Keep the reranked order; anything past the deadline falls back to
+        # its raw text.
+        for doc, future in zip(candidates, futures):
+            if future in done:
+                result = future.result()
+                if result is not None:
+                    compressed.append(result)
                 continue
 
-            prompt = f"""
-Extract only the sentences that directly answer or are relevant to the question below.
-If no sentence is relevant, output exactly: None.
-Do not add explanations or extra text.
+            future.cancel()
+            compressed.append(self._raw_document(doc))
 
-Question:
-{query}
+        if not compressed:
+            return documents[:max_docs]
 
-Document:
-{text[:self.max_chars]}
+        return compressed
 
-Relevant sentences:
-""".strip()
+    async def acompress_documents(
+        self,
+        query: str,
+        documents: List[Document],
+        max_docs: int = 5,
+    ) -> List[Document]:
+        """
+        Async variant of compress_documents: the per-document calls are
+        awaited concurrently (at most max_workers at a time) under the same
+        deadline and raw-text fallback.
+        """
+        if not query or not query.strip():
+            return []
 
-            try:
-                response = self.llm.generate(prompt)
-                relevant_text = self._extract_text(response)
+        if not documents:
+            return []
 
-                if not relevant_text:
-                    continue
+        candidates = [
+            doc for doc in documents[:max_docs] if doc.page_content.strip()
+        ]
 
-                clean = relevant_text.strip().lower()
+        tasks = [
+            asyncio.ensure_future(self._acompress_one(query, doc))
+            for doc in candidates
+        ]
+        if tasks:
+            await asyncio.wait(tasks, timeout=self.deadline)
 
-                if clean.startswith("none"):
-                    continue
+        compressed: List[Document] = []
 
-                compressed.append(
-                    Document(
-                        page_content=relevant_text,
-                        metadata=copy.deepcopy(doc.metadata),
-                    )
-                )
+        for doc, task in zip(candidates, tasks):
+            if task.done():
+                result = task.result()
+                if result is not None:
+                    compressed.append(result)
+                continue
 
-            except Exception:
-                compressed.append(
-                    Document(
-                        page_content=text,
-                        metadata=copy.deepcopy(doc.metadata),
-                    )
-                )
+            task.cancel()
+            compressed.append(self._raw_document(doc))
 
         if not compressed:
             return documents[:max_docs]
@@ -0,0 +1,358 @@
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional, Tuple
+import json
+import os
+import numpy as np
+
+if TYPE_CHECKING:
+    from langchain_core.documents import Document
+
+
+class FlatDenseIndex:
+    """
+    Brute-force nearest-neighbour search over normalized chunk embeddings
+    held in one contiguous matrix.
+
+    A batch of queries is answered with a single matmul followed by
+    argpartition. Distances are squared L2, the metric the Chroma
+    collection uses, so the retriever's 1/(1+d) scoring is unchanged.
+
+    dtype sets how the searched matrix is stored:
+
+        float32   exact search
+        float16   half the memory
+        int8      a quarter, with one scale per dimension
+
+    For the compact dtypes the float32 matrix is kept too, memory-mapped
+    and read only to rescore: the rescore_factor * k nearest candidates on
+    the compact vectors are re-ranked by their exact float32 distance.
+
+    Like BM25Index, the index is saved as .npy arrays plus JSON metadata
+    tagged with a fingerprint, and reopened memory-mapped.
+    """
+
+    VERSION = 2
+    META_FILE = "meta.json"
+    DTYPES = ("float32", "float16", "int8")
+
+    # Rows converted to float32 at a time for the compact dtypes, so a
+    # search never materializes a full-precision copy of the matrix.
+    BLOCK_ROWS = 65536
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        sq_norms: np.ndarray,
+        scales: Optional[np.ndarray] = None,
+        full: Optional[np.ndarray] = None,
+        rescore_factor: int = 4,
+    ):
+        self.vectors = vectors
+        self.sq_norms = sq_norms
+        self.scales = scales
+        self.full = full
+        self.rescore_factor = rescore_factor
+
+        self.num_vectors = vectors.shape[0]
+        self.dim = vectors.shape[1] if vectors.ndim == 2 else 0
+        self.dtype = vectors.dtype.name
+
+    @staticmethod
+    def array_names(dtype: str) -> List[str]:
+        names = ["vectors", "sq_norms"]
+        if dtype == "int8":
+            names.append("scales")
+        if dtype != "float32":
+            names.append("full")
+        return names
+
+    @classmethod
+    def build(
+        cls,
+        embeddings,
+        dtype: str = "float32",
+        rescore_factor: int = 4,
+    ) -> "FlatDenseIndex":
+        if dtype not in cls.DTYPES:
+            raise ValueError(f"Unknown dense index dtype: {dtype}")
+
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        if matrix.ndim != 2:
+            matrix = (
+                matrix.reshape(len(matrix), -1) if len(matrix)
+                else np.zeros((0, 0), dtype=np.float32)
+            )
+        matrix = np.ascontiguousarray(matrix)
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+
+        scales = None
+        if dtype == "int8":
+            # Symmetric quantization: the largest magnitude seen in each
+            # dimension maps to 127.
+            scales = (
+                np.abs(matrix).max(axis=0) / 127.0 if len(matrix)
+                else np.ones(matrix.shape[1])
+            ).astype(np.float32)
+            scales[scales == 0] = 1.0
+            vectors = np.rint(matrix / scales).astype(np.int8)
+        else:
+            vectors = matrix.astype(dtype)
+
+        # Norms of the decoded rows, so candidate distances are consistent
+        # with the vectors that are actually searched.
+        decoded = cls._decode(vectors, scales)
+        sq_norms = np.einsum("ij,ij->i", decoded, decoded)
+
+        return cls(
+            vectors,
+            sq_norms,
+            scales=scales,
+            full=matrix if dtype != "float32" else None,
+            rescore_factor=rescore_factor,
+        )
+
+    def update(
+        self,
+        keep: np.ndarray,
+        embeddings,
+        dtype: Optional[str] = None,
+        rescore_factor: Optional[int] = None,
+    ) -> "FlatDenseIndex":
+        """
+        New index over the kept rows, in order, followed by embeddings.
+        Kept rows are taken from this index's float32 matrix (the rescoring
+        copy for the compact dtypes), so only the new vectors have to be
+        read from the vector store.
+        """
+        source = self.full if self.full is not None else self.vectors
+        kept = np.asarray(source[np.flatnonzero(keep)], dtype=np.float32)
+        added = np.asarray(embeddings, dtype=np.float32)
+
+        if not len(added):
+            matrix = kept
+        elif not len(kept):
+            matrix = added
+        else:
+            matrix = np.concatenate([kept, added.reshape(len(added), -1)])
+
+        return self.build(
+            matrix,
+            dtype or self.dtype,
+            rescore_factor=(
+                self.rescore_factor if rescore_factor is None else rescore_factor
+            ),
+        )
+
+    @staticmethod
+    def _decode(block: np.ndarray, scales: Optional[np.ndarray]) -> np.ndarray:
+        block = np.asarray(block, dtype=np.float32)
+        return block * scales if scales is not None else block
+
+    def __len__(self) -> int:
+        return self.num_vectors
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes every search reads: the searched matrix, norms and scales."""
+        return sum(
+            getattr(self, name).nbytes
+            for name in self.array_names(self.dtype) if name != "full"
+        )
+
+    @property
+    def disk_nbytes(self) -> int:
+        """Bytes saved to disk, including the float32 copy kept to rescore."""
+        return sum(
+            getattr(self, name).nbytes for name in self.array_names(self.dtype)
+        )
+
+    def _dot(self, queries: np.ndarray) -> np.ndarray:
+        if self.vectors.dtype == np.float32:
+            return queries @ self.vectors.T
+
+        # (q * s) . c == q . (c * s), so int8 codes are never decoded.
+        if self.scales is not None:
+            queries = queries * self.scales
+
+        dots = np.empty((len(queries), self.num_vectors), dtype=np.float32)
+        for start in range(0, self.num_vectors, self.BLOCK_ROWS):
+            block = np.asarray(
+                self.vectors[start:start + self.BLOCK_ROWS],
+                dtype=np.float32,
+            )
+            dots[:, start:start + len(block)] = queries @ block.T
+        return dots
+
+    @staticmethod
+    def _as_queries(query_vectors) -> np.ndarray:
+        queries = np.asarray(query_vectors, dtype=np.float32)
+        return queries[None, :] if queries.ndim == 1 else queries
+
+    def distances(self, query_vectors) -> np.ndarray:
+        """
+        Squared L2 distance from every query (rows) to every searched
+        vector; approximate for the compact dtypes.
+        """
+        queries = self._as_queries(query_vectors)
+
+        q_norms = np.einsum("ij,ij->i", queries, queries)
+        dist = q_norms[:, None] + self.sq_norms[None, :] - 2.0 * self._dot(queries)
+        return np.maximum(dist, 0.0, out=dist)
+
+    @staticmethod
+    def _smallest(dist: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        if len(dist) > k:
+            part = np.argpartition(dist, k - 1)[:k]
+            # Same boundary-tie handling as BM25Index.top_k.
+            kth = dist[part].max()
+            part = np.flatnonzero(dist <= kth)
+        else:
+            part = np.arange(len(dist))
+
+        order = np.lexsort((part, dist[part]))[:k]
+        top = part[order]
+        return top, dist[top]
+
+    def _rescore(
+        self,
+        query: np.ndarray,
+        candidates: np.ndarray,
+        k: int,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        # Sorted positions read the memory-mapped matrix front to back, and
+        # keep ties broken by position.
+        candidates = np.sort(candidates)
+        diff = np.asarray(self.full[candidates], dtype=np.float32) - query
+        top, dist = self._smallest(np.einsum("ij,ij->i", diff, diff), k)
+        return candidates[top], dist
+
+    def search_many(
+        self,
+        query_vectors,
+        k: int,
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Returns (positions, distances) per query, nearest first, ties broken
+        by position. With a compact dtype the distances are the exact
+        float32 ones of the rescored candidates.
+        """
+        queries = self._as_queries(query_vectors)
+
+        k = min(k, self.num_vectors)
+        if k <= 0:
+            empty = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32))
+            return [empty for _ in range(len(queries))]
+
+        dist = self.distances(queries)
+        if self.full is None:
+            return [self._smallest(row, k) for row in dist]
+
+        num_candidates = min(k * max(self.rescore_factor, 1), self.num_vectors)
+        return [
+            self._rescore(query, self._smallest(row, num_candidates)[0], k)
+            for query, row in zip(queries, dist)
+        ]
+
+    def save(self, directory: str, fingerprint: str) -> None:
+        path = Path(directory)
+        os.makedirs(path, exist_ok=True)
+
+        # Drop the metadata first so a half-written index is never loaded.
+        meta_path = path / self.META_FILE
+        if meta_path.exists():
+            meta_path.unlink()
+
+        for name in self.array_names(self.dtype):
+            tmp_path = path / f"{name}.tmp.npy"
+            np.save(tmp_path, getattr(self, name))
+            os.replace(tmp_path, path / f"{name}.npy")
+
+        tmp_path = meta_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": self.VERSION,
+                "fingerprint": fingerprint,
+                "dtype": self.dtype,
+                "num_vectors": self.num_vectors,
+                "dim": self.dim,
+            }, f)
+        os.replace(tmp_path, meta_path)
+
+    @classmethod
+    def load(
+        cls,
+        directory: str,
+        fingerprint: Optional[str] = None,
+        rescore_factor: int = 4,
+    ) -> Optional["FlatDenseIndex"]:
+        """
+        Opens a saved index with its arrays memory-mapped. Returns None if it
+        is missing, from another format version, or built from a different
+        chunk list than fingerprint.
+        """
+        path = Path(directory)
+        meta_path = path / cls.META_FILE
+        if not meta_path.exists():
+            return None
+
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+
+            if meta.get("version") != cls.VERSION:
+                return None
+            if fingerprint is not None and meta.get("fingerprint") != fingerprint:
+                return None
+
+            arrays = {
+                name: np.load(path / f"{name}.npy", mmap_mode="r")
+                for name in cls.array_names(meta["dtype"])
+            }
+        except (OSError, ValueError) as e:
+            print(f"[DENSE] Ignoring unreadable index {path} → {e}")
+            return None
+
+        vectors = arrays["vectors"]
+        if (
+            vectors.dtype.name != meta["dtype"]
+            or len(vectors) != meta["num_vectors"]
+            or len(arrays["sq_norms"]) != meta["num_vectors"]
+            or len(arrays.get("full", vectors)) != meta["num_vectors"]
+        ):
+            return None
+
+        return cls(rescore_factor=rescore_factor, **arrays)
+
+
+def stored_embeddings(vectorstore, documents: List["Document"]) -> np.ndarray:
+    """
+    The embeddings of documents, in order, read back from the Chroma
+    collection by chunk ID. Documents without a chunk ID or missing from
+    the collection are embedded again.
+    """
+    ids = [doc.metadata.get("chunk_id") for doc in documents]
+    unique_ids = list(dict.fromkeys(i for i in ids if i))
+
+    found = {}
+    # Chroma binds every ID as an SQL parameter, so fetch in batches.
+    for start in range(0, len(unique_ids), 5000):
+        result = vectorstore._collection.get(
+            ids=unique_ids[start:start + 5000],
+            include=["embeddings"],
+        )
+        for chunk_id, vector in zip(result["ids"], result["embeddings"]):
+            found[chunk_id] = vector
+
+    rows = [found.get(chunk_id) for chunk_id in ids]
+    missing = [i for i, row in enumerate(rows) if row is None]
+    if missing:
+        print(f"[DENSE] Re-embedding {len(missing)} chunks missing from the vector store")
+        vectors = vectorstore.embeddings.embed_documents(
+            [documents[i].page_content for i in missing]
+        )
+        for i, vector in zip(missing, vectors):
+            rows[i] = vector
+
+    return np.asarray(rows, dtype=np.float32)
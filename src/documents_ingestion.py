@@ -5,11 +5,17 @@ from langchain_community.document_loaders import (
 )
 
 from langchain_core.documents import Document
-from typing import List
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+from collections import deque
+from itertools import islice
 from pathlib import Path
+import multiprocessing
 import re
+import signal
 
 class DataIngestion:
+
+    SUPPORTED_SUFFIXES = (".pdf", ".txt", ".html", ".htm", ".csv", ".docx")
     
     @staticmethod
     def load_pdf(file_path:str):
@@ -78,47 +84,213 @@ class DataIngestion:
     
 
     @classmethod
-    def ingest(cls, paths: List[str]) -> List[Document]:
-        all_docs: List[Document] = []
+    def list_files(cls, paths: List[str]) -> List[Path]:
+        files: List[Path] = []
 
         for base_path in paths:
             base = Path(base_path)
 
-            files = (
-                base.rglob("*") if base.is_dir() else [base]
+            candidates = (
+                sorted(base.rglob("*")) if base.is_dir() else [base]
             )
 
-            for file_path in files:
-                try:
-                    if file_path.is_dir():
-                        continue
-
-                    suffix = file_path.suffix.lower()
-
-                    if suffix == ".pdf":
-                        docs = cls.load_pdf(str(file_path))
-                    elif suffix == ".txt":
-                        docs = cls.load_text(str(file_path))
-                    elif suffix in [".html", ".htm"]:
-                        docs = cls.load_html(str(file_path))
-                    elif suffix == ".csv":
-                        docs = cls.load_csv(str(file_path))
-                    elif suffix == ".docx":
-                        docs = cls.load_docx(str(file_path))
-                    else:
-                        continue
-
-                    for doc in docs:
-                        doc.page_content = cls.preprocess_text(doc.page_content)
-                        doc = cls.normalize_metadata(doc)
-                        all_docs.append(doc)
+            for file_path in candidates:
+                if file_path.is_dir():
+                    continue
+                if file_path.suffix.lower() not in cls.SUPPORTED_SUFFIXES:
+                    continue
+                files.append(file_path)
 
-                except Exception as e:
-                    print(f"[SKIP] {file_path} → {e}")
+        return files
+
+    @classmethod
+    def load_file(cls, file_path: Path) -> List[Document]:
+        suffix = file_path.suffix.lower()
+
+        if suffix == ".pdf":
+            docs = cls.load_pdf(str(file_path))
+        elif suffix == ".txt":
+            docs = cls.load_text(str(file_path))
+        elif suffix in [".html", ".htm"]:
+            docs = cls.load_html(str(file_path))
+        elif suffix == ".csv":
+            docs = cls.load_csv(str(file_path))
+        elif suffix == ".docx":
+            docs = cls.load_docx(str(file_path))
+        else:
+            return []
+
+        for doc in docs:
+            doc.page_content = cls.preprocess_text(doc.page_content)
+            cls.normalize_metadata(doc)
+
+        return docs
+
+    @classmethod
+    def ingest(
+        cls,
+        paths: List[str],
+        workers: int = 1,
+        file_timeout: Optional[float] = None,
+    ) -> List[Document]:
+        docs, _ = cls.ingest_with_report(paths, workers, file_timeout)
+        return docs
 
+    @classmethod
+    def ingest_with_report(
+        cls,
+        paths: List[str],
+        workers: int = 1,
+        file_timeout: Optional[float] = None,
+    ) -> Tuple[List[Document], "IngestionReport"]:
+        """
+        Loads every supported file under paths. With workers > 1 (or a
+        file_timeout) files are parsed in a process pool; results are always
+        collected in list_files order so chunk IDs stay stable.
+        """
+        files = cls.list_files(paths)
+        report = IngestionReport(files_total=len(files))
+        all_docs: List[Document] = []
+
+        for file_path, docs, error in cls.iter_files(files, workers, file_timeout):
+            if error is not None:
+                print(f"[SKIP] {file_path} → {error}")
+                report.add_error(file_path, error)
+                continue
+
+            report.files_loaded += 1
+            all_docs.extend(docs)
+
+        report.documents = len(all_docs)
         print(f"[INGEST] Loaded documents: {len(all_docs)}")
 
         if not all_docs:
             raise RuntimeError("No documents loaded. Check PDF dependencies.")
 
-        return all_docs
+        return all_docs, report
+
+    @classmethod
+    def iter_files(
+        cls,
+        files: List[Path],
+        workers: int = 1,
+        file_timeout: Optional[float] = None,
+    ) -> Iterator[Tuple[Path, List[Document], Optional[BaseException]]]:
+        """
+        Yields (file_path, docs, error) per file, in the order given. Only a
+        bounded window of files is in flight at once, so callers can consume
+        documents as they are parsed.
+        """
+        if workers > 1 or file_timeout is not None:
+            yield from cls._load_parallel(files, workers, file_timeout)
+            return
+
+        for file_path in files:
+            docs, error = cls._load_safely(file_path)
+            yield file_path, docs, error
+
+    @classmethod
+    def _load_safely(
+        cls,
+        file_path: Path,
+    ) -> Tuple[List[Document], Optional[BaseException]]:
+        try:
+            return cls.load_file(file_path), None
+        except Exception as e:
+            return [], e
+
+    @staticmethod
+    def _load_parallel(
+        files: List[Path],
+        workers: int,
+        file_timeout: Optional[float],
+    ) -> Iterator[Tuple[Path, List[Document], Optional[BaseException]]]:
+
+        workers = max(1, min(workers, len(files) or 1))
+        window = 2 * workers
+        # The worker enforces file_timeout itself; the wait here is only a
+        # backstop for loaders stuck in native code.
+        backstop = None if file_timeout is None else 2 * file_timeout
+
+        # spawn, not fork: the serving process already runs threads and holds
+        # torch/chromadb state whose locks a forked child would inherit.
+        pool = multiprocessing.get_context("spawn").Pool(processes=workers)
+        pending: Deque = deque()
+        remaining = iter(files)
+
+        try:
+            for file_path in islice(remaining, window):
+                pending.append((file_path, pool.apply_async(
+                    _load_file_worker, (str(file_path), file_timeout)
+                )))
+
+            while pending:
+                file_path, result = pending.popleft()
+
+                try:
+                    yield file_path, result.get(timeout=backstop), None
+                except multiprocessing.TimeoutError:
+                    yield file_path, [], TimeoutError(
+                        f"timed out after {file_timeout}s"
+                    )
+                except Exception as e:
+                    yield file_path, [], e
+
+                for next_path in islice(remaining, 1):
+                    pending.append((next_path, pool.apply_async(
+                        _load_file_worker, (str(next_path), file_timeout)
+                    )))
+        finally:
+            pool.terminate()
+            pool.join()
+
+
+class IngestionReport:
+    """Structured summary of an ingestion run."""
+
+    def __init__(self, files_total: int = 0):
+        self.files_total = files_total
+        self.files_loaded = 0
+        self.documents = 0
+        self.errors: List[Dict[str, str]] = []
+
+    @property
+    def timed_out(self) -> List[str]:
+        return [e["file"] for e in self.errors if e["type"] == "TimeoutError"]
+
+    def add_error(self, file_path: Path, error: BaseException) -> None:
+        self.errors.append({
+            "file": str(file_path),
+            "type": type(error).__name__,
+            "error": str(error),
+        })
+
+    def to_dict(self) -> Dict:
+        return {
+            "files_total": self.files_total,
+            "files_loaded": self.files_loaded,
+            "documents": self.documents,
+            "errors": self.errors,
+        }
+
+
+def _raise_file_timeout(signum, frame):
+    raise TimeoutError("file load timed out")
+
+
+def _load_file_worker(
+    file_path: str,
+    file_timeout: Optional[float] = None,
+) -> List[Document]:
+    """Process-pool entry point: loads one file under an optional timeout."""
+    use_alarm = file_timeout is not None and hasattr(signal, "SIGALRM")
+
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _raise_file_timeout)
+        signal.setitimer(signal.ITIMER_REAL, file_timeout)
+
+    try:
+        return DataIngestion.load_file(Path(file_path))
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
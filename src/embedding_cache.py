@@ -0,0 +1,125 @@
+from langchain_core.embeddings import Embeddings
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import threading
+import time
+
+from src.metrics import CACHES
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Bounded LRU (+ optional TTL) cache in front of an embedding model.
+
+    Query-side calls (embed_query / embed_queries) go through the cache,
+    keyed on whitespace-normalized text and the model name; misses in one
+    call are encoded together in a single batch. embed_documents is passed
+    straight through so bulk indexing does not evict hot queries.
+    """
+
+    def __init__(
+        self,
+        base: Embeddings,
+        model_name: str,
+        max_size: int = 2048,
+        ttl: Optional[float] = None,
+    ):
+        self.base = base
+        self.model_name = model_name
+        self.max_size = max_size
+        self.ttl = ttl
+
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        CACHES.track("query_embeddings", self.stats)
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return " ".join(text.split())
+
+    def _key(self, text: str) -> Tuple[str, str]:
+        return (self.model_name, self.normalize(text))
+
+    def _get(self, key: Tuple[str, str], now: float) -> Optional[List[float]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        stored_at, vector = entry
+        if self.ttl is not None and now - stored_at > self.ttl:
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return vector
+
+    def _put(self, key: Tuple[str, str], vector: List[float], now: float) -> None:
+        if self.max_size <= 0:
+            return
+
+        self._entries[key] = (now, vector)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        # Route misses through a query batcher underneath, if there is one.
+        encode = getattr(self.base, "embed_queries", self.base.embed_documents)
+        return encode(texts)
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        now = time.monotonic()
+        keys = [self._key(text) for text in texts]
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        missing: Dict[Tuple[str, str], List[int]] = {}
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._get(key, now)
+                if vector is None:
+                    missing.setdefault(key, []).append(i)
+                else:
+                    results[i] = vector
+
+            self.hits += len(texts) - sum(len(v) for v in missing.values())
+            self.misses += sum(len(v) for v in missing.values())
+
+        if missing:
+            miss_keys = list(missing)
+            vectors = self._encode([key[1] for key in miss_keys])
+
+            with self._lock:
+                for key, vector in zip(miss_keys, vectors):
+                    self._put(key, vector, now)
+                    for i in missing[key]:
+                        results[i] = vector
+
+        return results
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_queries([text])[0]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.base.embed_documents(texts)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
@@ -1,6 +1,7 @@
 from typing import List,Union,Set,Tuple
 from langchain_core.documents import Document
-import hashlib
+
+from src.chunk_store import ChunkStore
 
 
 
@@ -22,20 +23,9 @@ class RAGEvaluator:
         return docs
     
     @staticmethod
-    def _content_hash(text:str)->str:
-        
-        return hashlib.md5(text.encode("utf-8")).hexdigest()
-    
-    
-    
-    @classmethod
-    def _doc_uid(cls,doc:Document)->str:
-       
-       src =doc.metadata.get("source","Unknown")
-       page=doc.metadata.get("page","na")
-       content_hash=cls._content_hash(doc.page_content)
-       
-       return f"{src}::page={page}::hash={content_hash}"
+    def _doc_uid(doc:Document)->str:
+        # Same UID format as the retriever, defined once in ChunkStore.
+        return ChunkStore.doc_uid(doc)
    
    
    
@@ -1,7 +1,8 @@
-from typing import List
+from typing import AsyncIterator, Iterator, List, Optional, Tuple
 from langchain_core.documents import Document
 
 from src.llm_client import LocalLLM
+from src.metrics import timed
 
 
 class RAGGenerator:
@@ -13,26 +14,21 @@ class RAGGenerator:
     def __init__(
         self,
         max_content_chars: int = 6000,
+        llm: Optional[LocalLLM] = None,
     ):
         print("Initializing Local RAG Generator (Ollama)")
-        self.llm = LocalLLM()
+        self.llm = llm or LocalLLM.shared()
         self.max_content_chars = max_content_chars
         print("RAG Generator Ready")
 
-    def generate_with_citations(
+    def _build_context(
         self,
-        query: str,
         context_docs: List[Document],
-    ) -> str:
-
-        if not query or not query.strip():
-            return "Invalid query."
-
-        if not context_docs:
-            return "I cannot find this information in the provided source."
-
+    ) -> Tuple[str, List[str]]:
+        """Returns the numbered context block and the sources it cites."""
 
         context_text = ""
+        sources: List[str] = []
         total_chars = 0
 
         for i, doc in enumerate(context_docs):
@@ -44,7 +40,20 @@ class RAGGenerator:
                 break
 
             context_text += block
+            sources.append(source)
+
+        return context_text, sources
+
+    def context_sources(self, context_docs: List[Document]) -> List[str]:
+        return self._build_context(context_docs)[1]
+
+    def _build_prompt(self, query: str, context_docs: List[Document]) -> str:
+        with timed("prompt"):
+            return self._format_prompt(query, context_docs)
 
+    def _format_prompt(self, query: str, context_docs: List[Document]) -> str:
+
+        context_text, _ = self._build_context(context_docs)
 
         prompt = f"""
 Answer the question using ONLY the information in the context below.
@@ -61,9 +70,52 @@ Question:
 Answer with citations:
 """.strip()
 
+        return prompt
+
+    def generate_with_citations(
+        self,
+        query: str,
+        context_docs: List[Document],
+    ) -> str:
+
+        if not query or not query.strip():
+            return "Invalid query."
+
+        if not context_docs:
+            return "I cannot find this information in the provided source."
+
+        prompt = self._build_prompt(query, context_docs)
+
+        try:
+            with timed("generation"):
+                answer = self.llm.generate(prompt)
+
+            if not answer:
+                return "I cannot find this information in the provided source."
+
+            return answer.strip()
+
+        except Exception as e:
+            return f"Generation failed: {str(e)}"
+
+    async def agenerate_with_citations(
+        self,
+        query: str,
+        context_docs: List[Document],
+    ) -> str:
+        """Async variant of generate_with_citations."""
+
+        if not query or not query.strip():
+            return "Invalid query."
+
+        if not context_docs:
+            return "I cannot find this information in the provided source."
+
+        prompt = self._build_prompt(query, context_docs)
 
         try:
-            answer = self.llm.generate(prompt)
+            with timed("generation"):
+                answer = await self.llm.agenerate(prompt)
 
             if not answer:
                 return "I cannot find this information in the provided source."
@@ -72,3 +124,45 @@ Answer with citations:
 
         except Exception as e:
             return f"Generation failed: {str(e)}"
+
+    def stream_with_citations(
+        self,
+        query: str,
+        context_docs: List[Document],
+    ) -> Iterator[str]:
+        """Yields answer tokens as the LLM produces them."""
+
+        if not query or not query.strip():
+            yield "Invalid query."
+            return
+
+        if not context_docs:
+            yield "I cannot find this information in the provided source."
+            return
+
+        prompt = self._build_prompt(query, context_docs)
+        with timed("generation"):
+            yield from self.llm.stream(prompt)
+
+    async def astream_with_citations(
+        self,
+        query: str,
+        context_docs: List[Document],
+    ) -> AsyncIterator[str]:
+        """Async variant of stream_with_citations."""
+
+        if not query or not query.strip():
+            yield "Invalid query."
+            return
+
+        if not context_docs:
+            yield "I cannot find this information in the provided source."
+            return
+
+        tokens = self.llm.astream(self._build_prompt(query, context_docs))
+        try:
+            with timed("generation"):
+                async for token in tokens:
+                    yield token
+        finally:
+            await tokens.aclose()
@@ -0,0 +1,87 @@
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+import threading
+import time
+import traceback
+import uuid
+
+
+class IndexJobManager:
+    """
+    Runs index jobs (rebuilds, incremental updates) one at a time on a
+    background thread and keeps their status for polling.
+
+    Submitting while a job of the same kind is queued or running returns
+    that job instead of starting another. The most recent max_history jobs
+    are kept.
+    """
+
+    def __init__(self, max_history: int = 50):
+        self.max_history = max_history
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix="index-job",
+        )
+        self._jobs: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, fn: Callable[[], Any]) -> Dict:
+        with self._lock:
+            for job in self._jobs.values():
+                if job["kind"] == kind and job["status"] in ("queued", "running"):
+                    return dict(job)
+
+            job = {
+                "job_id": uuid.uuid4().hex,
+                "kind": kind,
+                "status": "queued",
+                "created_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+                "error": None,
+            }
+            self._jobs[job["job_id"]] = job
+
+            while len(self._jobs) > self.max_history:
+                oldest = next(iter(self._jobs.values()))
+                if oldest["status"] in ("queued", "running"):
+                    break
+                self._jobs.popitem(last=False)
+
+            self._executor.submit(self._run, job["job_id"], fn)
+            return dict(job)
+
+    def _update(self, job_id: str, **fields) -> None:
+        with self._lock:
+            self._jobs[job_id].update(fields)
+
+    def _run(self, job_id: str, fn: Callable[[], Any]) -> None:
+        self._update(job_id, status="running", started_at=time.time())
+
+        try:
+            fn()
+        except Exception as e:
+            traceback.print_exc()
+            self._update(
+                job_id,
+                status="failed",
+                error=str(e),
+                finished_at=time.time(),
+            )
+            return
+
+        self._update(job_id, status="succeeded", finished_at=time.time())
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def list(self) -> List[Dict]:
+        with self._lock:
+            return [dict(job) for job in self._jobs.values()]
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
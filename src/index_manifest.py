@@ -0,0 +1,114 @@
+from typing import Dict, List, Optional, Tuple
+from pathlib import Path
+import hashlib
+import json
+import os
+
+from src.documents_ingestion import DataIngestion
+
+
+class IndexManifest:
+    """
+    Per-file record of what is currently indexed: size, mtime, content hash
+    and the chunk IDs each file produced. Used to re-index only the files
+    that were added, changed or removed since the last build.
+    """
+
+    VERSION = 1
+    FILENAME = "index_manifest.json"
+
+    def __init__(self, files: Optional[Dict[str, Dict]] = None):
+        self.files: Dict[str, Dict] = files or {}
+
+    @staticmethod
+    def file_hash(file_path: Path, block_size: int = 1 << 20) -> str:
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(block_size), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def scan(self, paths: List[str]) -> "IndexManifest":
+        """
+        Builds a manifest of the current source tree. Files whose size and
+        mtime are unchanged reuse the stored hash instead of re-reading it.
+        """
+        files: Dict[str, Dict] = {}
+
+        for file_path in DataIngestion.list_files(paths):
+            key = str(file_path)
+            stat = file_path.stat()
+            previous = self.files.get(key)
+
+            if (
+                previous is not None
+                and previous.get("size") == stat.st_size
+                and previous.get("mtime_ns") == stat.st_mtime_ns
+            ):
+                sha256 = previous["sha256"]
+            else:
+                sha256 = self.file_hash(file_path)
+
+            files[key] = {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "sha256": sha256,
+                "chunk_ids": [],
+            }
+
+        return IndexManifest(files)
+
+    def diff(
+        self,
+        current: "IndexManifest",
+    ) -> Tuple[List[str], List[str], List[str]]:
+        """Returns (added, changed, removed) source paths."""
+        added = [p for p in current.files if p not in self.files]
+        removed = [p for p in self.files if p not in current.files]
+        changed = [
+            p for p in current.files
+            if p in self.files
+            and current.files[p]["sha256"] != self.files[p]["sha256"]
+        ]
+        return added, changed, removed
+
+    def set_chunks(self, chunks) -> None:
+        """Records chunk IDs per source file from a list of chunks."""
+        for entry in self.files.values():
+            entry["chunk_ids"] = []
+
+        for doc in chunks:
+            entry = self.files.get(str(doc.metadata.get("source")))
+            if entry is not None:
+                entry["chunk_ids"].append(doc.metadata["chunk_id"])
+
+    @classmethod
+    def path_for(cls, persist_directory: str) -> Path:
+        return Path(persist_directory) / cls.FILENAME
+
+    def save(self, persist_directory: str) -> None:
+        path = self.path_for(persist_directory)
+        os.makedirs(path.parent, exist_ok=True)
+
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": self.VERSION, "files": self.files}, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, persist_directory: str) -> Optional["IndexManifest"]:
+        path = cls.path_for(persist_directory)
+        if not path.exists():
+            return None
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[MANIFEST] Ignoring unreadable manifest {path} → {e}")
+            return None
+
+        if payload.get("version") != cls.VERSION:
+            return None
+
+        return cls(payload.get("files", {}))
@@ -0,0 +1,133 @@
+from langchain_core.documents import Document
+from typing import List, Optional
+from pathlib import Path
+import hashlib
+import json
+import os
+
+from src.documents_ingestion import DataIngestion
+
+
+class ChunkSnapshot:
+    """
+    Persisted copy of the chunk list, stored next to the Chroma collection.
+    Lets the pipeline rebuild the BM25 side on restart without re-parsing
+    the source documents, as long as the corpus fingerprint still matches.
+    """
+
+    VERSION = 1
+    FILENAME = "chunk_snapshot.json"
+
+    def __init__(
+        self,
+        fingerprint: str,
+        chunks: List[Document],
+        embedding: Optional[str] = None,
+    ):
+        self.fingerprint = fingerprint
+        self.chunks = chunks
+        # Embedding model and backend the index vectors were built with.
+        self.embedding = embedding
+
+    @staticmethod
+    def corpus_fingerprint(
+        paths: List[str],
+        chunking_mode: str = "recursive",
+    ) -> str:
+        """
+        Cheap fingerprint of the source tree built from file stats only,
+        so it can be checked on every startup without opening any file.
+        """
+        entries = []
+
+        for file_path in DataIngestion.list_files(paths):
+            stat = file_path.stat()
+            entries.append([str(file_path), stat.st_size, stat.st_mtime_ns])
+
+        payload = json.dumps(
+            {
+                "version": ChunkSnapshot.VERSION,
+                "chunking_mode": chunking_mode,
+                "files": entries,
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def chunks_fingerprint(chunks: List[Document]) -> str:
+        """Identifies an exact chunk list (content and order) by chunk ID."""
+        digest = hashlib.sha256()
+
+        for doc in chunks:
+            key = doc.metadata.get("chunk_id") or doc.page_content
+            digest.update(key.encode("utf-8"))
+            digest.update(b"\0")
+
+        return digest.hexdigest()
+
+    @classmethod
+    def path_for(cls, persist_directory: str) -> Path:
+        return Path(persist_directory) / cls.FILENAME
+
+    def save(self, persist_directory: str) -> None:
+        path = self.path_for(persist_directory)
+        os.makedirs(path.parent, exist_ok=True)
+
+        payload = {
+            "version": self.VERSION,
+            "fingerprint": self.fingerprint,
+            "embedding": self.embedding,
+            "chunks": [
+                {"page_content": doc.page_content, "metadata": doc.metadata}
+                for doc in self.chunks
+            ],
+        }
+
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, persist_directory: str) -> Optional["ChunkSnapshot"]:
+        path = cls.path_for(persist_directory)
+        if not path.exists():
+            return None
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[SNAPSHOT] Ignoring unreadable snapshot {path} → {e}")
+            return None
+
+        if payload.get("version") != cls.VERSION:
+            return None
+
+        chunks = [
+            Document(page_content=item["page_content"], metadata=item["metadata"])
+            for item in payload.get("chunks", [])
+        ]
+        return cls(
+            payload.get("fingerprint", ""),
+            chunks,
+            embedding=payload.get("embedding"),
+        )
+
+    @staticmethod
+    def chunks_from_chroma(vector_db) -> List[Document]:
+        """
+        Fallback for collections created before snapshots existed:
+        read the stored chunk texts and metadata back out of Chroma.
+        """
+        data = vector_db.get(include=["documents", "metadatas"])
+
+        documents = data.get("documents") or []
+        metadatas = data.get("metadatas") or [{} for _ in documents]
+
+        return [
+            Document(page_content=text, metadata=metadata or {})
+            for text, metadata in zip(documents, metadatas)
+            if text
+        ]
@@ -0,0 +1,178 @@
+from langchain_core.documents import Document
+from pathlib import Path
+from contextlib import closing
+from typing import Callable, List, Optional
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+
+
+class IndexVersions:
+    """
+    Versioned index directories under one root:
+
+        <root>/CURRENT            name of the live version
+        <root>/versions/<name>/   Chroma files, snapshot, manifest, BM25 and dense indexes
+
+    A full rebuild writes a fresh version directory and then repoints
+    CURRENT with an atomic rename, so the live index is never modified by
+    it. A root without CURRENT is a legacy, unversioned index and is used
+    as-is until the first versioned build replaces it.
+    """
+
+    POINTER_FILE = "CURRENT"
+    VERSIONS_DIR = "versions"
+    CHROMA_DB = "chroma.sqlite3"
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    @property
+    def versions_dir(self) -> Path:
+        return self.root / self.VERSIONS_DIR
+
+    def current_dir(self) -> str:
+        pointer = self.root / self.POINTER_FILE
+        if pointer.exists():
+            name = pointer.read_text(encoding="utf-8").strip()
+            if name and (self.versions_dir / name).is_dir():
+                return str(self.versions_dir / name)
+
+        return str(self.root)
+
+    @staticmethod
+    def has_index(directory: str) -> bool:
+        return (Path(directory) / IndexVersions.CHROMA_DB).exists()
+
+    def is_versioned(self, directory: str) -> bool:
+        return Path(directory).resolve().parent == self.versions_dir.resolve()
+
+    def new_version_dir(self) -> str:
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        path = self.versions_dir / name
+        path.mkdir(parents=True)
+        return str(path)
+
+    @staticmethod
+    def _is_segment_dir(name: str) -> bool:
+        # Chroma keeps each HNSW segment in a directory named by its UUID.
+        try:
+            uuid.UUID(name)
+        except ValueError:
+            return False
+        return True
+
+    def copy_version(self, directory: str) -> str:
+        """
+        New version directory holding a copy of directory's Chroma store,
+        the only part an incremental update modifies in place; the
+        snapshot, manifest, BM25 and dense indexes are written fresh.
+
+        The SQLite file is copied with SQLite's online backup, which is
+        consistent while the live handle has it open. The HNSW segment
+        files are copied as-is: a version is never written once it is
+        live, and Chroma replays anything newer than them from SQLite.
+        """
+        path = Path(self.new_version_dir())
+        source = Path(directory)
+
+        with closing(sqlite3.connect(
+            (source / self.CHROMA_DB).resolve().as_uri() + "?mode=ro", uri=True
+        )) as src, closing(sqlite3.connect(path / self.CHROMA_DB)) as dst:
+            src.backup(dst)
+
+        for entry in source.iterdir():
+            if entry.is_dir() and self._is_segment_dir(entry.name):
+                shutil.copytree(entry, path / entry.name)
+
+        return str(path)
+
+    def publish(self, directory: str) -> None:
+        """Atomically makes directory the live version."""
+        if not self.is_versioned(directory):
+            raise ValueError(f"Not a version directory: {directory}")
+
+        pointer = self.root / self.POINTER_FILE
+        tmp_path = pointer.with_suffix(".tmp")
+        tmp_path.write_text(Path(directory).name, encoding="utf-8")
+        os.replace(tmp_path, pointer)
+
+    def remove(self, directory: str) -> None:
+        # Only version directories are ever deleted; a legacy root index is
+        # left on disk for the operator to remove.
+        if self.is_versioned(directory):
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def remove_stale(self, keep: List[str]) -> None:
+        """Deletes version directories left behind by interrupted builds."""
+        if not self.versions_dir.is_dir():
+            return
+
+        keep = {Path(path).resolve() for path in keep}
+        for path in self.versions_dir.iterdir():
+            if path.is_dir() and path.resolve() not in keep:
+                shutil.rmtree(path, ignore_errors=True)
+
+
+class IndexHandle:
+    """
+    One index version as seen by queries: the vector store, the retriever
+    and the chunk list, swapped together.
+
+    Queries acquire() the handle for their whole duration. After a swap the
+    old handle is retire()d; its on_drained callback runs once the last
+    in-flight query releases it.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        vector_db,
+        retriever,
+        chunks: List[Document],
+        index_version: str,
+    ):
+        self.directory = directory
+        self.vector_db = vector_db
+        self.retriever = retriever
+        self.chunks = chunks
+        self.index_version = index_version
+
+        self._refs = 0
+        self._retired = False
+        self._on_drained: Optional[Callable[[], None]] = None
+        self._lock = threading.Lock()
+
+    def acquire(self) -> "IndexHandle":
+        with self._lock:
+            self._refs += 1
+        return self
+
+    def release(self) -> None:
+        with self._lock:
+            self._refs -= 1
+            drained = self._retired and self._refs == 0
+        if drained:
+            self._drained()
+
+    def retire(self, on_drained: Optional[Callable[[], None]] = None) -> None:
+        with self._lock:
+            self._retired = True
+            self._on_drained = on_drained
+            drained = self._refs == 0
+        if drained:
+            self._drained()
+
+    def _drained(self) -> None:
+        with self._lock:
+            callback, self._on_drained = self._on_drained, None
+        if callback is not None:
+            callback()
+
+    @property
+    def in_flight(self) -> int:
+        with self._lock:
+            return self._refs
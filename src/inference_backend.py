@@ -0,0 +1,337 @@
+"""
+Selectable CPU inference backends for the embedder and the cross-encoder.
+
+    fp32  - the stock PyTorch model
+    int8  - PyTorch with nn.Linear layers dynamically quantized to int8
+    onnx  - an exported ONNX graph run through onnxruntime
+            (needs `optimum[onnxruntime]`)
+
+Export and guard the non-fp32 variants once with
+
+    python -m src.inference_backend export --backend all
+
+which writes the ONNX graphs under the artifact directory and, for every
+backend, a guard.json comparing its outputs to fp32 on a sample of chunks.
+At load time a backend that has no guard yet, or whose guard failed,
+falls back to fp32.
+"""
+
+from typing import Dict, List, Optional, Tuple
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import torch
+from sentence_transformers import CrossEncoder, SentenceTransformer
+
+from src.index_snapshot import ChunkSnapshot
+from src.index_versions import IndexVersions
+
+
+BACKENDS = ("fp32", "int8", "onnx")
+DEFAULT_ARTIFACT_DIR = "./model_artifacts"
+GUARD_FILE = "guard.json"
+
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+# Acceptance thresholds for the accuracy guard.
+MIN_EMBEDDING_COSINE = 0.99
+MIN_SCORE_CORRELATION = 0.99
+MIN_TOP1_AGREEMENT = 0.9
+
+SAMPLE_QUERIES = [
+    "What is the leave policy for employees during probation?",
+    "How does the expense reimbursement approval process work?",
+    "What actions are taken if an employee violates IT security policy?",
+    "Is personal device usage allowed on the company network?",
+    "How are travel advances settled after a business trip?",
+    "Who approves overtime and how is it compensated?",
+    "How often must passwords be changed?",
+    "What is the notice period for resignation?",
+]
+
+SAMPLE_PASSAGES = [
+    "Employees on probation are entitled to casual leave only after one month of service.",
+    "Expense claims must be submitted with original receipts within 30 days and are approved by the reporting manager.",
+    "Violations of the information security policy may result in disciplinary action up to termination.",
+    "Personal devices may connect to the guest network only; access to the corporate network requires IT approval.",
+    "Travel advances must be settled within 15 days of return by submitting the travel expense statement.",
+    "Overtime must be pre-approved by the department head and is compensated at twice the hourly rate.",
+    "Passwords must be at least 12 characters long and changed every 90 days.",
+    "Confirmed employees must serve a notice period of two months or pay salary in lieu of notice.",
+]
+
+
+def artifact_path(model_id: str, backend: str, artifact_dir: str) -> str:
+    return os.path.join(artifact_dir, model_id.replace("/", "__"), backend)
+
+
+def read_guard(model_id: str, backend: str, artifact_dir: str) -> Optional[Dict]:
+    path = os.path.join(artifact_path(model_id, backend, artifact_dir), GUARD_FILE)
+    if not os.path.exists(path):
+        return None
+
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def resolve_backend(
+    model_id: str,
+    backend: str,
+    device: str,
+    artifact_dir: str = DEFAULT_ARTIFACT_DIR,
+) -> str:
+    """
+    Returns the backend to actually load: the requested one, or fp32 when
+    it has not passed its accuracy guard or cannot run on the given device.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend: {backend}")
+
+    if backend == "fp32":
+        return backend
+
+    if backend == "int8" and device != "cpu":
+        print(f"[BACKEND] int8 is CPU-only; using fp32 for {model_id} on {device}")
+        return "fp32"
+
+    guard = read_guard(model_id, backend, artifact_dir)
+    if guard is None:
+        print(
+            f"[BACKEND] {backend} has not been verified for {model_id}; using fp32 "
+            f"(run `python -m src.inference_backend export --backend {backend}`)"
+        )
+        return "fp32"
+
+    if not guard.get("passed"):
+        print(f"[BACKEND] {backend} failed its accuracy guard for {model_id}; using fp32")
+        return "fp32"
+
+    return backend
+
+
+def quantize_int8(model: torch.nn.Module) -> torch.nn.Module:
+    return torch.quantization.quantize_dynamic(
+        model,
+        {torch.nn.Linear},
+        dtype=torch.qint8,
+        inplace=True,
+    )
+
+
+def model_source(
+    model_id: str,
+    backend: str,
+    artifact_dir: str = DEFAULT_ARTIFACT_DIR,
+) -> Tuple[str, Dict]:
+    """
+    Returns (name_or_path, extra constructor kwargs) for loading model_id
+    with the given backend. ONNX models load from the exported artifact when
+    there is one; otherwise sentence-transformers exports on the fly.
+    """
+    if backend != "onnx":
+        return model_id, {}
+
+    path = artifact_path(model_id, backend, artifact_dir)
+    if os.path.isdir(os.path.join(path, "onnx")):
+        return path, {"backend": "onnx"}
+
+    return model_id, {"backend": "onnx"}
+
+
+def load_sentence_transformer(
+    model_id: str,
+    backend: str,
+    device: str,
+    artifact_dir: str = DEFAULT_ARTIFACT_DIR,
+) -> SentenceTransformer:
+    source, kwargs = model_source(model_id, backend, artifact_dir)
+    model = SentenceTransformer(source, device=device, **kwargs)
+
+    if backend == "int8":
+        quantize_int8(model)
+
+    return model
+
+
+def load_cross_encoder(
+    model_id: str,
+    backend: str,
+    device: str,
+    artifact_dir: str = DEFAULT_ARTIFACT_DIR,
+) -> CrossEncoder:
+    source, kwargs = model_source(model_id, backend, artifact_dir)
+    model = CrossEncoder(source, device=device, **kwargs)
+
+    if backend == "int8":
+        quantize_int8(model)
+
+    return model
+
+
+# ------------------------------------------------
+# Export + accuracy guard
+# ------------------------------------------------
+def load_sample(persist_dir: str, sample_size: int) -> List[str]:
+    """Passages for the guard: indexed chunks if there is an index, else built-ins."""
+    snapshot = ChunkSnapshot.load(IndexVersions(persist_dir).current_dir())
+    if snapshot is None or not snapshot.chunks:
+        return list(SAMPLE_PASSAGES)
+
+    rng = np.random.default_rng(0)
+    picks = rng.choice(
+        len(snapshot.chunks),
+        size=min(sample_size, len(snapshot.chunks)),
+        replace=False,
+    )
+    return [snapshot.chunks[i].page_content for i in sorted(picks)]
+
+
+def _timed(fn, *args) -> Tuple[np.ndarray, float]:
+    start = time.perf_counter()
+    result = np.asarray(fn(*args), dtype=np.float32)
+    return result, time.perf_counter() - start
+
+
+def guard_embedder(
+    reference: SentenceTransformer,
+    candidate: SentenceTransformer,
+    texts: List[str],
+) -> Dict:
+    def encode(model):
+        return lambda t: model.encode(t, normalize_embeddings=True, batch_size=32)
+
+    ref, ref_seconds = _timed(encode(reference), texts)
+    cand, cand_seconds = _timed(encode(candidate), texts)
+
+    cosines = np.sum(ref * cand, axis=1)
+    min_cosine = float(cosines.min())
+
+    return {
+        "samples": len(texts),
+        "min_cosine": min_cosine,
+        "mean_cosine": float(cosines.mean()),
+        "fp32_seconds": ref_seconds,
+        "seconds": cand_seconds,
+        "passed": min_cosine >= MIN_EMBEDDING_COSINE,
+    }
+
+
+def guard_cross_encoder(
+    reference: CrossEncoder,
+    candidate: CrossEncoder,
+    queries: List[str],
+    passages: List[str],
+) -> Dict:
+    pairs = [[q, p] for q in queries for p in passages]
+
+    def predict(model):
+        return lambda p: model.predict(p, batch_size=32, show_progress_bar=False)
+
+    ref, ref_seconds = _timed(predict(reference), pairs)
+    cand, cand_seconds = _timed(predict(candidate), pairs)
+
+    correlation = float(np.corrcoef(ref, cand)[0, 1]) if len(pairs) > 1 else 1.0
+
+    ref = ref.reshape(len(queries), len(passages))
+    cand = cand.reshape(len(queries), len(passages))
+    top1_agreement = float(np.mean(ref.argmax(axis=1) == cand.argmax(axis=1)))
+
+    return {
+        "samples": len(pairs),
+        "correlation": correlation,
+        "max_abs_diff": float(np.abs(ref - cand).max()),
+        "top1_agreement": top1_agreement,
+        "fp32_seconds": ref_seconds,
+        "seconds": cand_seconds,
+        "passed": (
+            correlation >= MIN_SCORE_CORRELATION
+            and top1_agreement >= MIN_TOP1_AGREEMENT
+        ),
+    }
+
+
+def write_guard(model_id: str, backend: str, artifact_dir: str, result: Dict) -> None:
+    path = artifact_path(model_id, backend, artifact_dir)
+    os.makedirs(path, exist_ok=True)
+
+    result = {"model": model_id, "backend": backend, **result}
+    with open(os.path.join(path, GUARD_FILE), "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+
+
+def export(
+    backends: List[str],
+    artifact_dir: str = DEFAULT_ARTIFACT_DIR,
+    persist_dir: str = "./chroma_db",
+    sample_size: int = 64,
+) -> Dict[str, Dict]:
+    """Exports the requested backends for both models and runs the guard."""
+    passages = load_sample(persist_dir, sample_size)
+    results = {}
+
+    reference_embedder = SentenceTransformer(EMBEDDING_MODEL, device="cpu")
+    reference_reranker = CrossEncoder(RERANK_MODEL, device="cpu")
+
+    for backend in backends:
+        if backend == "fp32":
+            continue
+
+        if backend == "onnx":
+            SentenceTransformer(EMBEDDING_MODEL, device="cpu", backend="onnx").save_pretrained(
+                artifact_path(EMBEDDING_MODEL, backend, artifact_dir)
+            )
+            CrossEncoder(RERANK_MODEL, device="cpu", backend="onnx").save_pretrained(
+                artifact_path(RERANK_MODEL, backend, artifact_dir)
+            )
+
+        embedder = load_sentence_transformer(EMBEDDING_MODEL, backend, "cpu", artifact_dir)
+        reranker = load_cross_encoder(RERANK_MODEL, backend, "cpu", artifact_dir)
+
+        embed_result = guard_embedder(reference_embedder, embedder, passages)
+        rerank_result = guard_cross_encoder(
+            reference_reranker, reranker, SAMPLE_QUERIES, passages
+        )
+
+        write_guard(EMBEDDING_MODEL, backend, artifact_dir, embed_result)
+        write_guard(RERANK_MODEL, backend, artifact_dir, rerank_result)
+
+        results[backend] = {"embedder": embed_result, "reranker": rerank_result}
+
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export and guard inference backends")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    exp = sub.add_parser("export", help="export models and run the accuracy guard")
+    exp.add_argument("--backend", choices=[*BACKENDS, "all"], default="all")
+    exp.add_argument("--artifact-dir", default=DEFAULT_ARTIFACT_DIR)
+    exp.add_argument("--persist-dir", default="./chroma_db")
+    exp.add_argument("--sample-size", type=int, default=64)
+
+    args = parser.parse_args()
+
+    backends = list(BACKENDS) if args.backend == "all" else [args.backend]
+    results = export(
+        backends,
+        artifact_dir=args.artifact_dir,
+        persist_dir=args.persist_dir,
+        sample_size=args.sample_size,
+    )
+
+    for backend, result in results.items():
+        for model, guard in result.items():
+            status = "PASS" if guard["passed"] else "FAIL"
+            print(
+                f"{backend:5s} {model:9s} {status}  "
+                f"fp32 {guard['fp32_seconds']:.2f}s -> {guard['seconds']:.2f}s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,39 @@
+import asyncio
+import json
 import os
+import threading
+from typing import AsyncIterator, Iterator, Optional, Tuple
+
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+RETRY_STATUSES = (500, 502, 503, 504)
 
 
 class LocalLLM:
+    """
+    Ollama client with HTTP keep-alive pooling, bounded retries on transient
+    5xx / connection errors, and a cap on in-flight requests. generate() is
+    blocking; agenerate() is the asyncio variant and shares the same limits.
+    stream() / astream() yield tokens as Ollama produces them.
+    Use LocalLLM.shared() to get the one instance per process.
+    """
+
+    _shared: Optional["LocalLLM"] = None
+    _shared_lock = threading.Lock()
+
     def __init__(
         self,
         host: str | None = None,
-        model: str = "llama3.2"
+        model: str = "llama3.2",
+        connect_timeout: float = 5.0,
+        read_timeout: float = 300.0,
+        max_retries: int = 2,
+        backoff_factor: float = 0.5,
+        max_in_flight: int = 8,
     ):
         self.host = host or os.getenv(
             "OLLAMA_BASE_URL",
@@ -16,19 +43,167 @@ class LocalLLM:
         self.url = f"{self.host}/api/generate"
         self.model = model
 
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_in_flight = max_in_flight
+
+        # Read timeouts are not retried: a generation that already ran for
+        # read_timeout seconds is not worth repeating.
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=0,
+            status=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(["POST"]),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=max_in_flight,
+            max_retries=retry,
+        )
+
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._semaphore = threading.BoundedSemaphore(max_in_flight)
+
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._async_semaphore: Optional[asyncio.Semaphore] = None
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+
         print(f"LocalLLM initialized")
         print(f"Model: {self.model}")
         print(f"Ollama URL: {self.url}")
 
-    def generate(self, prompt: str) -> str:
-        payload = {
+    @classmethod
+    def shared(cls, **kwargs) -> "LocalLLM":
+        """Process-wide client; kwargs only apply on first creation."""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls(**kwargs)
+            return cls._shared
+
+    def _payload(self, prompt: str, stream: bool = False) -> dict:
+        return {
             "model": self.model,
             "prompt": prompt,
-            "stream": False
+            "stream": stream
         }
 
-        r = requests.post(self.url, json=payload, timeout=300)
+    @staticmethod
+    def _parse_stream_line(line) -> Tuple[str, bool]:
+        """Returns (token, done) for one NDJSON line of an Ollama stream."""
+        if not line:
+            return "", False
+
+        data = json.loads(line)
+        if data.get("error"):
+            raise RuntimeError(data["error"])
+
+        return data.get("response", ""), bool(data.get("done"))
+
+    def generate(self, prompt: str) -> str:
+        with self._semaphore:
+            r = self.session.post(
+                self.url,
+                json=self._payload(prompt),
+                timeout=(self.connect_timeout, self.read_timeout),
+            )
         r.raise_for_status()
 
         data = r.json()
         return data.get("response", "").strip()
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        """
+        Yields response tokens as Ollama produces them. Closing the generator
+        early closes the connection, which stops the generation upstream.
+        """
+        with self._semaphore:
+            r = self.session.post(
+                self.url,
+                json=self._payload(prompt, stream=True),
+                timeout=(self.connect_timeout, self.read_timeout),
+                stream=True,
+            )
+            try:
+                r.raise_for_status()
+
+                for line in r.iter_lines():
+                    token, done = self._parse_stream_line(line)
+                    if token:
+                        yield token
+                    if done:
+                        break
+            finally:
+                r.close()
+
+    def _get_async_client(self):
+        # httpx.AsyncClient and asyncio.Semaphore are bound to the loop that
+        # first uses them, so recreate both if we are on a different loop.
+        loop = asyncio.get_running_loop()
+
+        if self._async_client is None or self._async_loop is not loop:
+            self._async_client = httpx.AsyncClient(
+                timeout=httpx.Timeout(
+                    self.read_timeout, connect=self.connect_timeout
+                ),
+                limits=httpx.Limits(
+                    max_connections=self.max_in_flight,
+                    max_keepalive_connections=self.max_in_flight,
+                ),
+            )
+            self._async_semaphore = asyncio.Semaphore(self.max_in_flight)
+            self._async_loop = loop
+
+        return self._async_client, self._async_semaphore
+
+    async def agenerate(self, prompt: str) -> str:
+        client, semaphore = self._get_async_client()
+
+        for attempt in range(self.max_retries + 1):
+            retryable = attempt < self.max_retries
+
+            try:
+                async with semaphore:
+                    r = await client.post(self.url, json=self._payload(prompt))
+            except (httpx.ConnectError, httpx.ConnectTimeout):
+                if not retryable:
+                    raise
+            else:
+                if r.status_code not in RETRY_STATUSES or not retryable:
+                    r.raise_for_status()
+                    data = r.json()
+                    return data.get("response", "").strip()
+
+            await asyncio.sleep(self.backoff_factor * (2 ** attempt))
+
+    async def astream(self, prompt: str) -> AsyncIterator[str]:
+        """Async variant of stream(); cancelling it aborts the upstream call."""
+        client, semaphore = self._get_async_client()
+
+        async with semaphore:
+            async with client.stream(
+                "POST", self.url, json=self._payload(prompt, stream=True)
+            ) as r:
+                r.raise_for_status()
+
+                async for line in r.aiter_lines():
+                    token, done = self._parse_stream_line(line)
+                    if token:
+                        yield token
+                    if done:
+                        break
+
+    async def aclose(self) -> None:
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+
+    def close(self) -> None:
+        self.session.close()
@@ -0,0 +1,274 @@
+"""
+In-process latency histograms and counters, rendered in the Prometheus
+text exposition format.
+
+Batchers and caches report their stats() through StatsGauges, read when
+/metrics is rendered.
+
+Pipeline stages are wrapped in `timed(stage)`, which observes the stage
+histogram and, when a request has called `start_request()`, also adds the
+duration to that request's timings. Per-request timings live in a
+ContextVar, so work handed to a thread pool must run under
+`contextvars.copy_context()` to be attributed to the request.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+import bisect
+import threading
+import time
+import weakref
+
+
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    body = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    return "{" + body + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter, optionally split by one label."""
+
+    def __init__(self, name: str, help: str, label: Optional[str] = None):
+        self.name = name
+        self.help = help
+        self.label = label
+        self._values: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, label_value: str = "") -> None:
+        with self._lock:
+            self._values[label_value] = self._values.get(label_value, 0) + amount
+
+    def value(self, label_value: str = "") -> float:
+        with self._lock:
+            return self._values.get(label_value, 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+
+        with self._lock:
+            for label_value, value in sorted(self._values.items()):
+                labels = {self.label: label_value} if self.label else {}
+                lines.append(
+                    f"{self.name}{_format_labels(labels)} {_format_value(value)}"
+                )
+
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram, optionally split by one label."""
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        label: Optional[str] = None,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.buckets = tuple(sorted(buckets))
+        # label value -> (per-bucket counts, sum, count)
+        self._series: Dict[str, Tuple[List[int], float, int]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, label_value: str = "") -> None:
+        index = bisect.bisect_left(self.buckets, value)
+
+        with self._lock:
+            counts, total, count = self._series.get(
+                label_value, ([0] * (len(self.buckets) + 1), 0.0, 0)
+            )
+            counts[index] += 1
+            self._series[label_value] = (counts, total + value, count + 1)
+
+    def snapshot(self, label_value: str = "") -> Dict[str, float]:
+        with self._lock:
+            counts, total, count = self._series.get(
+                label_value, ([0] * (len(self.buckets) + 1), 0.0, 0)
+            )
+            return {"count": count, "sum": total}
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+
+        with self._lock:
+            for label_value, (counts, total, count) in sorted(self._series.items()):
+                labels = {self.label: label_value} if self.label else {}
+
+                cumulative = 0
+                for bound, bucket_count in zip(
+                    (*self.buckets, float("inf")), counts
+                ):
+                    cumulative += bucket_count
+                    bucket_labels = {**labels, "le": _format_value(float(bound))}
+                    lines.append(
+                        f"{self.name}_bucket{_format_labels(bucket_labels)} {cumulative}"
+                    )
+
+                lines.append(f"{self.name}_sum{_format_labels(labels)} {total!r}")
+                lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+
+        return lines
+
+
+class StatsGauges:
+    """
+    Gauges read at render time from registered stats() methods: every key
+    of the returned dict is rendered as <name>_<key>, labelled by source.
+    Sources are held weakly, so a discarded component drops out.
+    """
+
+    def __init__(self, name: str, help: str, label: str = "source"):
+        self.name = name
+        self.help = help
+        self.label = label
+        self._sources: Dict[str, weakref.WeakMethod] = {}
+        self._lock = threading.Lock()
+
+    def track(self, source: str, stats_fn: Callable[[], Dict[str, float]]) -> None:
+        """Registers a bound stats() method; replaces an earlier one of source."""
+        with self._lock:
+            self._sources[source] = weakref.WeakMethod(stats_fn)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            sources = sorted(self._sources.items())
+
+        series: Dict[str, List[Tuple[str, float]]] = {}
+        for source, ref in sources:
+            stats_fn = ref()
+            if stats_fn is None:
+                with self._lock:
+                    if self._sources.get(source) is ref:
+                        del self._sources[source]
+                continue
+
+            for key, value in stats_fn().items():
+                series.setdefault(key, []).append((source, value))
+
+        lines: List[str] = []
+        for key, values in series.items():
+            name = f"{self.name}_{key}"
+            lines.append(f"# HELP {name} {self.help}: {key}.")
+            lines.append(f"# TYPE {name} gauge")
+            for source, value in values:
+                lines.append(
+                    f"{name}{_format_labels({self.label: source})} {_format_value(value)}"
+                )
+
+        return lines
+
+
+class Registry:
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "rag_stage_seconds",
+    "Latency of each pipeline stage in seconds.",
+    label="stage",
+))
+DOCUMENTS = REGISTRY.register(Counter(
+    "rag_documents_total",
+    "Documents passing through each pipeline stage.",
+    label="stage",
+))
+QUERIES = REGISTRY.register(Counter(
+    "rag_queries_total",
+    "Queries handled, by outcome.",
+    label="outcome",
+))
+
+BATCHERS = REGISTRY.register(StatsGauges(
+    "rag_batcher",
+    "Micro-batcher stat",
+    label="batcher",
+))
+CACHES = REGISTRY.register(StatsGauges(
+    "rag_cache",
+    "Cache stat",
+    label="cache",
+))
+
+
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar(
+    "rag_request_timings", default=None
+)
+
+
+def start_request() -> Dict[str, float]:
+    """Starts collecting per-stage timings for the current request."""
+    timings: Dict[str, float] = {}
+    _request_timings.set(timings)
+    return timings
+
+
+def request_timings() -> Optional[Dict[str, float]]:
+    return _request_timings.get()
+
+
+def observe(stage: str, seconds: float) -> None:
+    STAGE_SECONDS.observe(seconds, stage)
+
+    # Stages that run more than once per request (e.g. one compression
+    # call per document) are summed.
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - start)
+
+
+def count_documents(stage: str, n: int) -> None:
+    DOCUMENTS.inc(n, stage)
+
+
+def render() -> str:
+    return REGISTRY.render()
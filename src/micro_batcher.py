@@ -0,0 +1,131 @@
+from concurrent.futures import Future
+from queue import Empty, Queue
+from typing import Callable, Dict, List, Sequence
+import threading
+import time
+
+from src.metrics import BATCHERS
+
+
+class MicroBatcher:
+    """
+    Coalesces work items from concurrent callers into batched calls.
+
+    Callers submit a list of items and block until their results are ready.
+    A background thread collects pending submissions for up to max_wait_ms
+    after the first one arrives, or until max_batch_size items are queued,
+    runs batch_fn once on the concatenated items, and hands each caller its
+    slice of the results. Its stats() are reported on /metrics under name.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List], Sequence],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+        name: str = "batcher",
+    ):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.name = name
+
+        self._queue: Queue = Queue()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._requests = 0
+        self._queue_time_total = 0.0
+        self._queue_time_max = 0.0
+
+        self._worker = threading.Thread(
+            target=self._run,
+            name=name,
+            daemon=True,
+        )
+        self._worker.start()
+
+        BATCHERS.track(name, self.stats)
+
+    def submit(self, items: List) -> List:
+        """Blocks until the batched call covering items has completed."""
+        if not items:
+            return []
+
+        future: Future = Future()
+        self._queue.put((list(items), future, time.perf_counter()))
+        return future.result()
+
+    def _collect(self) -> List:
+        pending = [self._queue.get()]
+        size = len(pending[0][0])
+        deadline = time.perf_counter() + self.max_wait
+
+        while size < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except Empty:
+                break
+            pending.append(request)
+            size += len(request[0])
+
+        return pending
+
+    def _run(self) -> None:
+        while True:
+            pending = self._collect()
+            started = time.perf_counter()
+
+            items: List = []
+            for request_items, _, _ in pending:
+                items.extend(request_items)
+
+            # Any failure, including a short result list, is handed to every
+            # waiting caller; otherwise they would block forever.
+            try:
+                results = list(self.batch_fn(items))
+                if len(results) != len(items):
+                    raise RuntimeError(
+                        f"{self.name}: batch_fn returned {len(results)} "
+                        f"results for {len(items)} items"
+                    )
+            except BaseException as e:
+                for _, future, _ in pending:
+                    future.set_exception(e)
+                continue
+
+            offset = 0
+            for request_items, future, _ in pending:
+                future.set_result(results[offset:offset + len(request_items)])
+                offset += len(request_items)
+
+            self._record(pending, len(items), started)
+
+    def _record(self, pending: List, num_items: int, started: float) -> None:
+        with self._stats_lock:
+            self._batches += 1
+            self._items += num_items
+            self._requests += len(pending)
+
+            for _, _, enqueued in pending:
+                waited = started - enqueued
+                self._queue_time_total += waited
+                self._queue_time_max = max(self._queue_time_max, waited)
+
+    def stats(self) -> Dict[str, float]:
+        with self._stats_lock:
+            batches = self._batches or 1
+            requests = self._requests or 1
+            return {
+                "batches": self._batches,
+                "requests": self._requests,
+                "items": self._items,
+                "mean_batch_size": self._items / batches,
+                "mean_batch_fill": self._items / batches / self.max_batch_size,
+                "mean_requests_per_batch": self._requests / batches,
+                "mean_queue_ms": 1000.0 * self._queue_time_total / requests,
+                "max_queue_ms": 1000.0 * self._queue_time_max,
+            }
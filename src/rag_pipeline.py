@@ -1,14 +1,30 @@
-from typing import List, Tuple
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+from pathlib import Path
+from langchain_community.vectorstores import Chroma
 from langchain_core.documents import Document
-
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import asyncio
+import contextvars
+import os
+import threading
+
+from src.answer_cache import SemanticAnswerCache
+from src.chunk_store import ChunkStore
 from src.chunking import Chunking
 from src.context_compression import ContextCompressor
 from src.documents_ingestion import DataIngestion
 from src.generator_with_citations import RAGGenerator
+from src.index_manifest import IndexManifest
+from src.index_snapshot import ChunkSnapshot
+from src.index_versions import IndexHandle, IndexVersions
 from src.llm_client import LocalLLM
+from src.metrics import count_documents, timed
 from src.query_transformer import QueryTransformer
 from src.reranker import ReRanker
 from src.retrieval import HybridRetriever
+from src.score_cache import RerankScoreCache
+from src.streaming_build import StreamingIndexBuilder
 from src.vector_embedding import EmbeddingStore
 
 
@@ -24,6 +40,32 @@ class RAGPipeline:
         enable_compression: bool = True,
         top_k: int = 5,
         verbose: bool = True,
+
+        cpu_workers: int = 4,
+        embed_batching: bool = False,
+        rerank_batching: bool = False,
+        rerank_max_batch_size: int = 64,
+        rerank_max_wait_ms: float = 5.0,
+        rerank_cache_size: int = 4096,
+        rerank_cache_path: Optional[str] = None,
+        inference_backend: str = "fp32",
+        model_artifact_dir: str = "./model_artifacts",
+        dense_backend: str = "chroma",
+        dense_dtype: str = "float32",
+        dense_rescore_factor: int = 4,
+        fusion: str = "alpha",
+        rrf_k: int = 60,
+        compression_workers: int = 5,
+        compression_deadline: Optional[float] = None,
+
+        enable_answer_cache: bool = False,
+        answer_cache_threshold: float = 0.95,
+        answer_cache_size: int = 256,
+
+        ingest_workers: int = 1,
+        ingest_timeout: Optional[float] = None,
+        streaming_build: bool = False,
+        stream_batch_size: int = 64,
     ):
         self.data_paths = data_paths
         self.persist_dir = persist_dir
@@ -34,10 +76,55 @@ class RAGPipeline:
         self.top_k = top_k
         self.verbose = verbose
 
+        # Bounded executor for blocking model inference on the async path.
+        self._cpu_executor = ThreadPoolExecutor(
+            max_workers=cpu_workers,
+            thread_name_prefix="rag-cpu",
+        )
+        self.embed_batching = embed_batching
+        self.inference_backend = inference_backend
+        self.model_artifact_dir = model_artifact_dir
+        self.dense_backend = dense_backend
+        self.dense_dtype = dense_dtype
+        self.dense_rescore_factor = dense_rescore_factor
+        self.fusion = fusion
+        self.rrf_k = rrf_k
+        self.rerank_batching = rerank_batching
+        self.rerank_max_batch_size = rerank_max_batch_size
+        self.rerank_max_wait_ms = rerank_max_wait_ms
+        self.compression_workers = compression_workers
+        self.compression_deadline = compression_deadline
+
+        self.answer_cache = (
+            SemanticAnswerCache(
+                threshold=answer_cache_threshold,
+                max_size=answer_cache_size,
+            )
+            if enable_answer_cache else None
+        )
+
+        # Scores depend only on (model, query, chunk content), so they stay
+        # valid across index rebuilds and can be persisted.
+        self.rerank_score_cache = (
+            RerankScoreCache(
+                max_size=rerank_cache_size,
+                db_path=rerank_cache_path,
+            )
+            if rerank_cache_size > 0 or rerank_cache_path else None
+        )
+
+        self.ingest_workers = ingest_workers
+        self.ingest_timeout = ingest_timeout
+        self.streaming_build = streaming_build
+        self.stream_batch_size = stream_batch_size
+
         # Runtime objects
-        self.chunks = None
-        self.vector_db = None
-        self.retriever = None
+        self.versions = IndexVersions(persist_dir)
+        self._handle: Optional[IndexHandle] = None
+        self._swap_lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self.ingestion_report = None
+        self.embedding_store = None
         self.reranker = None
 
         self.query_transformer = QueryTransformer()
@@ -51,49 +138,420 @@ class RAGPipeline:
     # ------------------------------------------------
     # Index lifecycle
     # ------------------------------------------------
+    # Queries read the index through an IndexHandle. Builds and updates
+    # never modify the live version: they write a new version directory,
+    # then _swap() repoints the handle under a lock and deletes the old
+    # directory once its in-flight queries have released it.
+
+    @property
+    def vector_db(self) -> Optional[Chroma]:
+        return self._handle.vector_db if self._handle else None
+
+    @property
+    def retriever(self) -> Optional[HybridRetriever]:
+        return self._handle.retriever if self._handle else None
+
+    @property
+    def chunks(self) -> Optional[List[Document]]:
+        return self._handle.chunks if self._handle else None
+
+    @property
+    def index_version(self) -> Optional[str]:
+        return self._handle.index_version if self._handle else None
+
+    def _get_embedding_store(self) -> EmbeddingStore:
+        if self.embedding_store is None:
+            self.embedding_store = EmbeddingStore(
+                query_batching=self.embed_batching,
+                backend=self.inference_backend,
+                artifact_dir=self.model_artifact_dir,
+            )
+        return self.embedding_store
+
     def build_index(self, rebuild: bool = False):
 
         if self.verbose:
             print("\n[INDEX] Building / Loading index...")
+
+        with self._build_lock:
+            embedding_store = self._get_embedding_store()
+            fingerprint = ChunkSnapshot.corpus_fingerprint(
+                self.data_paths, self.chunking_mode
+            )
+
+            handle = None
+            stale = False
+            index_dir = self.versions.current_dir()
+
+            if not rebuild and self.versions.has_index(index_dir):
+                vector_db = embedding_store.load_db(persist_directory=index_dir)
+                chunks, stale = self._load_warm_chunks(
+                    index_dir, vector_db, fingerprint
+                )
+                if chunks is not None:
+                    handle = self._make_handle(index_dir, vector_db, chunks)
+
+            if handle is None:
+                handle = self._build_version(fingerprint)
+
+            self._swap(handle)
+            self.versions.remove_stale(keep=[handle.directory])
+
+        if stale:
+            self.update_index()
+
+        if self.verbose:
+            print("[INDEX] Ready.")
+
+    def _make_handle(
+        self,
+        index_dir: str,
+        vector_db: Chroma,
+        chunks: List[Document],
+        previous: Optional[IndexHandle] = None,
+    ) -> IndexHandle:
+        """
+        With the previous handle of an incremental update, its retriever's
+        BM25 and dense indexes are patched rather than rebuilt.
+        """
+
+        if self.verbose:
+            print("Building hybrid retriever...")
+
+        retriever = HybridRetriever(
+            vector_db,
+            chunks,
+            index_dir=os.path.join(index_dir, "bm25_index"),
+            dense_backend=self.dense_backend,
+            dense_dtype=self.dense_dtype,
+            dense_rescore_factor=self.dense_rescore_factor,
+            dense_index_dir=os.path.join(index_dir, "dense_index"),
+            embedding_id=self._get_embedding_store().embedding_id,
+            fusion=self.fusion,
+            rrf_k=self.rrf_k,
+            previous=previous.retriever if previous is not None else None,
+        )
+
+        # Content-based, so answers cached against an older index are
+        # dropped exactly when the chunk list changes.
+        return IndexHandle(
+            directory=index_dir,
+            vector_db=vector_db,
+            retriever=retriever,
+            chunks=chunks,
+            index_version=ChunkSnapshot.chunks_fingerprint(chunks),
+        )
+
+    def _build_version(self, fingerprint: str) -> IndexHandle:
+        """Full build into a new version directory; the live index is untouched."""
+
+        embedding_store = self._get_embedding_store()
+        index_dir = self.versions.new_version_dir()
+
+        try:
+            if self.streaming_build:
+                vector_db, chunks = self._stream_build(embedding_store, index_dir)
+            else:
+                chunks = self._ingest_and_chunk()
+
+                if self.verbose:
+                    print("Creating vector database...")
+
+                vector_db = embedding_store.create_or_load_db(
+                    chunks=chunks,
+                    persist_directory=index_dir,
+                    rebuild=True,
+                )
+
+            self._save_index_state(index_dir, fingerprint, chunks)
+            return self._make_handle(index_dir, vector_db, chunks)
+
+        except Exception:
+            self.versions.remove(index_dir)
+            raise
+
+    def _swap(self, handle: IndexHandle):
+
+        with self._swap_lock:
+            if self.versions.is_versioned(handle.directory):
+                self.versions.publish(handle.directory)
+
+            old, self._handle = self._handle, handle
+
+            if self.answer_cache is not None:
+                self.answer_cache.clear()
+
+        if old is None:
+            return
+
+        if self.verbose:
+            print(f"[INDEX] Swapped index; {old.in_flight} queries draining.")
+
+        # A handle over the same directory shares chromadb's cached
+        # client, so only a replaced directory is closed and deleted.
+        old.retire(
+            (lambda: self._release_version(old))
+            if old.directory != handle.directory else None
+        )
+
+    def _release_version(self, handle: IndexHandle) -> None:
+        EmbeddingStore.close_db(handle.vector_db)
+        self.versions.remove(handle.directory)
+
+    @contextmanager
+    def _acquire_index(self) -> Iterator[IndexHandle]:
+        with self._swap_lock:
+            handle = self._handle.acquire()
+        try:
+            yield handle
+        finally:
+            handle.release()
+
+    def _ingest_and_chunk(self) -> List[Document]:
+
+        if self.verbose:
             print("Loading documents...")
 
-        docs = DataIngestion.ingest(self.data_paths)
+        docs, self.ingestion_report = DataIngestion.ingest_with_report(
+            self.data_paths,
+            workers=self.ingest_workers,
+            file_timeout=self.ingest_timeout,
+        )
 
         if self.verbose:
             print(f"Chunking mode: {self.chunking_mode}")
 
+        chunks = self._chunk_documents(docs)
+
+        if self.verbose:
+            print(f"Generated {len(chunks)} chunks.")
+
+        return chunks
+
+    def _save_index_state(
+        self,
+        index_dir: str,
+        fingerprint: str,
+        chunks: List[Document],
+    ):
+        ChunkSnapshot(
+            fingerprint, chunks, embedding=self._get_embedding_store().embedding_id
+        ).save(index_dir)
+
+        manifest = IndexManifest().scan(self.data_paths)
+        manifest.set_chunks(chunks)
+        manifest.save(index_dir)
+
+    def _stream_build(
+        self,
+        embedding_store: EmbeddingStore,
+        index_dir: str,
+    ) -> Tuple[Chroma, List[Document]]:
+
+        if self.verbose:
+            print("Streaming documents into a new vector database...")
+
+        builder = StreamingIndexBuilder(
+            embedding_store=embedding_store,
+            chunk_fn=self._chunk_documents,
+            batch_size=self.stream_batch_size,
+            workers=self.ingest_workers,
+            file_timeout=self.ingest_timeout,
+            verbose=self.verbose,
+        )
+        vector_db, chunks, self.ingestion_report = builder.build(
+            self.data_paths,
+            persist_directory=index_dir,
+        )
+        return vector_db, chunks
+
+    def _chunk_documents(self, docs: List[Document]) -> List[Document]:
+
         if self.chunking_mode == "recursive":
-            self.chunks = Chunking.recursive_chunking(docs)
+            chunks = Chunking.recursive_chunking(docs)
 
         elif self.chunking_mode == "semantic":
-            self.chunks = Chunking.semantic_chunking(docs)
+            chunks = Chunking.semantic_chunking(docs)
 
         else:
             raise ValueError(f"Invalid chunking mode: {self.chunking_mode}")
 
-        if self.verbose:
-            print(f"Generated {len(self.chunks)} chunks.")
-            print("Creating / loading vector database...")
+        # Empty chunks are dropped here, as the streaming build does, so both
+        # build paths produce the same chunk list.
+        return [
+            doc for doc in Chunking.assign_chunk_ids(chunks)
+            if isinstance(doc.page_content, str) and doc.page_content.strip()
+        ]
 
-        embedding_store = EmbeddingStore()
-        self.vector_db = embedding_store.create_or_load_db(
-            chunks=self.chunks,
-            persist_directory=self.persist_dir,
-            rebuild=rebuild,
-        )
+    def _load_warm_chunks(
+        self,
+        index_dir: str,
+        vector_db: Chroma,
+        fingerprint: str,
+    ) -> Tuple[Optional[List[Document]], bool]:
+        """
+        Returns (chunks, stale) for an existing index without touching the
+        source files. stale is True when the sources changed since the
+        snapshot was written, or are unknown for chunks recovered from
+        Chroma, and the index needs an incremental update.
+        Returns no chunks, forcing a full rebuild, when the index was
+        embedded with another model or backend.
+        """
+        embedding_id = self._get_embedding_store().embedding_id
+        snapshot = ChunkSnapshot.load(index_dir)
+
+        embedded_with = (
+            snapshot.embedding if snapshot is not None else None
+        ) or EmbeddingStore.LEGACY_EMBEDDING_ID
+        if embedded_with != embedding_id:
+            if self.verbose:
+                print(
+                    f"Index was embedded with {embedded_with}, "
+                    f"now using {embedding_id}; rebuilding."
+                )
+            return None, False
+
+        if snapshot is not None:
+            stale = snapshot.fingerprint != fingerprint
+
+            if self.verbose:
+                print(f"Loaded {len(snapshot.chunks)} chunks from snapshot.")
+                if stale:
+                    print("Source files changed since last snapshot.")
+            return snapshot.chunks, stale
+
+        chunks = ChunkSnapshot.chunks_from_chroma(vector_db)
+        if not chunks:
+            return None, False
 
         if self.verbose:
-            print("Building hybrid retriever...")
+            print(f"Recovered {len(chunks)} chunks from Chroma.")
+
+        # Nothing records which sources this Chroma was built from, so the
+        # snapshot gets an unknown fingerprint and is reconciled as stale.
+        ChunkSnapshot("", chunks, embedding=embedding_id).save(index_dir)
+        return chunks, True
+
+    def rebuild_index(self, incremental: bool = False):
+        """
+        Rebuilds into a new version and swaps it in; queries keep using the
+        old version until the swap. Safe to call while serving.
+        """
+        if incremental:
+            self.update_index()
+            return
+
+        if self.verbose:
+            print("\n[INDEX] Rebuilding index...")
 
-        self.retriever = HybridRetriever(self.vector_db, self.chunks)
+        with self._build_lock:
+            fingerprint = ChunkSnapshot.corpus_fingerprint(
+                self.data_paths, self.chunking_mode
+            )
+            self._swap(self._build_version(fingerprint))
 
         if self.verbose:
             print("[INDEX] Ready.")
 
-    def rebuild_index(self):
+    def update_index(self):
+        """
+        Re-indexes only the source files that were added, changed or removed
+        since the last build, using the per-file manifest and chunk IDs.
+        The update is applied to a copy of the live version, which is then
+        swapped in; the BM25 and dense indexes are patched from the live
+        ones, so only the new chunks are tokenized and read back. Falls back to a full rebuild when no usable manifest
+        exists.
+        """
         if self.verbose:
-            print("\n[INDEX] Rebuilding index...")
-        self.build_index(rebuild=True)
+            print("\n[INDEX] Updating index incrementally...")
+
+        with self._build_lock:
+            live = self._handle
+            manifest = (
+                IndexManifest.load(live.directory) if live is not None else None
+            )
+
+            if manifest is None:
+                if self.verbose:
+                    print("No index manifest found, running full rebuild.")
+                fingerprint = ChunkSnapshot.corpus_fingerprint(
+                    self.data_paths, self.chunking_mode
+                )
+                self._swap(self._build_version(fingerprint))
+                return
+
+            current = manifest.scan(self.data_paths)
+            added, changed, removed = manifest.diff(current)
+
+            if not (added or changed or removed):
+                if self.verbose:
+                    print("[INDEX] No source changes detected.")
+                return
+
+            if self.verbose:
+                print(
+                    f"Added: {len(added)}, changed: {len(changed)}, "
+                    f"removed: {len(removed)} files."
+                )
+
+            stale_ids = set()
+            for path in changed + removed:
+                stale_ids.update(manifest.files[path].get("chunk_ids", []))
+
+            new_chunks: List[Document] = []
+            for path in added + changed:
+                try:
+                    docs = DataIngestion.load_file(Path(path))
+                    file_chunks = self._chunk_documents(docs)
+                except Exception as e:
+                    print(f"[SKIP] {path} → {e}")
+                    del current.files[path]
+                    continue
+
+                current.files[path]["chunk_ids"] = [
+                    doc.metadata["chunk_id"] for doc in file_chunks
+                ]
+                new_chunks.extend(file_chunks)
+
+            for path, entry in current.files.items():
+                if path not in added and path not in changed:
+                    entry["chunk_ids"] = manifest.files[path].get("chunk_ids", [])
+
+            index_dir = self.versions.copy_version(live.directory)
+
+            try:
+                embedding_store = self._get_embedding_store()
+                vector_db = embedding_store.load_db(persist_directory=index_dir)
+
+                EmbeddingStore.delete_chunks(vector_db, sorted(stale_ids))
+                if new_chunks:
+                    embedding_store.upsert_chunks(vector_db, new_chunks)
+
+                chunks = [
+                    doc for doc in live.chunks
+                    if doc.metadata.get("chunk_id") not in stale_ids
+                ] + new_chunks
+
+                fingerprint = ChunkSnapshot.corpus_fingerprint(
+                    self.data_paths, self.chunking_mode
+                )
+                ChunkSnapshot(
+                    fingerprint, chunks, embedding=embedding_store.embedding_id
+                ).save(index_dir)
+                current.save(index_dir)
+
+                handle = self._make_handle(index_dir, vector_db, chunks, previous=live)
+
+            except Exception:
+                self.versions.remove(index_dir)
+                raise
+
+            self._swap(handle)
+
+        if self.verbose:
+            print(
+                f"[INDEX] Updated: -{len(stale_ids)} / +{len(new_chunks)} chunks."
+            )
 
     # ------------------------------------------------
     # Model lifecycle
@@ -104,7 +562,14 @@ class RAGPipeline:
             print("\n[MODELS] Loading models...")
 
         if self.enable_rerank:
-            self.reranker = ReRanker()
+            self.reranker = ReRanker(
+                enable_batching=self.rerank_batching,
+                max_batch_size=self.rerank_max_batch_size,
+                max_wait_ms=self.rerank_max_wait_ms,
+                score_cache=self.rerank_score_cache,
+                backend=self.inference_backend,
+                artifact_dir=self.model_artifact_dir,
+            )
             if self.verbose:
                 print("Re-ranker enabled.")
         else:
@@ -112,10 +577,14 @@ class RAGPipeline:
             if self.verbose:
                 print("Re-ranker disabled.")
 
-        self.llm = LocalLLM()
+        self.llm = LocalLLM.shared()
 
         if self.enable_compression:
-            self.compressor = ContextCompressor(self.llm)
+            self.compressor = ContextCompressor(
+                self.llm,
+                max_workers=self.compression_workers,
+                deadline=self.compression_deadline,
+            )
             if self.verbose:
                 print("Context compression enabled.")
         else:
@@ -123,7 +592,7 @@ class RAGPipeline:
             if self.verbose:
                 print("Context compression disabled.")
 
-        self.generator = RAGGenerator()
+        self.generator = RAGGenerator(llm=self.llm)
 
         if self.verbose:
             print("[MODELS] Ready.")
@@ -145,6 +614,40 @@ class RAGPipeline:
     # ------------------------------------------------
     # Query execution
     # ------------------------------------------------
+    def _cache_lookup(self, query_vector, index_version: str) -> Optional[str]:
+
+        cached = self.answer_cache.lookup(query_vector, index_version)
+        if cached is None:
+            return None
+
+        if self.verbose:
+            print(
+                f"Answer cache hit (similarity "
+                f"{cached['similarity']:.3f}): {cached['query']}"
+            )
+        return cached["answer"]
+
+    def _cache_store(
+        self,
+        query: str,
+        query_vector,
+        answer: str,
+        context_docs: List[Document],
+        index_version: str,
+    ):
+        if query_vector is None or answer.startswith("Generation failed"):
+            return
+
+        self.answer_cache.store(
+            query=query,
+            query_vector=query_vector,
+            answer=answer,
+            chunk_ids=[
+                doc.metadata.get("chunk_id", "") for doc in context_docs
+            ],
+            index_version=index_version,
+        )
+
     def run(self, query: str) -> str:
 
         self.ready()
@@ -152,41 +655,220 @@ class RAGPipeline:
         if self.verbose:
             print(f"\nUser Query: {query}")
 
+        # The index is held only while the context is built; generation
+        # does not read it.
+        with self._acquire_index() as index:
+            index_version = index.index_version
+
+            # Semantic answer cache
+            query_vector = None
+            if self.answer_cache is not None:
+                query_vector = index.retriever.vectorstore.embeddings.embed_query(query)
+                cached = self._cache_lookup(query_vector, index_version)
+                if cached is not None:
+                    return cached
+
+            compressed_docs = self._prepare_context(query, index)
+
+        if compressed_docs is None:
+            return "No relevant documents found."
+
+        # Generation
+        answer = self.generator.generate_with_citations(
+            query=query,
+            context_docs=compressed_docs,
+        )
+
+        self._cache_store(
+            query, query_vector, answer, compressed_docs, index_version
+        )
+
+        return answer
+
+    async def _run_cpu(self, fn, *args):
+        """
+        Runs blocking model inference on the bounded CPU executor, in a copy
+        of the caller's context so stage timings reach the request.
+        """
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(
+            self._cpu_executor, context.run, fn, *args
+        )
+
+    async def arun(self, query: str) -> str:
+        """
+        Async equivalent of run(): embedding, retrieval and rerank run on the
+        dedicated CPU executor, LLM calls are awaited on the async client.
+        """
+        self.ready()
+
+        if self.verbose:
+            print(f"\nUser Query: {query}")
+
+        with self._acquire_index() as index:
+            index_version = index.index_version
+
+            query_vector = None
+            if self.answer_cache is not None:
+                query_vector = await self._run_cpu(
+                    index.retriever.vectorstore.embeddings.embed_query, query
+                )
+                cached = self._cache_lookup(query_vector, index_version)
+                if cached is not None:
+                    return cached
+
+            compressed_docs = await self._aprepare_context(query, index)
+
+        if compressed_docs is None:
+            return "No relevant documents found."
+
+        answer = await self.generator.agenerate_with_citations(
+            query=query,
+            context_docs=compressed_docs,
+        )
+
+        self._cache_store(
+            query, query_vector, answer, compressed_docs, index_version
+        )
+
+        return answer
+
+    async def astream(self, query: str) -> AsyncIterator[Dict]:
+        """
+        Streams an answer as events: {"event": "token", "token": ...} for
+        each generated token, then {"event": "done", "sources": [...]}.
+        Closing the iterator cancels the upstream generation.
+        """
+        self.ready()
+
+        compressed_docs = await self.aprepare_context(query)
+
+        if compressed_docs is None:
+            yield {"event": "token", "token": "No relevant documents found."}
+            yield {"event": "done", "sources": []}
+            return
+
+        tokens = self.generator.astream_with_citations(query, compressed_docs)
+        try:
+            async for token in tokens:
+                yield {"event": "token", "token": token}
+        finally:
+            await tokens.aclose()
+
+        yield {
+            "event": "done",
+            "sources": self.generator.context_sources(compressed_docs),
+        }
+
+    def prepare_context(self, query: str) -> Optional[List[Document]]:
+        """
+        Runs query expansion, retrieval, dedup, rerank and compression.
+        Returns the context documents for generation, or None when nothing
+        was retrieved.
+        """
+        with self._acquire_index() as index:
+            return self._prepare_context(query, index)
+
+    async def aprepare_context(self, query: str) -> Optional[List[Document]]:
+        with self._acquire_index() as index:
+            return await self._aprepare_context(query, index)
+
+    def _prepare_context(
+        self,
+        query: str,
+        index: IndexHandle,
+    ) -> Optional[List[Document]]:
+
+        retrieved_docs = self._retrieve_candidates(query, index)
+
+        if retrieved_docs is None:
+            return None
+
+        reranked_docs = self._rerank(query, retrieved_docs)
+
+        return self._compress(query, reranked_docs)
+
+    async def _aprepare_context(
+        self,
+        query: str,
+        index: IndexHandle,
+    ) -> Optional[List[Document]]:
+
+        retrieved_docs = await self._run_cpu(
+            self._retrieve_candidates, query, index
+        )
+
+        if retrieved_docs is None:
+            return None
+
+        reranked_docs = await self._run_cpu(self._rerank, query, retrieved_docs)
+
+        if self.enable_compression and self.compressor:
+            with timed("compression"):
+                compressed_docs = await self.compressor.acompress_documents(
+                    query=query,
+                    documents=reranked_docs,
+                )
+            count_documents("compressed", len(compressed_docs))
+            if self.verbose:
+                print("Compression applied.")
+        else:
+            compressed_docs = reranked_docs
+            if self.verbose:
+                print("Compression skipped.")
+
+        return compressed_docs
+
+    def _retrieve_candidates(
+        self,
+        query: str,
+        index: IndexHandle,
+    ) -> Optional[List[Document]]:
+
         # Query transformation
-        queries = self.query_transformer.multi_query(query)
+        with timed("query_expansion"):
+            queries = self.query_transformer.multi_query(query)
 
         if self.verbose:
             print(f"Expanded Queries: {queries}")
 
         # Retrieval
-        retrieved: List[Tuple[Document, float]] = []
+        retrieved: List[Tuple[Document, float]] = index.retriever.retrieve_many(
+            queries, k=self.top_k
+        )
 
-        for q in queries:
-            retrieved.extend(
-                self.retriever.retrieve(q, k=self.top_k)
-            )
+        count_documents("retrieved", len(retrieved))
 
         if not retrieved:
-            return "No relevant documents found."
+            return None
 
         # Deduplicate
         unique_docs = {}
         for doc, score in retrieved:
-            key = doc.page_content[:200]
+            # By content, so identical boilerplate chunks from different
+            # files or pages take one rerank / context slot.
+            key = ChunkStore.content_hash_of(doc)
             if key not in unique_docs:
                 unique_docs[key] = (doc, score)
 
         retrieved_docs = [v[0] for v in unique_docs.values()]
+        count_documents("deduped", len(retrieved_docs))
 
         if self.verbose:
             print(f"Retrieved {len(retrieved_docs)} unique documents.")
 
-        # Re-ranking
+        return retrieved_docs
+
+    def _rerank(self, query: str, retrieved_docs: List[Document]) -> List[Document]:
+
         if self.enable_rerank and self.reranker:
-            reranked = self.reranker.rerank(
-                query, retrieved_docs, top_n=self.top_k
-            )
+            with timed("rerank"):
+                reranked = self.reranker.rerank(
+                    query, retrieved_docs, top_n=self.top_k
+                )
             reranked_docs = [doc for doc, _ in reranked]
+            count_documents("reranked", len(reranked_docs))
             if self.verbose:
                 print("Reranking applied.")
         else:
@@ -194,12 +876,17 @@ class RAGPipeline:
             if self.verbose:
                 print("Reranking skipped.")
 
-        # Context compression
+        return reranked_docs
+
+    def _compress(self, query: str, reranked_docs: List[Document]) -> List[Document]:
+
         if self.enable_compression and self.compressor:
-            compressed_docs = self.compressor.compress_documents(
-                query=query,
-                documents=reranked_docs,
-            )
+            with timed("compression"):
+                compressed_docs = self.compressor.compress_documents(
+                    query=query,
+                    documents=reranked_docs,
+                )
+            count_documents("compressed", len(compressed_docs))
             if self.verbose:
                 print("Compression applied.")
         else:
@@ -207,18 +894,13 @@ class RAGPipeline:
             if self.verbose:
                 print("Compression skipped.")
 
-        # Generation
-        answer = self.generator.generate_with_citations(
-            query=query,
-            context_docs=compressed_docs,
-        )
-
-        return answer
+        return compressed_docs
 
     
     def retrieve_for_evaluation(self, query: str, k: int):
     
-        retrieved = self.retriever.retrieve(query, k=20)
+        with self._acquire_index() as index:
+            retrieved = index.retriever.retrieve(query, k=20)
 
         docs = [doc for doc, _ in retrieved]
         
@@ -1,8 +1,16 @@
-from sentence_transformers import CrossEncoder
 from langchain_core.documents import Document
 from typing import List,Tuple,Optional
 import torch
 
+from src.chunk_store import ChunkStore
+from src.inference_backend import (
+    DEFAULT_ARTIFACT_DIR,
+    load_cross_encoder,
+    resolve_backend,
+)
+from src.micro_batcher import MicroBatcher
+from src.score_cache import RerankScoreCache
+
 
 class ReRanker:
     
@@ -11,15 +19,88 @@ class ReRanker:
         model_name:str="cross-encoder/ms-marco-MiniLM-L-6-v2",
         device:Optional[str]=None,
         batch_size:int=16,
+        enable_batching:bool=False,
+        max_batch_size:int=64,
+        max_wait_ms:float=5.0,
+        score_cache:Optional[RerankScoreCache]=None,
+        backend:str="fp32",
+        artifact_dir:str=DEFAULT_ARTIFACT_DIR,
     ): 
         if device is None:
             device= "cuda" if torch.cuda.is_available() else "cpu"
             
-        print(f"Loading re-ranker model on {device}: {model_name}")
-        self.model=CrossEncoder(model_name,device=device)
+        self.backend=resolve_backend(model_name,backend,device,artifact_dir)
+        
+        print(f"Loading re-ranker model on {device} ({self.backend}): {model_name}")
+        self.model=load_cross_encoder(model_name,self.backend,device,artifact_dir)
+        self.model_name=model_name
+        # Scores differ slightly between backends, so they are cached apart.
+        self.cache_key_model=(
+            model_name if self.backend=="fp32" else f"{model_name}@{self.backend}"
+        )
         self.batch_size=batch_size
+        self.score_cache=score_cache
+        
+        # Shared scheduler that merges (query, passage) pairs from concurrent
+        # requests into one predict call.
+        self.batcher=None
+        if enable_batching:
+            self.batcher=MicroBatcher(
+                lambda pairs:self.model.predict(
+                    pairs,
+                    batch_size=max_batch_size,
+                    show_progress_bar=False,
+                ),
+                max_batch_size=max_batch_size,
+                max_wait_ms=max_wait_ms,
+                name="rerank-batcher",
+            )
+            
         print("Re-Ranker ready")
         
+        
+    def _predict(self,pairs:List[List[str]])->List[float]:
+        
+        if self.batcher is not None:
+            return self.batcher.submit(pairs)
+        
+        return self.model.predict(
+            pairs,
+            batch_size=self.batch_size,
+            show_progress_bar=False
+        )
+        
+    
+    @staticmethod
+    def _cache_key(doc:Document)->str:
+        chunk_id=doc.metadata.get("chunk_id")
+        if chunk_id:
+            return chunk_id
+        return "md5:"+ChunkStore.content_hash_of(doc)
+        
+    
+    def _score(self,query:str,pairs:List[List[str]],keys:List[str])->List[float]:
+        
+        if self.score_cache is None:
+            return self._predict(pairs)
+        
+        cached=self.score_cache.get_many(self.cache_key_model,query,keys)
+        
+        # Only pairs the cache has never seen go to the model; duplicates
+        # within one call are scored once.
+        missing={}
+        for i,key in enumerate(keys):
+            if key not in cached and key not in missing:
+                missing[key]=i
+                
+        if missing:
+            new_scores=self._predict([pairs[i] for i in missing.values()])
+            fresh=[(key,float(score)) for key,score in zip(missing,new_scores)]
+            self.score_cache.put_many(self.cache_key_model,query,fresh)
+            cached.update(fresh)
+            
+        return [cached[key] for key in keys]
+        
     
     def rerank(
         self,
@@ -36,6 +117,7 @@ class ReRanker:
         
         pairs=[]
         valid_docs=[]
+        keys=[]
         
         for doc in documents:
             text=doc.page_content.strip()
@@ -44,15 +126,12 @@ class ReRanker:
             
             pairs.append([query,text])
             valid_docs.append(doc)
+            keys.append(self._cache_key(doc))
             
         if not pairs:
             return []
         
-        scores = self.model.predict(
-            pairs,
-            batch_size=self.batch_size,
-            show_progress_bar=False
-        )
+        scores = self._score(query,pairs,keys)
         
         scored_docs= list(zip(valid_docs,scores))
         
@@ -1,15 +1,61 @@
-from rank_bm25 import BM25Okapi
 from langchain_core.documents import Document
-from typing import List,Tuple,Dict
+from typing import List,Tuple,Optional
 import numpy as np 
 
+from src.chunk_store import ChunkStore
+from src.dense_index import FlatDenseIndex, stored_embeddings
+from src.index_snapshot import ChunkSnapshot
+from src.metrics import timed
+from src.sparse_index import BM25Index
+
 class HybridRetriever:
     
-    def __init__(self,vectorstore,documents:List[Document]):
+    TOKENIZER_VERSION="lower-split-v1"
+    DENSE_BACKENDS=("chroma","numpy")
+    FUSION_MODES=("alpha","rrf")
+    
+    def __init__(
+        self,
+        vectorstore,
+        documents:List[Document],
+        index_dir:Optional[str]=None,
+        dense_backend:str="chroma",
+        dense_dtype:str="float32",
+        dense_rescore_factor:int=4,
+        dense_index_dir:Optional[str]=None,
+        embedding_id:Optional[str]=None,
+        fusion:str="alpha",
+        rrf_k:int=60,
+        previous:Optional["HybridRetriever"]=None,
+    ):
+        if dense_backend not in self.DENSE_BACKENDS:
+            raise ValueError(f"Unknown dense backend: {dense_backend}")
+        if fusion not in self.FUSION_MODES:
+            raise ValueError(f"Unknown fusion mode: {fusion}")
         
         self.vectorstore=vectorstore
         self.documents=documents
-        self._build_bm25(documents)
+        self.store=ChunkStore(documents)
+        self.index_dir=index_dir
+        self.fusion=fusion
+        self.rrf_k=rrf_k
+        
+        # An incremental update passes the retriever it replaces, so its
+        # BM25 and dense indexes are patched instead of rebuilt.
+        update=self._plan_update(previous,documents)
+        self._load_or_build_bm25(documents,update)
+        
+        # "numpy" answers dense queries from an in-process FlatDenseIndex
+        # built from the collection's stored embeddings; Chroma is then only
+        # used to persist and update the vectors.
+        self.dense_backend=dense_backend
+        self.dense_dtype=dense_dtype
+        self.dense_rescore_factor=dense_rescore_factor
+        self.dense_index_dir=dense_index_dir
+        self.embedding_id=embedding_id
+        self.dense=None
+        if dense_backend=="numpy":
+            self._load_or_build_dense(documents,update)
         
         print(f"Hybrid Retriever initialized with {len(documents)} documents")
         
@@ -20,10 +66,7 @@ class HybridRetriever:
     
     @staticmethod
     def _doc_uid(doc:Document)->str:
-        
-        src=doc.metadata.get("source","unknown")
-        page=doc.metadata.get("page","na")
-        return f"{src}::page={page}::hash={hash(doc.page_content)}"
+        return ChunkStore.doc_uid(doc)
     
     
     
@@ -39,20 +82,307 @@ class HybridRetriever:
         return scores
     
     
-    def _build_bm25(self,documents:List[Document])->None:
-        tokenized_docs=[
-            self._tokenize(doc.page_content)
-            for doc in documents
-        ]
-        self.bm25=BM25Okapi(tokenized_docs)
+    @staticmethod
+    def _plan_update(
+        previous:Optional["HybridRetriever"],
+        documents:List[Document],
+    ) -> Optional[Tuple["HybridRetriever",np.ndarray,List[Document]]]:
+        """
+        (previous, keep, new documents) for an incremental update: documents
+        starts with the surviving previous.documents (the same objects, in
+        order), masked by keep; everything after them is new. None without
+        a previous retriever.
+        """
+        if previous is None:
+            return None
         
+        keep=np.zeros(len(previous.documents),dtype=bool)
+        num_kept=0
+        for i,doc in enumerate(previous.documents):
+            if num_kept<len(documents) and documents[num_kept] is doc:
+                keep[i]=True
+                num_kept+=1
         
-    def refresh_documents(self,documents:List[Document])->None:
+        return previous,keep,documents[num_kept:]
+    
+    
+    def _build_bm25(self,documents:List[Document],update=None)->None:
+        if update is not None:
+            previous,keep,new_documents=update
+            print(
+                f"Updating BM25 index: -{int((~keep).sum())} / "
+                f"+{len(new_documents)} documents"
+            )
+            self.bm25=previous.bm25.update(
+                keep,
+                [self._tokenize(doc.page_content) for doc in new_documents],
+            )
+            return
         
-        self.documents=documents
-        self._build_bm25(documents)
+        self.bm25=BM25Index.build(
+            [self._tokenize(doc.page_content) for doc in documents]
+        )
+        
+        
+    def _bm25_fingerprint(self,documents:List[Document])->str:
+        return (
+            f"{self.TOKENIZER_VERSION}:"
+            f"{ChunkSnapshot.chunks_fingerprint(documents)}"
+        )
+        
+        
+    def _load_or_build_bm25(self,documents:List[Document],update=None)->None:
+        
+        if self.index_dir is None:
+            self._build_bm25(documents,update)
+            return
+        
+        fingerprint=self._bm25_fingerprint(documents)
+        index=BM25Index.load(self.index_dir,fingerprint)
+        
+        if index is not None:
+            self.bm25=index
+            return
+        
+        if update is None:
+            print("BM25 index missing or stale, rebuilding...")
+        self._build_bm25(documents,update)
+        self.bm25.save(self.index_dir,fingerprint)
+        
+        
+    def _dense_fingerprint(self,documents:List[Document])->str:
+        return (
+            f"{self.dense_dtype}:{self.embedding_id}:"
+            f"{ChunkSnapshot.chunks_fingerprint(documents)}"
+        )
         
         
+    def _build_dense(self,documents:List[Document],update=None)->FlatDenseIndex:
+        if update is not None and update[0].dense is not None:
+            previous,keep,new_documents=update
+            print(
+                f"Updating dense index: -{int((~keep).sum())} / "
+                f"+{len(new_documents)} vectors"
+            )
+            return previous.dense.update(
+                keep,
+                stored_embeddings(self.vectorstore,new_documents),
+                dtype=self.dense_dtype,
+                rescore_factor=self.dense_rescore_factor,
+            )
+        
+        return FlatDenseIndex.build(
+            stored_embeddings(self.vectorstore,documents),
+            dtype=self.dense_dtype,
+            rescore_factor=self.dense_rescore_factor,
+        )
+        
+        
+    def _load_or_build_dense(self,documents:List[Document],update=None)->None:
+        
+        fingerprint=self._dense_fingerprint(documents)
+        
+        if self.dense_index_dir is not None:
+            index=FlatDenseIndex.load(
+                self.dense_index_dir,
+                fingerprint,
+                rescore_factor=self.dense_rescore_factor,
+            )
+            if index is not None:
+                self.dense=index
+                return
+            
+            if update is None:
+                print("Dense index missing or stale, rebuilding...")
+        
+        index=self._build_dense(documents,update)
+        
+        if self.dense_index_dir is not None:
+            index.save(self.dense_index_dir,fingerprint)
+            # Reopen memory-mapped so the float32 copy kept for rescoring is
+            # paged in on demand instead of staying resident.
+            index=FlatDenseIndex.load(
+                self.dense_index_dir,
+                fingerprint,
+                rescore_factor=self.dense_rescore_factor,
+            ) or index
+        
+        self.dense=index
+        
+        
+    def _dense_search_many(
+        self,
+        queries:List[str],
+        k:int,
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Embeds all queries in one batch and runs a single multi-embedding
+        collection query (or one matmul on the flat index). Returns each
+        query's hits as (canonical chunk positions, distances), nearest
+        first. Equivalent to calling similarity_search_with_score once per
+        query.
+        """
+        embeddings=self.vectorstore.embeddings
+        with timed("query_embedding"):
+            if hasattr(embeddings,"embed_queries"):
+                query_embeddings=embeddings.embed_queries(queries)
+            else:
+                query_embeddings=embeddings.embed_documents(queries)
+        
+        if self.dense is not None:
+            with timed("dense_search"):
+                hits=self.dense.search_many(query_embeddings,k)
+            return [
+                (self.store.canonical[positions],distances)
+                for positions,distances in hits
+            ]
+        
+        # langchain's Chroma wrapper has no multi-query search, so go to the
+        # underlying collection directly.
+        with timed("dense_search"):
+            results=self.vectorstore._collection.query(
+                query_embeddings=query_embeddings,
+                n_results=k,
+                include=["documents","metadatas","distances"],
+            )
+        
+        per_query=[]
+        for texts,metadatas,distances in zip(
+            results["documents"],
+            results["metadatas"],
+            results["distances"],
+        ):
+            positions=[]
+            kept=[]
+            for text,metadata,distance in zip(texts,metadatas,distances):
+                position=self.store.position(
+                    Document(page_content=text,metadata=metadata or {})
+                )
+                # The collection and the chunk list belong to the same index
+                # version, so this only skips vectors that drifted from it.
+                if position is None:
+                    continue
+                positions.append(position)
+                kept.append(distance)
+            
+            per_query.append((
+                np.asarray(positions,dtype=np.int64),
+                np.asarray(kept,dtype=np.float64),
+            ))
+            
+        return per_query
+    
+    
+    @staticmethod
+    def _dedupe(positions:np.ndarray,values:np.ndarray)->Tuple[np.ndarray,np.ndarray,np.ndarray]:
+        """
+        Keeps the best-ranked hit per position (identical chunks share one).
+        Returns (positions, values, 1-based ranks among the kept hits).
+        """
+        unique,first=np.unique(positions,return_index=True)
+        ranks=np.empty(len(first),dtype=np.int64)
+        ranks[np.argsort(first)]=np.arange(1,len(first)+1)
+        return unique,values[first],ranks
+    
+    
+    @staticmethod
+    def _top_k(positions:np.ndarray,scores:np.ndarray,k:int)->Tuple[np.ndarray,np.ndarray]:
+        """Top k (positions, scores), best first, ties broken by position."""
+        if k<=0:
+            return positions[:0],scores[:0]
+        
+        if len(scores)>k:
+            part=np.argpartition(-scores,k-1)[:k]
+            # Same boundary-tie handling as BM25Index.top_k.
+            kth=scores[part].min()
+            part=np.flatnonzero(scores>=kth)
+        else:
+            part=np.arange(len(scores))
+            
+        order=np.lexsort((positions[part],-scores[part]))[:k]
+        top=part[order]
+        return positions[top],scores[top]
+    
+    
+    def _fuse(
+        self,
+        dense_positions:np.ndarray,
+        dense_distances:np.ndarray,
+        bm25_positions:np.ndarray,
+        bm25_scores:np.ndarray,
+        k:int,
+        alpha:float,
+        bm25_k:int,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Fuses one query's dense and BM25 hits over canonical chunk positions
+        and returns the top k (positions, scores).
+
+        "alpha" blends min-max normalized scores, alpha * dense +
+        (1 - alpha) * sparse. "rrf" sums 1 / (rrf_k + rank) over both lists
+        and ignores alpha.
+
+        BM25 hits with score <= 0 and dense hits without a distance are
+        dropped before ranking, so they never earn an RRF share.
+        """
+        dense_distances=np.asarray(dense_distances,dtype=np.float64)
+        bm25_scores=np.asarray(bm25_scores,dtype=np.float64)
+        
+        # BM25Index.top_k returns only matching documents. A list shorter
+        # than bm25_k used to be padded with zero scores, so it is normalized
+        # against 0 to keep alpha scores unchanged.
+        if len(bm25_scores)<min(bm25_k,len(self.documents)):
+            bm25_normalized=self._normalize(np.append(bm25_scores,0.0))[:-1]
+        else:
+            bm25_normalized=self._normalize(bm25_scores)
+        
+        dense_kept=np.isfinite(dense_distances)
+        bm25_kept=bm25_scores>0
+        
+        dense_positions,dense_scores,dense_ranks=self._dedupe(
+            dense_positions[dense_kept],
+            self._normalize(1/(1 + dense_distances[dense_kept])),
+        )
+        bm25_positions,bm25_scores,bm25_ranks=self._dedupe(
+            bm25_positions[bm25_kept],
+            bm25_normalized[bm25_kept],
+        )
+        
+        if self.fusion=="rrf":
+            weights=np.concatenate([
+                1.0/(self.rrf_k + dense_ranks),
+                1.0/(self.rrf_k + bm25_ranks),
+            ])
+        else:
+            weights=np.concatenate([
+                alpha*dense_scores,
+                (1-alpha)*bm25_scores,
+            ])
+        
+        candidates,inverse=np.unique(
+            np.concatenate([dense_positions,bm25_positions]),
+            return_inverse=True,
+        )
+        fused=np.bincount(
+            inverse,
+            weights=weights,
+            minlength=len(candidates),
+        ).astype(np.float64,copy=False)
+        
+        return self._top_k(candidates,fused,k)
+    
+    
+    def _with_documents(
+        self,
+        positions:np.ndarray,
+        scores:np.ndarray,
+    ) -> List[Tuple[Document, float]]:
+        return [
+            (self.documents[i],score)
+            for i,score in zip(positions.tolist(),scores.tolist())
+        ]
+    
+    
     def retrieve(
         self,
         query:str,
@@ -65,57 +395,69 @@ class HybridRetriever:
             return []
         
         # Dense retrieval
-        dense_results=self.vectorstore.similarity_search_with_score(
-            query,
-            k=k*2
-        )
-        
-        dense_docs= [doc for doc,_ in dense_results]
-        dense_distances=np.array([score for _,score in dense_results])
-        
-        dense_scores=1/(1 + dense_distances)
-        dense_scores=self._normalize(dense_scores)
+        dense_positions,dense_distances=self._dense_search_many([query],k=k*2)[0]
         
         # BM25 retrieval (top-k only)
-        
         tokenized_query= self._tokenize(query)
-        bm25_raw_score=self.bm25.get_scores(tokenized_query)
+        with timed("bm25"):
+            top_bm25_idx,bm25_scores=self.bm25.top_k(tokenized_query,bm25_k)
         
-        top_bm25_idx=np.argsort(bm25_raw_score)[::-1][:bm25_k]
-        bm25_scores=bm25_raw_score[top_bm25_idx]
-        bm25_scores=self._normalize(bm25_scores)
+        with timed("fusion"):
+            positions,scores=self._fuse(
+                dense_positions,
+                dense_distances,
+                self.store.canonical[top_bm25_idx],
+                bm25_scores,
+                k,
+                alpha,
+                bm25_k,
+            )
+            return self._with_documents(positions,scores)
+    
+    
+    def retrieve_many(
+        self,
+        queries:List[str],
+        k:int=10,
+        alpha:float=0.5,
+        bm25_k:int=50,
+    ) -> List[Tuple[Document, float]]:
+        """
+        Retrieves for several query variants with one embedding batch and one
+        vector search, fuses each query's results, and returns the union in
+        query order with duplicates (by chunk) dropped.
+        """
+        queries=[q for q in queries if q and q.strip()]
+        if not queries:
+            return []
         
-        score_map: Dict[str, Dict] = {}
+        dense_per_query=self._dense_search_many(queries,k=k*2)
+        with timed("bm25"):
+            sparse_per_query=self.bm25.top_k_many(
+                [self._tokenize(q) for q in queries],
+                bm25_k,
+            )
         
-        for i,doc in enumerate(dense_docs):
-            uid=self._doc_uid(doc)
-            score_map[uid]={
-                "doc":doc,
-                "score":alpha*dense_scores[i]
-            }
-            
-        for rank,idx in enumerate(top_bm25_idx):
-            doc =self.documents[idx]
-            uid=self._doc_uid(doc)
-            
-            sparse_score=(1-alpha)*bm25_scores[rank]
-            
-            if uid in score_map:
-                score_map[uid]["score"] += sparse_score
-            else:
-                score_map[uid]={
-                    "doc":doc,
-                    "score":sparse_score,
-                }
-                
-                
-        ranked= sorted(
-            score_map.values(),
-            key=lambda x : (x["score"],x["doc"].page_content),
-            reverse=True,
-        )[:k]
+        merged: List[Tuple[Document, float]] = []
+        seen=set()
         
-        return [(item["doc"],float(item["score"])) for item in ranked]
-    
-    
-    
\ No newline at end of file
+        with timed("fusion"):
+            for (dense_positions,dense_distances),(top_bm25_idx,bm25_scores) in zip(
+                dense_per_query,sparse_per_query
+            ):
+                positions,scores=self._fuse(
+                    dense_positions,
+                    dense_distances,
+                    self.store.canonical[top_bm25_idx],
+                    bm25_scores,
+                    k,
+                    alpha,
+                    bm25_k,
+                )
+                for i,score in zip(positions.tolist(),scores.tolist()):
+                    if i in seen:
+                        continue
+                    seen.add(i)
+                    merged.append((self.documents[i],score))
+                
+        return merged
@@ -0,0 +1,231 @@
+from collections import OrderedDict
+from queue import Empty, Queue
+from typing import Dict, List, Optional, Tuple
+import os
+import sqlite3
+import threading
+import time
+
+from src.metrics import CACHES
+
+
+class RerankScoreCache:
+    """
+    Cross-encoder score cache keyed by (model, normalized query, chunk ID).
+
+    The in-memory tier is a bounded LRU. With a db_path, scores are also
+    written to a SQLite file so warm scores survive restarts; memory misses
+    fall back to it before the model is called. Disk writes are queued to a
+    background thread that commits whatever has accumulated in one
+    transaction (WAL, synchronous=NORMAL), so put_many never waits on the
+    disk. The on-disk tier is trimmed by rowid range to at most
+    max_disk_entries, least recently written first.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 4096,
+        db_path: Optional[str] = None,
+        max_disk_entries: int = 1_000_000,
+    ):
+        self.max_size = max_size
+        self.db_path = db_path
+        self.max_disk_entries = max_disk_entries
+
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._writer_conn: Optional[sqlite3.Connection] = None
+        self._writer: Optional[threading.Thread] = None
+        self._pending: Queue = Queue()
+        self._writes_since_trim = 0
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        CACHES.track("rerank_scores", self.stats)
+
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            # One connection for lookups, one owned by the writer thread; WAL
+            # lets lookups run while a batch is being committed.
+            self._writer_conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._writer_conn.execute("PRAGMA journal_mode=WAL")
+            self._writer_conn.execute("PRAGMA synchronous=NORMAL")
+            self._writer_conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS rerank_scores (
+                    model TEXT NOT NULL,
+                    query TEXT NOT NULL,
+                    chunk_id TEXT NOT NULL,
+                    score REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (model, query, chunk_id)
+                )
+                """
+            )
+            self._writer_conn.commit()
+
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._writer = threading.Thread(
+                target=self._write_loop,
+                name="rerank-cache-writer",
+                daemon=True,
+            )
+            self._writer.start()
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        return " ".join(query.split())
+
+    def get_many(
+        self,
+        model: str,
+        query: str,
+        chunk_ids: List[str],
+    ) -> Dict[str, float]:
+        """Returns the cached scores for whichever chunk_ids are known."""
+        query = self.normalize(query)
+        found: Dict[str, float] = {}
+        missing: List[str] = []
+
+        with self._lock:
+            for chunk_id in chunk_ids:
+                key = (model, query, chunk_id)
+                score = self._entries.get(key)
+                if score is None:
+                    missing.append(chunk_id)
+                    continue
+                self._entries.move_to_end(key)
+                found[chunk_id] = score
+
+            self.hits += len(found)
+
+            if missing and self._conn is not None:
+                placeholders = ",".join("?" * len(missing))
+                rows = self._conn.execute(
+                    f"""
+                    SELECT chunk_id, score FROM rerank_scores
+                    WHERE model = ? AND query = ? AND chunk_id IN ({placeholders})
+                    """,
+                    [model, query, *missing],
+                ).fetchall()
+
+                for chunk_id, score in rows:
+                    found[chunk_id] = score
+                    self._remember((model, query, chunk_id), score)
+
+                self.disk_hits += len(rows)
+
+            self.misses += len(chunk_ids) - len(found)
+
+        return found
+
+    def put_many(
+        self,
+        model: str,
+        query: str,
+        scores: List[Tuple[str, float]],
+    ) -> None:
+        query = self.normalize(query)
+
+        with self._lock:
+            for chunk_id, score in scores:
+                self._remember((model, query, chunk_id), float(score))
+
+        if self._writer is not None and scores:
+            now = time.time()
+            self._pending.put([
+                (model, query, chunk_id, float(score), now)
+                for chunk_id, score in scores
+            ])
+
+    def _write_loop(self) -> None:
+        stop = False
+        while not stop:
+            batch = []
+            item = self._pending.get()
+            # Everything queued while the previous commit ran goes into one
+            # transaction.
+            while True:
+                if item is None:
+                    stop = True
+                else:
+                    batch.extend(item)
+                self._pending.task_done()
+                try:
+                    item = self._pending.get_nowait()
+                except Empty:
+                    break
+
+            if batch:
+                self._write_batch(batch)
+
+    def _write_batch(self, rows: List[Tuple[str, str, str, float, float]]) -> None:
+        try:
+            self._writer_conn.executemany(
+                """
+                INSERT OR REPLACE INTO rerank_scores
+                (model, query, chunk_id, score, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                rows,
+            )
+            self._writes_since_trim += len(rows)
+            if self._writes_since_trim >= 1000:
+                self._trim_disk()
+            self._writer_conn.commit()
+        except sqlite3.Error as e:
+            print(f"[CACHE] Dropped {len(rows)} rerank scores → {e}")
+
+    def flush(self) -> None:
+        """Blocks until every queued score has been written to disk."""
+        self._pending.join()
+
+    def _remember(self, key: Tuple[str, str, str], score: float) -> None:
+        if self.max_size <= 0:
+            return
+
+        self._entries[key] = score
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def _trim_disk(self) -> None:
+        # INSERT OR REPLACE gives every write a rowid above all existing
+        # ones, so rowid order is write order and the oldest rows are one
+        # range of the rowid B-tree: no sort or scan of the kept rows.
+        self._writes_since_trim = 0
+        self._writer_conn.execute(
+            """
+            DELETE FROM rerank_scores
+            WHERE rowid <= (SELECT MAX(rowid) FROM rerank_scores) - ?
+            """,
+            (self.max_disk_entries,),
+        )
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.hits + self.disk_hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / total if total else 0.0,
+            }
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._pending.put(None)
+            self._writer.join()
+            self._writer = None
+            self._writer_conn.close()
+            self._writer_conn = None
+
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,403 @@
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import json
+import math
+import os
+import numpy as np
+
+
+class BM25Index:
+    """
+    Okapi BM25 over an inverted index.
+
+    Postings are stored CSR-style (indptr / doc_ids / term_freqs) with IDF and
+    per-document length norms precomputed, so a query only touches the
+    documents that contain at least one query term. Scores are computed with
+    the same formula and operation order as rank_bm25.BM25Okapi, so rankings
+    match the previous retriever.
+
+    The index can be saved to a directory of .npy arrays plus a JSON
+    vocabulary and reopened memory-mapped, tagged with the fingerprint of the
+    chunk list it was built from.
+    """
+
+    VERSION = 1
+    META_FILE = "meta.json"
+    VOCAB_FILE = "vocab.json"
+    ARRAYS = ("indptr", "doc_ids", "term_freqs", "doc_len", "idf")
+
+    def __init__(
+        self,
+        vocab: Dict[str, int],
+        indptr: np.ndarray,
+        doc_ids: np.ndarray,
+        term_freqs: np.ndarray,
+        doc_len: np.ndarray,
+        idf: np.ndarray,
+        k1: float = 1.5,
+        b: float = 0.75,
+        epsilon: float = 0.25,
+    ):
+        self.vocab = vocab
+        self.indptr = indptr
+        self.doc_ids = doc_ids
+        self.term_freqs = term_freqs
+        self.doc_len = doc_len
+        self.idf = idf
+        self.k1 = k1
+        self.b = b
+        self.epsilon = epsilon
+
+        self.corpus_size = len(doc_len)
+        self.avgdl = (
+            float(doc_len.sum()) / self.corpus_size if self.corpus_size else 0.0
+        )
+        self.doc_norm = (
+            k1 * (1 - b + b * doc_len / self.avgdl)
+            if self.avgdl else np.zeros(self.corpus_size)
+        )
+
+    @classmethod
+    def build(
+        cls,
+        tokenized_docs: List[List[str]],
+        k1: float = 1.5,
+        b: float = 0.75,
+        epsilon: float = 0.25,
+    ) -> "BM25Index":
+
+        vocab: Dict[str, int] = {}
+        doc_freq: List[int] = []
+        term_ids: List[int] = []
+        doc_ids: List[int] = []
+        term_freqs: List[int] = []
+        doc_len = np.zeros(len(tokenized_docs), dtype=np.int32)
+
+        for doc_id, tokens in enumerate(tokenized_docs):
+            doc_len[doc_id] = len(tokens)
+
+            for term, freq in Counter(tokens).items():
+                term_id = vocab.get(term)
+                if term_id is None:
+                    term_id = len(vocab)
+                    vocab[term] = term_id
+                    doc_freq.append(0)
+
+                doc_freq[term_id] += 1
+                term_ids.append(term_id)
+                doc_ids.append(doc_id)
+                term_freqs.append(freq)
+
+        term_ids_arr = np.asarray(term_ids, dtype=np.int64)
+        order = np.argsort(term_ids_arr, kind="stable")
+
+        indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(
+            np.bincount(term_ids_arr, minlength=len(vocab)), out=indptr[1:]
+        )
+
+        return cls(
+            vocab=vocab,
+            indptr=indptr,
+            doc_ids=np.asarray(doc_ids, dtype=np.int32)[order],
+            term_freqs=np.asarray(term_freqs, dtype=np.int32)[order],
+            doc_len=doc_len,
+            idf=cls._compute_idf(doc_freq, len(tokenized_docs), epsilon),
+            k1=k1,
+            b=b,
+            epsilon=epsilon,
+        )
+
+    def update(
+        self,
+        keep: np.ndarray,
+        tokenized_docs: List[List[str]],
+    ) -> "BM25Index":
+        """
+        New index over the kept documents, in order, followed by
+        tokenized_docs. Postings of dropped documents are deleted and only
+        the new documents are tokenized and counted; the rest is array
+        work over the existing postings. Terms left without documents are
+        dropped, so scores match a fresh build up to float rounding of the
+        IDF floor.
+        """
+        keep = np.asarray(keep, dtype=bool)
+        new_doc_ids = np.cumsum(keep) - 1
+        num_kept = int(keep.sum())
+
+        # Postings of the kept documents, still grouped by term with
+        # ascending (renumbered) document ids.
+        posting_terms = np.repeat(
+            np.arange(len(self.vocab), dtype=np.int64), np.diff(self.indptr)
+        )
+        kept = keep[self.doc_ids]
+        old_terms = posting_terms[kept]
+        old_docs = new_doc_ids[self.doc_ids[kept]]
+        old_tfs = np.asarray(self.term_freqs)[kept]
+
+        # Postings of the new documents, mapped into the combined vocabulary.
+        added = self.build(tokenized_docs, self.k1, self.b, self.epsilon)
+        terms = [""] * len(self.vocab)
+        for term, term_id in self.vocab.items():
+            terms[term_id] = term
+        vocab = dict(self.vocab)
+        term_map = np.zeros(len(added.vocab), dtype=np.int64)
+        for term, term_id in added.vocab.items():
+            if term not in vocab:
+                vocab[term] = len(terms)
+                terms.append(term)
+            term_map[term_id] = vocab[term]
+
+        added_terms = np.repeat(
+            np.arange(len(added.vocab), dtype=np.int64), np.diff(added.indptr)
+        )
+        new_terms = term_map[added_terms]
+
+        old_counts = np.bincount(old_terms, minlength=len(terms))
+        new_counts = np.bincount(new_terms, minlength=len(terms))
+        counts = old_counts + new_counts
+
+        live = counts > 0
+        term_ids = np.cumsum(live) - 1
+        indptr = np.zeros(int(live.sum()) + 1, dtype=np.int64)
+        np.cumsum(counts[live], out=indptr[1:])
+
+        # Each term's kept postings come first, then its new ones, so
+        # document ids stay ascending within a term as in build().
+        old_rank = np.arange(len(old_terms)) - (np.cumsum(old_counts) - old_counts)[old_terms]
+        old_dest = indptr[term_ids[old_terms]] + old_rank
+        new_rank = np.arange(len(new_terms)) - added.indptr[added_terms]
+        new_dest = indptr[term_ids[new_terms]] + old_counts[new_terms] + new_rank
+
+        doc_ids = np.empty(indptr[-1], dtype=np.int32)
+        term_freqs = np.empty(indptr[-1], dtype=np.int32)
+        doc_ids[old_dest] = old_docs
+        doc_ids[new_dest] = added.doc_ids + num_kept
+        term_freqs[old_dest] = old_tfs
+        term_freqs[new_dest] = added.term_freqs
+
+        doc_len = np.concatenate([
+            np.asarray(self.doc_len)[keep], added.doc_len
+        ]).astype(np.int32)
+
+        return BM25Index(
+            vocab={term: int(term_ids[i]) for i, term in enumerate(terms) if live[i]},
+            indptr=indptr,
+            doc_ids=doc_ids,
+            term_freqs=term_freqs,
+            doc_len=doc_len,
+            idf=self._compute_idf(counts[live].tolist(), len(doc_len), self.epsilon),
+            k1=self.k1,
+            b=self.b,
+            epsilon=self.epsilon,
+        )
+
+    @staticmethod
+    def _compute_idf(
+        doc_freq: List[int],
+        corpus_size: int,
+        epsilon: float,
+    ) -> np.ndarray:
+        # Mirrors BM25Okapi._calc_idf: negative IDFs are floored to
+        # epsilon * average_idf, averaged over the whole vocabulary.
+        idf = np.zeros(len(doc_freq), dtype=np.float64)
+        idf_sum = 0.0
+        negative = []
+
+        for term_id, freq in enumerate(doc_freq):
+            value = math.log(corpus_size - freq + 0.5) - math.log(freq + 0.5)
+            idf[term_id] = value
+            idf_sum += value
+            if value < 0:
+                negative.append(term_id)
+
+        if len(doc_freq):
+            idf[negative] = epsilon * (idf_sum / len(doc_freq))
+
+        return idf
+
+    def _term_scores(self, term_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Postings of one term with its per-document BM25 contribution."""
+        start, end = self.indptr[term_id], self.indptr[term_id + 1]
+        ids = self.doc_ids[start:end]
+        tf = self.term_freqs[start:end]
+
+        return ids, (
+            self.idf[term_id]
+            * (tf * (self.k1 + 1) / (tf + self.doc_norm[ids]))
+        )
+
+    def _score_candidates(
+        self,
+        query_tokens: List[str],
+        term_cache: Optional[Dict[int, Tuple[np.ndarray, np.ndarray]]] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns (doc_ids, scores) for documents matching any query term."""
+        ids_parts = []
+        score_parts = []
+
+        for term in query_tokens:
+            term_id = self.vocab.get(term)
+            if term_id is None:
+                continue
+
+            if term_cache is None:
+                ids, contrib = self._term_scores(term_id)
+            else:
+                if term_id not in term_cache:
+                    term_cache[term_id] = self._term_scores(term_id)
+                ids, contrib = term_cache[term_id]
+
+            ids_parts.append(ids)
+            score_parts.append(contrib)
+
+        if not ids_parts:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)
+
+        all_ids = np.concatenate(ids_parts)
+        candidates, inverse = np.unique(all_ids, return_inverse=True)
+        # bincount accumulates in input order, i.e. query-term order per
+        # document, the same summation order BM25Okapi uses.
+        scores = np.bincount(
+            inverse, weights=np.concatenate(score_parts),
+            minlength=len(candidates),
+        )
+        return candidates.astype(np.int64), scores
+
+    def get_scores(self, query_tokens: List[str]) -> np.ndarray:
+        """Dense score vector over the whole corpus (BM25Okapi compatible)."""
+        scores = np.zeros(self.corpus_size, dtype=np.float64)
+        candidates, candidate_scores = self._score_candidates(query_tokens)
+        scores[candidates] = candidate_scores
+        return scores
+
+    def top_k(
+        self,
+        query_tokens: List[str],
+        k: int,
+        term_cache: Optional[Dict[int, Tuple[np.ndarray, np.ndarray]]] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns (doc_ids, scores) of the k best documents, best first, ties
+        broken by document order. Only documents with a positive score are
+        returned, so a rare-term query yields fewer than k and its cost
+        scales with the postings it touches, not the corpus.
+        """
+        k = min(k, self.corpus_size)
+        if k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)
+
+        candidates, scores = self._score_candidates(query_tokens, term_cache)
+
+        positive = scores > 0
+        if not positive.all():
+            candidates, scores = candidates[positive], scores[positive]
+
+        if len(scores) > k:
+            part = np.argpartition(-scores, k - 1)[:k]
+            # argpartition may split a tie at the boundary arbitrarily; pull
+            # in every document tied with the k-th score before ordering.
+            kth = scores[part].min()
+            part = np.flatnonzero(scores >= kth)
+        else:
+            part = np.arange(len(scores))
+
+        order = np.lexsort((candidates[part], -scores[part]))[:k]
+        top = part[order]
+        return candidates[top], scores[top]
+
+    def top_k_many(
+        self,
+        queries_tokens: List[List[str]],
+        k: int,
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        top_k for several queries in one pass: each distinct term's postings
+        are scored once and shared by every query that contains it.
+        """
+        term_cache: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        return [self.top_k(tokens, k, term_cache) for tokens in queries_tokens]
+
+    def save(self, directory: str, fingerprint: str) -> None:
+        path = Path(directory)
+        os.makedirs(path, exist_ok=True)
+
+        # Drop the metadata first so a half-written index is never loaded.
+        meta_path = path / self.META_FILE
+        if meta_path.exists():
+            meta_path.unlink()
+
+        for name in self.ARRAYS:
+            tmp_path = path / f"{name}.tmp.npy"
+            np.save(tmp_path, getattr(self, name))
+            os.replace(tmp_path, path / f"{name}.npy")
+
+        terms = [""] * len(self.vocab)
+        for term, term_id in self.vocab.items():
+            terms[term_id] = term
+        self._write_json(path / self.VOCAB_FILE, terms)
+
+        self._write_json(meta_path, {
+            "version": self.VERSION,
+            "fingerprint": fingerprint,
+            "k1": self.k1,
+            "b": self.b,
+            "epsilon": self.epsilon,
+            "num_terms": len(self.vocab),
+            "num_docs": self.corpus_size,
+        })
+
+    @staticmethod
+    def _write_json(path: Path, payload) -> None:
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(
+        cls,
+        directory: str,
+        fingerprint: Optional[str] = None,
+    ) -> Optional["BM25Index"]:
+        """
+        Opens a saved index with its arrays memory-mapped. Returns None if it
+        is missing, from another format version, or built from a different
+        chunk list than fingerprint.
+        """
+        path = Path(directory)
+        meta_path = path / cls.META_FILE
+        if not meta_path.exists():
+            return None
+
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+
+            if meta.get("version") != cls.VERSION:
+                return None
+            if fingerprint is not None and meta.get("fingerprint") != fingerprint:
+                return None
+
+            with open(path / cls.VOCAB_FILE, "r", encoding="utf-8") as f:
+                terms = json.load(f)
+
+            arrays = {
+                name: np.load(path / f"{name}.npy", mmap_mode="r")
+                for name in cls.ARRAYS
+            }
+        except (OSError, ValueError) as e:
+            print(f"[BM25] Ignoring unreadable index {path} → {e}")
+            return None
+
+        if len(terms) != meta["num_terms"] or len(arrays["doc_len"]) != meta["num_docs"]:
+            return None
+
+        return cls(
+            vocab={term: term_id for term_id, term in enumerate(terms)},
+            k1=meta["k1"],
+            b=meta["b"],
+            epsilon=meta["epsilon"],
+            **arrays,
+        )
@@ -0,0 +1,195 @@
+from langchain_community.vectorstores import Chroma
+from langchain_core.documents import Document
+from typing import Callable, List, Optional, Tuple
+from queue import Empty, Full, Queue
+import threading
+
+from src.documents_ingestion import DataIngestion, IngestionReport
+from src.vector_embedding import EmbeddingStore
+
+
+_DONE = object()
+
+
+def _put(queue: Queue, item, stop: threading.Event) -> bool:
+    """Blocking put that gives up once the build has been aborted."""
+    while not stop.is_set():
+        try:
+            queue.put(item, timeout=0.1)
+            return True
+        except Full:
+            continue
+    return False
+
+
+class StreamingIndexBuilder:
+    """
+    Builds the Chroma index as a chain of stages connected by bounded queues:
+    ingest (per file) -> chunk -> embed + write in fixed-size batches.
+    Parsing keeps going while earlier batches are embedded, and only a few
+    files' worth of raw documents are held in memory at any time.
+    """
+
+    def __init__(
+        self,
+        embedding_store: EmbeddingStore,
+        chunk_fn: Callable[[List[Document]], List[Document]],
+        batch_size: int = 64,
+        queue_size: int = 4,
+        workers: int = 1,
+        file_timeout: Optional[float] = None,
+        verbose: bool = True,
+    ):
+        self.embedding_store = embedding_store
+        self.chunk_fn = chunk_fn
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.workers = workers
+        self.file_timeout = file_timeout
+        self.verbose = verbose
+
+    def _ingest_stage(
+        self,
+        paths: List[str],
+        out_queue: Queue,
+        report: IngestionReport,
+        stop: threading.Event,
+    ) -> None:
+        try:
+            files = DataIngestion.list_files(paths)
+            report.files_total = len(files)
+
+            loaded = DataIngestion.iter_files(
+                files, self.workers, self.file_timeout
+            )
+            try:
+                for file_path, docs, error in loaded:
+                    if error is not None:
+                        print(f"[SKIP] {file_path} → {error}")
+                        report.add_error(file_path, error)
+                        continue
+
+                    report.files_loaded += 1
+                    report.documents += len(docs)
+                    if not _put(out_queue, docs, stop):
+                        return
+            finally:
+                loaded.close()
+
+            _put(out_queue, _DONE, stop)
+
+        except BaseException as e:
+            _put(out_queue, e, stop)
+
+    def _chunk_stage(
+        self,
+        in_queue: Queue,
+        out_queue: Queue,
+        stop: threading.Event,
+    ) -> None:
+        try:
+            while not stop.is_set():
+                try:
+                    item = in_queue.get(timeout=0.1)
+                except Empty:
+                    continue
+
+                if item is _DONE or isinstance(item, BaseException):
+                    _put(out_queue, item, stop)
+                    return
+
+                chunks = self.chunk_fn(item)
+                if chunks:
+                    _put(out_queue, chunks, stop)
+
+        except BaseException as e:
+            _put(out_queue, e, stop)
+
+    def _write_batch(self, vectordb: Chroma, batch: List[Document]) -> None:
+        vectordb.add_texts(
+            texts=[doc.page_content for doc in batch],
+            metadatas=[doc.metadata for doc in batch],
+            ids=EmbeddingStore.chunk_ids(batch),
+        )
+
+    def build(
+        self,
+        paths: List[str],
+        persist_directory: str = "./chroma_db",
+        collection_name: str = "rag_collection",
+    ) -> Tuple[Chroma, List[Document], IngestionReport]:
+
+        vectordb = Chroma(
+            persist_directory=persist_directory,
+            embedding_function=self.embedding_store.embeddings,
+            collection_name=collection_name,
+        )
+
+        report = IngestionReport()
+        stop = threading.Event()
+        docs_queue: Queue = Queue(maxsize=self.queue_size)
+        chunks_queue: Queue = Queue(maxsize=self.queue_size)
+
+        stages = [
+            threading.Thread(
+                target=self._ingest_stage,
+                args=(paths, docs_queue, report, stop),
+                daemon=True,
+            ),
+            threading.Thread(
+                target=self._chunk_stage,
+                args=(docs_queue, chunks_queue, stop),
+                daemon=True,
+            ),
+        ]
+        for stage in stages:
+            stage.start()
+
+        all_chunks: List[Document] = []
+        batch: List[Document] = []
+        written = 0
+
+        try:
+            while True:
+                item = chunks_queue.get()
+
+                if item is _DONE:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+
+                for doc in item:
+                    if not isinstance(doc.page_content, str):
+                        continue
+                    if not doc.page_content.strip():
+                        continue
+
+                    all_chunks.append(doc)
+                    batch.append(doc)
+
+                    if len(batch) >= self.batch_size:
+                        self._write_batch(vectordb, batch)
+                        written += len(batch)
+                        batch = []
+
+                        if self.verbose:
+                            print(f"[STREAM] Embedded {written} chunks...")
+
+            if batch:
+                self._write_batch(vectordb, batch)
+                written += len(batch)
+
+        finally:
+            stop.set()
+            for stage in stages:
+                stage.join()
+
+        print(f"[INGEST] Loaded documents: {report.documents}")
+
+        if not all_chunks:
+            raise RuntimeError("No documents loaded. Check PDF dependencies.")
+
+        if self.verbose:
+            print(f"[STREAM] Indexed {written} chunks.")
+
+        return vectordb, all_chunks, report
@@ -1,18 +1,75 @@
 from langchain_community.vectorstores import Chroma
 from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 from typing import List, Optional
 import os
 import shutil
 import torch
 
+from src.embedding_cache import CachedEmbeddings
+from src.inference_backend import (
+    DEFAULT_ARTIFACT_DIR,
+    model_source,
+    quantize_int8,
+    resolve_backend,
+)
+from src.micro_batcher import MicroBatcher
+
+
+class BatchedEmbeddings(Embeddings):
+    """
+    Coalesces query texts from concurrent requests into one encode call.
+    Identical strings inside a batch are encoded once; each caller gets
+    its own vectors back. embed_documents bypasses the batcher.
+    """
+
+    def __init__(
+        self,
+        base: Embeddings,
+        max_batch_size: int = 64,
+        max_wait_ms: float = 2.0,
+    ):
+        self.base = base
+        self.batcher = MicroBatcher(
+            self._encode_batch,
+            max_batch_size=max_batch_size,
+            max_wait_ms=max_wait_ms,
+            name="embed-batcher",
+        )
+
+    def _encode_batch(self, texts: List[str]) -> List[List[float]]:
+        unique = list(dict.fromkeys(texts))
+        vectors = dict(zip(unique, self.base.embed_documents(unique)))
+        return [vectors[text] for text in texts]
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        return self.batcher.submit(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_queries([text])[0]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.base.embed_documents(texts)
+
 
 class EmbeddingStore:
 
+    # Indexes written before the embedding ID was recorded were always
+    # built with the default model on fp32.
+    LEGACY_EMBEDDING_ID = "all-MiniLM-L6-v2@fp32"
+
     def __init__(
         self,
         model_name: str = "all-MiniLM-L6-v2",
-        device: Optional[str] = None
+        device: Optional[str] = None,
+        query_cache_size: int = 2048,
+        query_cache_ttl: Optional[float] = None,
+        query_batching: bool = False,
+        query_max_batch_size: int = 64,
+        query_max_wait_ms: float = 2.0,
+        backend: str = "fp32",
+        artifact_dir: str = DEFAULT_ARTIFACT_DIR,
     ):
         if device is None:
             device = "cuda" if torch.cuda.is_available() else "cpu"
@@ -20,13 +77,38 @@ class EmbeddingStore:
         self.device = device
         self.model_name = model_name
 
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name=f"sentence-transformers/{model_name}",
-            model_kwargs={"device": device},
+        model_id = f"sentence-transformers/{model_name}"
+        self.backend = resolve_backend(model_id, backend, device, artifact_dir)
+        source, backend_kwargs = model_source(model_id, self.backend, artifact_dir)
+        # Vectors from different backends are not interchangeable, so the
+        # index records this and is rebuilt when it changes.
+        self.embedding_id = f"{model_name}@{self.backend}"
+
+        encoder = HuggingFaceEmbeddings(
+            model_name=source,
+            model_kwargs={"device": device, **backend_kwargs},
             encode_kwargs={"normalize_embeddings": True},
         )
+        if self.backend == "int8":
+            quantize_int8(encoder.client)
+
+        self.batcher = None
+        if query_batching:
+            encoder = BatchedEmbeddings(
+                encoder,
+                max_batch_size=query_max_batch_size,
+                max_wait_ms=query_max_wait_ms,
+            )
+            self.batcher = encoder.batcher
+
+        self.embeddings = CachedEmbeddings(
+            encoder,
+            model_name=model_name,
+            max_size=query_cache_size,
+            ttl=query_cache_ttl,
+        )
 
-        print(f"Embedding model loaded on: {device}")
+        print(f"Embedding model loaded on: {device} ({self.backend})")
 
 
     @staticmethod
@@ -46,6 +128,27 @@ class EmbeddingStore:
         return valid
 
 
+    @staticmethod
+    def db_exists(persist_directory: str) -> bool:
+        return bool(
+            os.path.exists(persist_directory) and os.listdir(persist_directory)
+        )
+
+
+    def load_db(
+        self,
+        persist_directory: str = "./chroma_db",
+        collection_name: str = "rag_collection",
+    ) -> Chroma:
+
+        print("Loading existing Chroma database...")
+        return Chroma(
+            persist_directory=persist_directory,
+            embedding_function=self.embeddings,
+            collection_name=collection_name,
+        )
+
+
     def create_or_load_db(
         self,
         chunks: List[Document],
@@ -55,7 +158,7 @@ class EmbeddingStore:
     ) -> Chroma:
 
         chunks = self.validate_chunks(chunks)
-        db_exists = os.path.exists(persist_directory) and os.listdir(persist_directory)
+        db_exists = self.db_exists(persist_directory)
 
 
         if rebuild and db_exists:
@@ -65,20 +168,52 @@ class EmbeddingStore:
 
 
         if db_exists:
-            print("Loading existing Chroma database...")
-            return Chroma(
-                persist_directory=persist_directory,
-                embedding_function=self.embeddings,
-                collection_name=collection_name,
-            )
+            return self.load_db(persist_directory, collection_name)
 
 
         print("Creating new Chroma database...")
         vectordb = Chroma.from_documents(
             documents=chunks,
             embedding=self.embeddings,
+            ids=self.chunk_ids(chunks),
             persist_directory=persist_directory,
             collection_name=collection_name,
         )
 
         return vectordb
+
+
+    @staticmethod
+    def chunk_ids(chunks: List[Document]) -> Optional[List[str]]:
+        ids = [doc.metadata.get("chunk_id") for doc in chunks]
+        if not all(ids):
+            return None
+        return ids
+
+
+    def upsert_chunks(self, vectordb: Chroma, chunks: List[Document]) -> None:
+        chunks = self.validate_chunks(chunks)
+        vectordb.add_documents(chunks, ids=self.chunk_ids(chunks))
+
+
+    @staticmethod
+    def delete_chunks(vectordb: Chroma, ids: List[str]) -> None:
+        if ids:
+            vectordb.delete(ids=ids)
+
+
+    @staticmethod
+    def close_db(vectordb: Chroma) -> None:
+        """
+        Stops the Chroma client's system and drops it from chromadb's
+        per-path cache, so its directory can be deleted without leaking
+        the client and its SQLite connection.
+        """
+        client = getattr(vectordb, "_client", None)
+        cache = getattr(type(client), "_identifier_to_system", None)
+        if cache is None:
+            return
+
+        system = cache.pop(getattr(client, "_identifier", None), None)
+        if system is not None:
+            system.stop()
@@ -0,0 +1,138 @@
+import numpy as np
+import pytest
+
+from src.dense_index import FlatDenseIndex
+
+
+def random_vectors(n=500, dim=32, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.normal(size=(n, dim)).astype(np.float32)
+
+
+def exact_neighbours(vectors, queries, k):
+    """Reference: squared L2 to the normalized vectors, ties by position."""
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    results = []
+    for query in queries:
+        dist = ((normalized - query) ** 2).sum(axis=1)
+        order = np.lexsort((np.arange(len(dist)), dist))[:k]
+        results.append((order, dist[order]))
+    return results
+
+
+def test_float32_matches_exact_search():
+    vectors = random_vectors()
+    queries = random_vectors(20, seed=1)
+    index = FlatDenseIndex.build(vectors, "float32")
+
+    for (positions, distances), (expected, expected_dist) in zip(
+        index.search_many(queries, 10), exact_neighbours(vectors, queries, 10)
+    ):
+        np.testing.assert_array_equal(positions, expected)
+        np.testing.assert_allclose(distances, expected_dist, rtol=1e-4, atol=1e-4)
+
+
+def test_batched_search_matches_single_queries():
+    index = FlatDenseIndex.build(random_vectors(), "float32")
+    queries = random_vectors(5, seed=2)
+
+    batched = index.search_many(queries, 7)
+    for query, (positions, distances) in zip(queries, batched):
+        single_positions, single_distances = index.search_many(query, 7)[0]
+        np.testing.assert_array_equal(positions, single_positions)
+        np.testing.assert_allclose(distances, single_distances, rtol=1e-5)
+
+
+def test_ties_break_by_position_and_k_is_capped():
+    index = FlatDenseIndex.build(np.ones((6, 4)), "float32")
+
+    positions, distances = index.search_many(np.ones(4), 3)[0]
+    np.testing.assert_array_equal(positions, [0, 1, 2])
+
+    positions, _ = index.search_many(np.ones(4), 50)[0]
+    assert len(positions) == 6
+
+
+def test_empty_index_returns_no_hits():
+    index = FlatDenseIndex.build([], "float32")
+
+    positions, distances = index.search_many(np.ones((2, 4)), 5)[0]
+    assert len(positions) == 0 and len(distances) == 0
+
+
+def test_save_load_round_trip(tmp_path):
+    vectors = random_vectors()
+    queries = random_vectors(5, seed=3)
+    index = FlatDenseIndex.build(vectors, "float16")
+    index.save(str(tmp_path), "fp-1")
+
+    loaded = FlatDenseIndex.load(str(tmp_path), "fp-1")
+    assert loaded is not None
+    assert loaded.dtype == "float16"
+    assert isinstance(loaded.vectors, np.memmap)
+
+    for (positions, _), (loaded_positions, _) in zip(
+        index.search_many(queries, 10), loaded.search_many(queries, 10)
+    ):
+        np.testing.assert_array_equal(positions, loaded_positions)
+
+
+def test_load_rejects_other_fingerprint_and_missing_index(tmp_path):
+    FlatDenseIndex.build(random_vectors(), "float32").save(str(tmp_path), "fp-1")
+
+    assert FlatDenseIndex.load(str(tmp_path), "fp-2") is None
+    assert FlatDenseIndex.load(str(tmp_path / "missing"), "fp-1") is None
+
+
+@pytest.mark.parametrize("dtype", ["float16", "int8"])
+def test_compact_dtypes_with_rescoring_recover_float32_neighbours(dtype):
+    vectors = random_vectors(2000, 64)
+    queries = random_vectors(20, 64, seed=4)
+
+    reference = FlatDenseIndex.build(vectors, "float32").search_many(queries, 10)
+    index = FlatDenseIndex.build(vectors, dtype, rescore_factor=4)
+
+    for (expected, expected_dist), (positions, distances) in zip(
+        reference, index.search_many(queries, 10)
+    ):
+        np.testing.assert_array_equal(positions, expected)
+        # Rescored distances are the exact float32 ones.
+        np.testing.assert_allclose(distances, expected_dist, rtol=1e-4, atol=1e-4)
+
+
+def test_compact_dtype_sizes():
+    vectors = random_vectors(1000, 64)
+    reference = FlatDenseIndex.build(vectors, "float32")
+    index = FlatDenseIndex.build(vectors, "int8")
+
+    assert index.vectors.dtype == np.int8
+    assert index.nbytes < 0.3 * reference.nbytes
+    # The float32 copy kept for rescoring is counted on disk.
+    assert index.disk_nbytes > reference.disk_nbytes
+
+
+def test_compact_index_reloads_full_matrix_memory_mapped(tmp_path):
+    index = FlatDenseIndex.build(random_vectors(), "int8")
+    index.save(str(tmp_path), "fp-1")
+
+    loaded = FlatDenseIndex.load(str(tmp_path), "fp-1", rescore_factor=2)
+    assert isinstance(loaded.full, np.memmap)
+    assert isinstance(loaded.scales, np.memmap)
+    assert loaded.rescore_factor == 2
+
+
+@pytest.mark.parametrize("dtype", FlatDenseIndex.DTYPES)
+def test_update_matches_a_fresh_build(dtype):
+    vectors = random_vectors()
+    added = random_vectors(50, seed=2)
+    keep = np.random.default_rng(3).random(len(vectors)) > 0.3
+
+    updated = FlatDenseIndex.build(vectors, dtype).update(keep, added)
+    fresh = FlatDenseIndex.build(np.concatenate([vectors[keep], added]), dtype)
+
+    np.testing.assert_array_equal(updated.vectors, fresh.vectors)
+    queries = random_vectors(5, seed=4)
+    for (positions, _), (expected, _) in zip(
+        updated.search_many(queries, 10), fresh.search_many(queries, 10)
+    ):
+        np.testing.assert_array_equal(positions, expected)
@@ -0,0 +1,121 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("langchain_core")
+pytest.importorskip("langchain_community")
+
+from src.retrieval import HybridRetriever
+
+
+def make_retriever(fusion="alpha", rrf_k=60):
+    # _fuse only needs the fusion settings and the corpus size.
+    retriever = object.__new__(HybridRetriever)
+    retriever.fusion = fusion
+    retriever.rrf_k = rrf_k
+    retriever.documents = [None] * 200
+    return retriever
+
+
+def reference_alpha(dense_positions, dense_distances, bm25_positions, bm25_scores, alpha):
+    # Score map of the original dict-based fusion.
+    scores = {}
+    dense = HybridRetriever._normalize(1 / (1 + np.asarray(dense_distances, dtype=float)))
+    for position, score in zip(dense_positions, dense):
+        scores.setdefault(position, alpha * score)
+    sparse = HybridRetriever._normalize(np.asarray(bm25_scores, dtype=float))
+    seen = set()
+    for position, score in zip(bm25_positions, sparse):
+        if position in seen:
+            continue
+        seen.add(position)
+        scores[position] = scores.get(position, 0.0) + (1 - alpha) * score
+    return scores
+
+
+def fuse(
+    retriever, dense_positions, dense_distances, bm25_positions, bm25_scores,
+    k=10, alpha=0.5, bm25_k=None,
+):
+    return retriever._fuse(
+        np.asarray(dense_positions, dtype=np.int64),
+        np.asarray(dense_distances, dtype=np.float64),
+        np.asarray(bm25_positions, dtype=np.int64),
+        np.asarray(bm25_scores, dtype=np.float64),
+        k,
+        alpha,
+        len(bm25_scores) if bm25_k is None else bm25_k,
+    )
+
+
+def test_alpha_fusion_matches_score_map():
+    rng = np.random.default_rng(0)
+    dense_positions = rng.choice(40, size=20, replace=False)
+    dense_distances = np.sort(rng.uniform(0.2, 1.5, size=20))
+    bm25_positions = rng.choice(40, size=15, replace=False)
+    bm25_scores = np.sort(rng.uniform(0.5, 8.0, size=15))[::-1]
+
+    expected = reference_alpha(dense_positions, dense_distances, bm25_positions, bm25_scores, 0.3)
+    positions, scores = fuse(
+        make_retriever(), dense_positions, dense_distances,
+        bm25_positions, bm25_scores, k=10, alpha=0.3,
+    )
+
+    best = sorted(expected.items(), key=lambda item: (-item[1], item[0]))[:10]
+    assert positions.tolist() == [position for position, _ in best]
+    np.testing.assert_allclose(scores, [score for _, score in best])
+
+
+def test_rrf_sums_reciprocal_ranks_of_deduped_hits():
+    positions, scores = fuse(
+        make_retriever("rrf"), [5, 3, 5, 9], [0.1, 0.2, 0.3, 0.4], [3, 7], [2.0, 1.0],
+    )
+
+    assert positions.tolist() == [3, 5, 7, 9]
+    np.testing.assert_allclose(scores, [1 / 62 + 1 / 61, 1 / 61, 1 / 62, 1 / 63])
+
+
+def test_rrf_ignores_zero_score_bm25_filler():
+    # Two documents match the query; BM25 pads its top-k with 20 zero-score
+    # documents that are also the dense hits.
+    dense_positions = np.arange(100, 120)
+    dense_distances = np.linspace(0.1, 1.0, 20)
+    bm25_positions = np.concatenate([[50, 51], np.arange(119, 99, -1)])
+    bm25_scores = np.concatenate([[3.0, 1.5], np.zeros(20)])
+
+    positions, scores = fuse(
+        make_retriever("rrf"), dense_positions, dense_distances,
+        bm25_positions, bm25_scores, k=5,
+    )
+
+    # Dense order is kept; filler contributes nothing.
+    assert positions.tolist() == [50, 100, 51, 101, 102]
+    np.testing.assert_allclose(scores, [1 / 61, 1 / 61, 1 / 62, 1 / 62, 1 / 63])
+
+
+def test_dense_hits_without_distance_are_dropped():
+    positions, _ = fuse(
+        make_retriever("rrf"), [4, 2, 8], [0.1, np.nan, 0.3], [], [],
+    )
+    assert positions.tolist() == [4, 8]
+
+
+def test_alpha_fusion_drops_filler_and_breaks_ties_by_position():
+    positions, scores = fuse(
+        make_retriever(), [], [], [9, 4, 6, 1], [2.0, 2.0, 0.0, 0.0], alpha=0.5,
+    )
+
+    assert positions.tolist() == [4, 9]
+    np.testing.assert_allclose(scores, [0.5, 0.5])
+
+
+def test_alpha_fusion_of_short_bm25_list_matches_zero_padded_list():
+    retriever = make_retriever()
+    dense = ([1, 2, 3], [0.2, 0.4, 0.9])
+
+    short = fuse(retriever, *dense, [7, 8], [4.0, 1.0], k=5, bm25_k=50)
+    padded = fuse(
+        retriever, *dense, np.arange(7, 57), np.r_[4.0, 1.0, np.zeros(48)], k=5,
+    )
+
+    np.testing.assert_array_equal(short[0], padded[0])
+    np.testing.assert_allclose(short[1], padded[1])
@@ -0,0 +1,44 @@
+from pathlib import Path
+import sqlite3
+import uuid
+
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from src.index_versions import IndexVersions
+
+
+def make_index(directory):
+    directory.mkdir(parents=True)
+    with sqlite3.connect(directory / IndexVersions.CHROMA_DB) as conn:
+        conn.execute("CREATE TABLE embeddings (id TEXT)")
+        conn.execute("INSERT INTO embeddings VALUES ('c1')")
+
+    segment = directory / str(uuid.uuid4())
+    segment.mkdir()
+    (segment / "data_level0.bin").write_bytes(b"hnsw")
+
+    for derived in ("bm25_index", "dense_index"):
+        (directory / derived).mkdir()
+        (directory / derived / "meta.json").write_text("{}")
+    (directory / "chunk_snapshot.json").write_text("{}")
+    return segment.name
+
+
+def test_copy_version_copies_only_the_chroma_store(tmp_path):
+    versions = IndexVersions(str(tmp_path / "root"))
+    live = tmp_path / "root" / "versions" / "live"
+    segment = make_index(live)
+
+    # The live database stays open for reads during the copy.
+    with sqlite3.connect(live / IndexVersions.CHROMA_DB) as reader:
+        reader.execute("SELECT * FROM embeddings").fetchall()
+        copy = versions.copy_version(str(live))
+
+    names = {path.name for path in Path(copy).iterdir()}
+    assert names == {IndexVersions.CHROMA_DB, segment}
+    assert versions.has_index(copy)
+
+    with sqlite3.connect(Path(copy) / IndexVersions.CHROMA_DB) as conn:
+        assert conn.execute("SELECT id FROM embeddings").fetchall() == [("c1",)]
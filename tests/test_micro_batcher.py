@@ -0,0 +1,43 @@
+import pytest
+
+from src import metrics
+from src.micro_batcher import MicroBatcher
+
+
+def test_results_are_split_per_caller():
+    batcher = MicroBatcher(lambda items: [x * 2 for x in items], name="test-double")
+
+    assert batcher.submit([1, 2, 3]) == [2, 4, 6]
+    assert batcher.stats()["items"] == 3
+
+
+def test_short_result_list_fails_the_callers():
+    batcher = MicroBatcher(lambda items: items[:1], name="test-short")
+
+    with pytest.raises(RuntimeError, match="1 results for 2 items"):
+        batcher.submit([1, 2])
+
+
+def test_base_exception_fails_the_callers_and_keeps_the_worker():
+    class Abort(BaseException):
+        pass
+
+    def batch_fn(items):
+        if items == ["abort"]:
+            raise Abort()
+        return items
+
+    batcher = MicroBatcher(batch_fn, name="test-abort")
+
+    with pytest.raises(Abort):
+        batcher.submit(["abort"])
+    assert batcher.submit(["ok"]) == ["ok"]
+
+
+def test_stats_are_rendered_on_metrics():
+    batcher = MicroBatcher(lambda items: items, max_batch_size=4, name="test-metrics")
+    batcher.submit([1, 2])
+
+    rendered = metrics.render()
+    assert 'rag_batcher_mean_batch_fill{batcher="test-metrics"} 0.5' in rendered
+    assert 'rag_batcher_mean_queue_ms{batcher="test-metrics"}' in rendered
@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("langchain_core")
+pytest.importorskip("langchain_community")
+
+from langchain_core.documents import Document
+
+from src.retrieval import HybridRetriever
+
+
+class FakeCollection:
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+        self.fetched = []
+
+    def get(self, ids, include):
+        self.fetched.extend(ids)
+        return {
+            "ids": ids,
+            "embeddings": [self.vectors[int(i[1:])] for i in ids],
+        }
+
+
+class FakeEmbeddings:
+
+    def __init__(self, dim):
+        self.dim = dim
+
+    def embed_documents(self, texts):
+        return [np.ones(self.dim).tolist() for _ in texts]
+
+
+class FakeVectorStore:
+
+    def __init__(self, vectors):
+        self._collection = FakeCollection(vectors)
+        self.embeddings = FakeEmbeddings(vectors.shape[1])
+
+
+def make_documents(texts, start=0):
+    return [
+        Document(
+            page_content=text,
+            metadata={"chunk_id": f"c{i}", "source": "s", "page": i},
+        )
+        for i, text in enumerate(texts, start)
+    ]
+
+
+def test_numpy_backend_maps_rescore_matrix_after_build(tmp_path):
+    documents = make_documents([f"doc {i}" for i in range(50)])
+    vectors = np.random.default_rng(0).normal(size=(50, 8)).astype(np.float32)
+
+    retriever = HybridRetriever(
+        FakeVectorStore(vectors),
+        documents,
+        dense_backend="numpy",
+        dense_dtype="int8",
+        dense_rescore_factor=3,
+        dense_index_dir=str(tmp_path),
+    )
+
+    assert isinstance(retriever.dense.full, np.memmap)
+    assert retriever.dense.rescore_factor == 3
+
+
+def test_incremental_update_matches_a_fresh_build(tmp_path):
+    vectors = np.random.default_rng(0).normal(size=(60, 8)).astype(np.float32)
+    store = FakeVectorStore(vectors)
+    texts = [f"doc {i} term{i % 7} term{i % 11}" for i in range(60)]
+
+    def retriever(documents, directory, previous=None):
+        return HybridRetriever(
+            store,
+            documents,
+            index_dir=str(tmp_path / directory / "bm25"),
+            dense_backend="numpy",
+            dense_dtype="int8",
+            dense_index_dir=str(tmp_path / directory / "dense"),
+            previous=previous,
+        )
+
+    documents = make_documents(texts[:50])
+    live = retriever(documents, "v1")
+
+    updated = [doc for i, doc in enumerate(documents) if i % 5] + make_documents(texts[50:], 50)
+    store._collection.fetched.clear()
+    patched = retriever(updated, "v2", previous=live)
+    # Only the new chunks' vectors are read back.
+    assert store._collection.fetched == [f"c{i}" for i in range(50, 60)]
+
+    fresh = retriever(updated, "v3")
+    for query in (["term3"], ["doc", "term5", "term10"], ["missing"]):
+        np.testing.assert_allclose(
+            patched.bm25.get_scores(query), fresh.bm25.get_scores(query)
+        )
+    np.testing.assert_array_equal(patched.dense.vectors, fresh.dense.vectors)
+    assert isinstance(patched.dense.full, np.memmap)
@@ -0,0 +1,57 @@
+import sqlite3
+
+from src.score_cache import RerankScoreCache
+
+
+def test_scores_persist_across_instances(tmp_path):
+    db_path = str(tmp_path / "scores.sqlite3")
+
+    cache = RerankScoreCache(db_path=db_path)
+    cache.put_many("model", "a  query", [("c1", 0.5), ("c2", -1.0)])
+    cache.close()
+
+    reopened = RerankScoreCache(db_path=db_path)
+    assert reopened.get_many("model", "a query", ["c1", "c2", "c3"]) == {
+        "c1": 0.5, "c2": -1.0,
+    }
+    assert reopened.disk_hits == 2
+    assert reopened.misses == 1
+    reopened.close()
+
+
+def test_disk_tier_keeps_the_latest_writes(tmp_path):
+    db_path = str(tmp_path / "scores.sqlite3")
+
+    cache = RerankScoreCache(max_size=0, db_path=db_path, max_disk_entries=100)
+    # The 1000th write triggers a trim down to the last 100.
+    for batch in range(10):
+        cache.put_many("model", "q", [(f"c{batch}-{i}", float(i)) for i in range(100)])
+        cache.flush()
+    # Rewriting a trimmed entry makes it the newest.
+    cache.put_many("model", "q", [("c0-0", 9.0)])
+    cache.close()
+
+    with sqlite3.connect(db_path) as conn:
+        (count,) = conn.execute("SELECT COUNT(*) FROM rerank_scores").fetchone()
+        (mode,) = conn.execute("PRAGMA journal_mode").fetchone()
+    assert count == 101
+    assert mode == "wal"
+
+    reopened = RerankScoreCache(max_size=0, db_path=db_path)
+    assert reopened.get_many("model", "q", ["c0-0", "c0-1", "c9-0"]) == {
+        "c0-0": 9.0, "c9-0": 0.0,
+    }
+    reopened.close()
+
+
+def test_flush_waits_for_queued_writes(tmp_path):
+    db_path = str(tmp_path / "scores.sqlite3")
+
+    cache = RerankScoreCache(db_path=db_path)
+    cache.put_many("model", "q", [("c1", 1.0)])
+    cache.flush()
+
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute("SELECT chunk_id, score FROM rerank_scores").fetchall()
+    assert rows == [("c1", 1.0)]
+    cache.close()
@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+from src.sparse_index import BM25Index
+
+
+def random_corpus(num_docs=200, vocab_size=60, seed=0):
+    rng = np.random.default_rng(seed)
+    # Zipf-like term frequencies so some terms appear in most documents and
+    # get a negative raw IDF (floored to epsilon * average IDF).
+    weights = 1.0 / np.arange(1, vocab_size + 1)
+    weights /= weights.sum()
+    return [
+        [f"t{i}" for i in rng.choice(vocab_size, rng.integers(1, 30), p=weights)]
+        for _ in range(num_docs)
+    ]
+
+
+QUERIES = [
+    ["t0"], ["t1", "t7", "t7"], ["t3", "t40", "missing"], ["t59"], ["missing"], [],
+]
+
+
+def test_scores_match_rank_bm25():
+    rank_bm25 = pytest.importorskip("rank_bm25")
+
+    corpus = random_corpus()
+    reference = rank_bm25.BM25Okapi(corpus)
+    index = BM25Index.build(corpus)
+
+    for query in QUERIES:
+        np.testing.assert_array_equal(index.get_scores(query), reference.get_scores(query))
+
+
+def test_top_k_is_best_first_with_ties_by_document():
+    corpus = random_corpus()
+    index = BM25Index.build(corpus)
+
+    for query in QUERIES:
+        scores = index.get_scores(query)
+        expected = np.lexsort((np.arange(len(scores)), -scores))[:10]
+        # Documents that share no term with the query are never returned.
+        expected = expected[scores[expected] > 0]
+
+        doc_ids, top_scores = index.top_k(query, 10)
+        np.testing.assert_array_equal(doc_ids, expected)
+        np.testing.assert_array_equal(top_scores, scores[expected])
+
+
+def test_top_k_many_matches_top_k():
+    index = BM25Index.build(random_corpus())
+
+    for query, (doc_ids, scores) in zip(QUERIES, index.top_k_many(QUERIES, 7)):
+        expected_ids, expected_scores = index.top_k(query, 7)
+        np.testing.assert_array_equal(doc_ids, expected_ids)
+        np.testing.assert_array_equal(scores, expected_scores)
+
+
+def test_save_load_round_trip(tmp_path):
+    index = BM25Index.build(random_corpus())
+    index.save(str(tmp_path), "fp-1")
+
+    loaded = BM25Index.load(str(tmp_path), "fp-1")
+    assert loaded is not None
+    assert isinstance(loaded.doc_ids, np.memmap)
+
+    for query in QUERIES:
+        np.testing.assert_array_equal(loaded.get_scores(query), index.get_scores(query))
+
+
+def test_load_rejects_other_fingerprint_and_missing_index(tmp_path):
+    BM25Index.build(random_corpus()).save(str(tmp_path), "fp-1")
+
+    assert BM25Index.load(str(tmp_path), "fp-2") is None
+    assert BM25Index.load(str(tmp_path / "missing"), "fp-1") is None
+
+
+def test_update_matches_a_fresh_build():
+    corpus = random_corpus()
+    keep = np.random.default_rng(1).random(len(corpus)) > 0.2
+    # A larger vocabulary, so the update also adds terms.
+    added = random_corpus(30, vocab_size=80, seed=5)
+    kept = [doc for doc, k in zip(corpus, keep) if k]
+
+    updated = BM25Index.build(corpus).update(keep, added)
+    fresh = BM25Index.build(kept + added)
+
+    assert set(updated.vocab) == set(fresh.vocab)
+    for query in QUERIES + [["t70", "t1"]]:
+        np.testing.assert_allclose(updated.get_scores(query), fresh.get_scores(query))
+        np.testing.assert_array_equal(
+            updated.top_k(query, 10)[0], fresh.top_k(query, 10)[0]
+        )